@@ -3,6 +3,9 @@ import mysql.connector
 import random
 import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 def _load_api_key():
     """Carga la clave de API desde el archivo de configuración."""
@@ -29,53 +32,57 @@ def _get_destinos_from_local_json():
         print("ERROR: No se encontró el archivo de fallback destinos_data.json.")
         return []
 
-from database import crear_conexion
+from database import crear_conexion, ESCRITURA, LECTURA
+from persistencia.cache_catalogo import cache_destinos, cache_paquetes
+from persistencia.destinos_repo import DestinosRepository
+from persistencia.inventario_destinos import InventarioRepository
+from persistencia.precios_paquetes import recalcular_precios, recalcular_por_destinos, paquetes_con_destinos
+from persistencia.reservas_repo import ReservasRepository
+from persistencia.resumenes_repo import ResumenesRepository, descontar_paquete
+from servicio_negocio.reserva_service import ReservaService
+from servicio_negocio.cotizador_paquetes import cotizador_paquetes
+from servicio_negocio.recomendador_destinos import recomendador_destinos
 
 def get_destinos(termino_busqueda=None):
     """
-    Obtiene destinos desde la base de datos local.
-    Si hay un término de búsqueda, filtra por nombre.
+    Obtiene destinos desde la base de datos local, a través de la caché del catálogo (cache_destinos).
+    Si hay un término de búsqueda, filtra por nombre usando el índice en memoria
+    (ignora acentos y mayúsculas, y ordena por relevancia).
+    Solo si la base de datos no responde se usan los datos locales (destinos_data.json).
     Devuelve una tupla: (lista_de_destinos, fuente_de_datos).
     """
-    conn = crear_conexion()
-    if not conn:
-        return _get_destinos_from_local_json(), "Local (Fallback)"
-
-    cursor = conn.cursor(dictionary=True)
-    try:
+    repo = DestinosRepository()
+    destinos = repo.obtener_todos()
+    if destinos:
         if termino_busqueda:
-            query = "SELECT * FROM destinos WHERE nombre LIKE %s"
-            cursor.execute(query, (f"%{termino_busqueda}%",))
-        else:
-            query = "SELECT * FROM destinos"
-            cursor.execute(query)
-        
-        destinos = cursor.fetchall()
-        return destinos, "Database"
-    except mysql.connector.Error as e:
-        print(f"Error al obtener destinos de la BD: {e}")
+            destinos = repo.buscar_por_nombre(termino_busqueda)
+        return [
+            {'id': d.id, 'nombre': d.nombre, 'descripcion': d.descripcion, 'actividades': d.actividades, 'costo': d.costo}
+            for d in destinos
+        ], "Database"
+    # El catálogo vino vacío: si es porque la base de datos no responde, se usan los datos locales.
+    conn = crear_conexion(LECTURA)
+    if not conn:
         return _get_destinos_from_local_json(), "Local (Fallback)"
-    finally:
-        cursor.close()
-        conn.close()
+    conn.close()
+    return [], "Database"
 
 def get_paquetes():
     """
     Endpoint de la API para obtener todos los paquetes con sus detalles desde la BD local.
+    'costo_total' es el precio por persona que se cobra al reservar y 'costo_destinos' la suma de sus
+    destinos; ambos ya vienen calculados en la tabla (ver persistencia/precios_paquetes.py).
     """
-    conn = crear_conexion()
+    conn = crear_conexion(LECTURA)
     if not conn: return []
     cursor = conn.cursor(dictionary=True)
     try:
         query = """
-            SELECT p.id, p.nombre, p.fecha_inicio, p.fecha_fin, p.cupos,
-                   GROUP_CONCAT(d.nombre SEPARATOR ', ') AS destinos,
-                   SUM(d.costo) AS costo_total
-            FROM paquetes p
-            JOIN paquete_destinos pd ON p.id = pd.paquete_id
-            JOIN destinos d ON pd.destino_id = d.id
-            GROUP BY p.id, p.nombre, p.fecha_inicio, p.fecha_fin
-            ORDER BY p.id;
+            SELECT id, nombre, fecha_inicio, fecha_fin, cupos,
+                   destinos_nombres AS destinos, precio AS costo_total, costo_destinos
+            FROM paquetes
+            WHERE destinos_nombres IS NOT NULL
+            ORDER BY id;
         """
         cursor.execute(query)
         return cursor.fetchall()
@@ -88,67 +95,149 @@ def get_paquetes():
 
 # --- Sincronización con API Externa ---
 
-def sync_destinos_from_api():
+OPENTRIPMAP_URL = "http://api.opentripmap.com/0.1/en/places"
+CIUDADES_SYNC = ["Paris", "Rome", "Tokyo", "New York", "London", "Cusco", "Sydney", "Cairo"]
+
+class _LimitadorTasa:
+    """Reparte los permisos de petición a ritmo constante entre todos los hilos (máximo 'por_segundo')."""
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1.0 / por_segundo if por_segundo else 0.0
+        self._siguiente = time.monotonic()
+        self._lock = threading.Lock()
+
+    def esperar(self):
+        if not self.intervalo: return
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._siguiente)
+            self._siguiente = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+    def frenar(self, segundos):
+        """El proveedor nos pidió esperar (HTTP 429): retrasamos a todos los hilos."""
+        with self._lock:
+            self._siguiente = max(self._siguiente, time.monotonic() + segundos)
+
+def _get_json(session, limitador, url, params, reintentos=3):
+    """GET con límite de tasa que respeta los 429 (Retry-After) y reintenta los errores temporales."""
+    for intento in range(reintentos + 1):
+        limitador.esperar()
+        try:
+            response = session.get(url, params=params, timeout=10)
+        except requests.exceptions.RequestException:
+            if intento == reintentos: raise
+            time.sleep(0.5 * 2 ** intento)
+            continue
+        if response.status_code == 429 or response.status_code >= 500:
+            if intento == reintentos:
+                response.raise_for_status()
+            espera = response.headers.get('Retry-After')
+            limitador.frenar(float(espera) if espera and espera.replace('.', '', 1).isdigit() else 0.5 * 2 ** intento)
+            continue
+        response.raise_for_status()
+        return response.json()
+
+def _destino_de_ciudad(session, limitador, base_url, api_key, ciudad):
+    """Consulta una ciudad (geoname + atracciones cercanas) y arma la fila a guardar, o None si no hay datos."""
+    geo_data = _get_json(session, limitador, f"{base_url}/geoname", {'name': ciudad, 'apikey': api_key})
+    if 'lon' not in geo_data: return None
+
+    places_data = _get_json(session, limitador, f"{base_url}/radius", {
+        'radius': 5000, 'lon': geo_data['lon'], 'lat': geo_data['lat'],
+        'kinds': 'interesting_places', 'limit': 5, 'apikey': api_key,
+    })
+    if not places_data.get('features'): return None
+
+    nombres_atracciones = [p['properties']['name'] for p in places_data['features'] if p['properties']['name']]
+    if not nombres_atracciones: return None
+
+    return (
+        geo_data.get('geonameId'),
+        f"{geo_data['name']}, {geo_data['country']}",
+        f"Descubre las maravillas de {geo_data['name']}.",
+        ", ".join(nombres_atracciones[:3]),
+        round(random.uniform(800.0, 3000.0), 2)
+    )
+
+def _upsert_destinos(cursor, filas):
+    """Guarda un lote completo con un único INSERT de varias filas ... ON DUPLICATE KEY UPDATE."""
+    # Usamos INSERT ... ON DUPLICATE KEY UPDATE para insertar o actualizar si el ID ya existe.
+    # Esto requiere que 'id' sea PRIMARY KEY o UNIQUE.
+    valores = ", ".join(["(%s, %s, %s, %s, %s)"] * len(filas))
+    query = f"""
+        INSERT INTO destinos (id, nombre, descripcion, actividades, costo)
+        VALUES {valores}
+        ON DUPLICATE KEY UPDATE
+        nombre=VALUES(nombre), descripcion=VALUES(descripcion), actividades=VALUES(actividades), costo=VALUES(costo)
+    """
+    cursor.execute(query, [v for fila in filas for v in fila])
+
+def sync_destinos_from_api(ciudades=None, max_hilos=8, peticiones_por_segundo=10, tamano_lote=500, base_url=None, api_key=None):
     """
     Obtiene destinos de la API de OpenTripMap y los guarda/actualiza en la BD local.
+    Las ciudades se consultan en paralelo (con un límite de peticiones por segundo para respetar
+    al proveedor) reutilizando las conexiones HTTP. Recién con todas las respuestas se abre la conexión
+    a la base de datos y se guardan por lotes de 'tamano_lote', en una transacción corta.
+    Sin 'ciudades', sincroniza 5 ciudades al azar como antes.
     """
-    api_key = _load_api_key()
+    api_key = api_key or _load_api_key()
     if not api_key or api_key == "TU_API_KEY_AQUI":
         print("ADVERTENCIA: No se puede sincronizar. La clave de API no está configurada.")
         return False, "Clave API no válida"
 
-    ciudades = ["Paris", "Rome", "Tokyo", "New York", "London", "Cusco", "Sydney", "Cairo"]
-    random.shuffle(ciudades)
-    ciudades_a_buscar = ciudades[:5] # Sincronizamos 5 ciudades aleatorias
+    if ciudades is None:
+        ciudades = list(CIUDADES_SYNC)
+        random.shuffle(ciudades)
+        ciudades = ciudades[:5] # Sincronizamos 5 ciudades aleatorias
+    base_url = base_url or OPENTRIPMAP_URL
+
+    # Una sola sesión HTTP compartida: mantiene las conexiones abiertas (keep-alive) entre peticiones.
+    session = requests.Session()
+    adaptador = requests.adapters.HTTPAdapter(pool_connections=max_hilos, pool_maxsize=max_hilos)
+    session.mount('http://', adaptador)
+    session.mount('https://', adaptador)
+    limitador = _LimitadorTasa(peticiones_por_segundo)
 
-    conn = crear_conexion()
+    # 1. Primero todas las peticiones, sin tener ocupada una conexión ni una transacción de MySQL mientras tanto.
+    filas = []
+    fallidas = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max_hilos) as executor:
+            futuros = [executor.submit(_destino_de_ciudad, session, limitador, base_url, api_key, c) for c in ciudades]
+            for futuro in as_completed(futuros):
+                try:
+                    fila = futuro.result()
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    print(f"Error de red al sincronizar una ciudad: {e}")
+                    fallidas += 1
+                    continue
+                if fila is not None:
+                    filas.append(fila)
+    finally:
+        session.close()
+    if fallidas and not filas:
+        return False, "Error de red"
+
+    # 2. Después, una transacción corta con los upserts por lotes.
+    conn = crear_conexion(ESCRITURA)
     if not conn: return False, "Sin conexión a BD"
     cursor = conn.cursor()
-
-    destinos_agregados = 0
     try:
-        for ciudad in ciudades_a_buscar:
-            geo_url = f"http://api.opentripmap.com/0.1/en/places/geoname?name={ciudad}&apikey={api_key}"
-            geo_response = requests.get(geo_url, timeout=10)
-            geo_response.raise_for_status()
-            geo_data = geo_response.json()
-
-            if 'lon' not in geo_data: continue
-
-            places_url = f"http://api.opentripmap.com/0.1/en/places/radius?radius=5000&lon={geo_data['lon']}&lat={geo_data['lat']}&kinds=interesting_places&limit=5&apikey={api_key}"
-            places_response = requests.get(places_url, timeout=10)
-            places_response.raise_for_status()
-            places_data = places_response.json()
-
-            if not places_data.get('features'): continue
-
-            nombres_atracciones = [p['properties']['name'] for p in places_data['features'] if p['properties']['name']]
-            if not nombres_atracciones: continue
-
-            # Usamos INSERT ... ON DUPLICATE KEY UPDATE para insertar o actualizar si el ID ya existe.
-            # Esto requiere que 'id' sea PRIMARY KEY o UNIQUE.
-            query = """
-                INSERT INTO destinos (id, nombre, descripcion, actividades, costo)
-                VALUES (%s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                nombre=VALUES(nombre), descripcion=VALUES(descripcion), actividades=VALUES(actividades), costo=VALUES(costo)
-            """
-            datos_destino = (
-                geo_data.get('geonameId'),
-                f"{geo_data['name']}, {geo_data['country']}",
-                f"Descubre las maravillas de {geo_data['name']}.",
-                ", ".join(nombres_atracciones[:3]),
-                round(random.uniform(800.0, 3000.0), 2)
-            )
-            cursor.execute(query, datos_destino)
-            destinos_agregados += 1
+        for inicio in range(0, len(filas), tamano_lote):
+            _upsert_destinos(cursor, filas[inicio:inicio + tamano_lote])
+        recalcular_precios(cursor)  # Pueden haber cambiado costos de destinos incluidos en paquetes
         conn.commit()
-        return True, f"{destinos_agregados} destinos sincronizados."
-    except requests.exceptions.RequestException as e:
-        print(f"Error de red al sincronizar con la API: {e}")
-        return False, "Error de red"
+        cache_destinos.invalidar()
+        cache_paquetes.invalidar()
+        mensaje = f"{len(filas)} destinos sincronizados."
+        if fallidas:
+            mensaje += f" ({fallidas} ciudades con error de red)"
+        return True, mensaje
     except mysql.connector.Error as e:
         print(f"Error de BD al sincronizar: {e}")
+        conn.rollback()
         return False, "Error de BD"
     finally:
         cursor.close()
@@ -157,13 +246,14 @@ def sync_destinos_from_api():
 # --- API Endpoints para Escritura (Destinos) ---
 
 def create_destino(nombre, descripcion, actividades, costo):
-    conn = crear_conexion()
+    conn = crear_conexion(ESCRITURA)
     if not conn: return False
     cursor = conn.cursor()
     try:
         query = "INSERT INTO destinos (nombre, descripcion, actividades, costo) VALUES (%s, %s, %s, %s)" # ID será autoincremental
         cursor.execute(query, (nombre, descripcion, actividades, costo))
         conn.commit()
+        cache_destinos.invalidar()
         return True
     except mysql.connector.Error as e:
         print(f"Error en la API al crear destino: {e}")
@@ -173,7 +263,7 @@ def create_destino(nombre, descripcion, actividades, costo):
         conn.close()
 
 def update_destino(destino_id, nuevos_datos):
-    conn = crear_conexion()
+    conn = crear_conexion(ESCRITURA)
     if not conn: return False
     cursor = conn.cursor()
     try:
@@ -182,26 +272,40 @@ def update_destino(destino_id, nuevos_datos):
         values.append(destino_id)
         query = f"UPDATE destinos SET {set_clause} WHERE id = %s"
         cursor.execute(query, tuple(values))
+        actualizado = cursor.rowcount > 0
+        if actualizado and ('costo' in nuevos_datos or 'nombre' in nuevos_datos):
+            # En la misma transacción, los paquetes que incluyen este destino quedan con su precio al día.
+            recalcular_por_destinos(cursor, [destino_id])
+            cache_paquetes.invalidar()
         conn.commit()
-        return cursor.rowcount > 0
+        cache_destinos.invalidar()
+        return actualizado
     except mysql.connector.Error as e:
         print(f"Error en la API al actualizar destino: {e}")
+        conn.rollback()
         return False
     finally:
         cursor.close()
         conn.close()
 
 def delete_destino(destino_id):
-    conn = crear_conexion()
+    conn = crear_conexion(ESCRITURA)
     if not conn: return False
     cursor = conn.cursor()
     try:
+        # Se quita en cascada de los paquetes que lo incluían: hay que recalcular su precio después.
+        afectados = paquetes_con_destinos(cursor, [destino_id])
         query = "DELETE FROM destinos WHERE id = %s"
         cursor.execute(query, (destino_id,))
+        borrado = cursor.rowcount > 0
+        recalcular_precios(cursor, afectados)
         conn.commit()
-        return cursor.rowcount > 0
+        cache_destinos.invalidar()
+        cache_paquetes.invalidar()
+        return borrado
     except mysql.connector.Error as e:
         print(f"Error en la API al eliminar destino: {e}")
+        conn.rollback()
         return False
     finally:
         cursor.close()
@@ -210,7 +314,7 @@ def delete_destino(destino_id):
 # --- API Endpoints para Escritura (Paquetes) ---
 
 def create_paquete(nombre, fecha_inicio, fecha_fin, cupos, destinos_ids):
-    conn = crear_conexion()
+    conn = crear_conexion(ESCRITURA)
     if not conn: return False
     cursor = conn.cursor()
     try:
@@ -222,8 +326,10 @@ def create_paquete(nombre, fecha_inicio, fecha_fin, cupos, destinos_ids):
         query_paquete_destinos = "INSERT INTO paquete_destinos (paquete_id, destino_id) VALUES (%s, %s)"
         destinos_a_insertar = [(paquete_id, dest_id) for dest_id in destinos_ids]
         cursor.executemany(query_paquete_destinos, destinos_a_insertar)
+        recalcular_precios(cursor, [paquete_id])
 
         conn.commit()
+        cache_paquetes.invalidar()
         return True
     except mysql.connector.Error as e:
         print(f"Error en la API al crear paquete: {e}")
@@ -234,13 +340,14 @@ def create_paquete(nombre, fecha_inicio, fecha_fin, cupos, destinos_ids):
         conn.close()
 
 def update_paquete_cupos(paquete_id, nuevos_cupos):
-    conn = crear_conexion()
+    conn = crear_conexion(ESCRITURA)
     if not conn: return False
     cursor = conn.cursor()
     try:
         query = "UPDATE paquetes SET cupos = %s WHERE id = %s"
         cursor.execute(query, (nuevos_cupos, paquete_id))
         conn.commit()
+        cache_paquetes.invalidar()
         return cursor.rowcount > 0
     except mysql.connector.Error as e:
         print(f"Error en la API al actualizar cupos: {e}")
@@ -251,7 +358,7 @@ def update_paquete_cupos(paquete_id, nuevos_cupos):
 
 def get_destinos_for_paquete(paquete_id):
     """Obtiene los destinos asociados a un paquete específico."""
-    conn = crear_conexion()
+    conn = crear_conexion(LECTURA)
     if not conn: return []
     cursor = conn.cursor(dictionary=True)
     try:
@@ -270,16 +377,21 @@ def get_destinos_for_paquete(paquete_id):
         conn.close()
 
 def delete_paquete(paquete_id):
-    conn = crear_conexion()
+    conn = crear_conexion(ESCRITURA)
     if not conn: return False
     cursor = conn.cursor()
     try:
+        # Sus reservas se borran en cascada: primero las quitamos de los resúmenes de reportes.
+        descontar_paquete(cursor, paquete_id)
         query = "DELETE FROM paquetes WHERE id = %s"
         cursor.execute(query, (paquete_id,))
+        borrado = cursor.rowcount > 0
         conn.commit()
-        return cursor.rowcount > 0
+        cache_paquetes.invalidar()
+        return borrado
     except mysql.connector.Error as e:
         print(f"Error en la API al eliminar paquete: {e}")
+        conn.rollback()
         return False
     finally:
         cursor.close()
@@ -287,7 +399,7 @@ def delete_paquete(paquete_id):
 
 def update_paquete_destinos(paquete_id, destinos_ids):
     """Actualiza la lista de destinos para un paquete existente."""
-    conn = crear_conexion()
+    conn = crear_conexion(ESCRITURA)
     if not conn: return False
     cursor = conn.cursor()
     try:
@@ -300,8 +412,12 @@ def update_paquete_destinos(paquete_id, destinos_ids):
             query_insert = "INSERT INTO paquete_destinos (paquete_id, destino_id) VALUES (%s, %s)"
             destinos_a_insertar = [(paquete_id, dest_id) for dest_id in destinos_ids]
             cursor.executemany(query_insert, destinos_a_insertar)
+
+        # 3. Recalcular su precio en la misma transacción (nunca queda un precio viejo a la vista)
+        recalcular_precios(cursor, [paquete_id])
         
         conn.commit()
+        cache_paquetes.invalidar()
         return True
     except mysql.connector.Error as e:
         print(f"Error en la API al actualizar destinos del paquete: {e}")
@@ -309,4 +425,72 @@ def update_paquete_destinos(paquete_id, destinos_ids):
         return False
     finally:
         cursor.close()
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+# --- API Endpoint de Cotización ---
+
+def cotizar_paquetes(paquete_ids, personas, fechas=None):
+    """
+    Cotiza muchas combinaciones (paquete, personas, fecha) en una sola llamada.
+    'personas' y 'fechas' pueden ser un valor para todas o una lista del mismo largo que 'paquete_ids'.
+    Devuelve una lista de diccionarios con precio_unitario, total y disponible (entre otros).
+    """
+    return cotizador_paquetes.cotizar_lista(paquete_ids, personas, fechas)
+
+# --- API Endpoints de Reservas de Grupo ---
+
+def reservar_lote(usuario_id, items, todo_o_nada=False):
+    """
+    Reserva varios paquetes y/o destinos en una sola transacción. Cada item: {'tipo', 'id', 'fecha', 'personas'}
+    y, en los destinos, 'noches' (opcional).
+    Devuelve, en el mismo orden, el resultado de cada item (exito, motivo, mensaje, reserva_id, ...).
+    """
+    resultados = ReservaService(ReservasRepository()).procesar_lote(usuario_id, items, todo_o_nada)
+    return [r.como_dict() for r in resultados]
+
+def reservar_manifiesto(usuario_id, manifiesto, todo_o_nada=False):
+    """
+    Igual que reservar_lote(), pero leyendo un manifiesto CSV (ruta o archivo abierto) con las columnas
+    tipo,id,fecha,personas. Cada resultado incluye el número de línea del CSV.
+    """
+    return ReservaService(ReservasRepository()).procesar_manifiesto_csv(usuario_id, manifiesto, todo_o_nada)
+
+# --- API Endpoints del Inventario de Destinos ---
+
+def get_disponibilidad_destino(destino_id, desde, hasta):
+    """Lugares libres del destino en cada día de [desde, hasta], como lista de (fecha, disponibles)."""
+    return InventarioRepository().disponibilidad(destino_id, desde, hasta)
+
+def set_capacidad_destino(destino_id, capacidad, desde=None, hasta=None):
+    """
+    Cambia la capacidad diaria del destino (sin fechas) o solo la de [desde, hasta]. Lo ya reservado se
+    mantiene. Usar esto y no update_destino(), que no ajusta los días del inventario. Retorna (exito, mensaje).
+    """
+    return InventarioRepository().fijar_capacidad(destino_id, capacidad, desde, hasta)
+
+# --- API Endpoints de Recomendaciones ---
+
+def get_destinos_similares(destino_ids, k=5):
+    """
+    Para cada id de la lista, sus k destinos más parecidos por descripción y actividades, como lista de
+    (id, similitud). Conviene pedir muchos de una vez: el lote se puntúa junto.
+    """
+    return recomendador_destinos.similares(destino_ids, k)
+
+def get_tambien_reservaron(destino_ids, k=5):
+    """Para cada id de la lista, los k destinos que más reservaron quienes lo reservaron, como lista de (id, veces)."""
+    return recomendador_destinos.tambien_reservaron(destino_ids, k)
+
+# --- API Endpoints de Reportes (leen solo las tablas de resumen) ---
+
+def get_ocupacion_paquetes():
+    """Ocupación, personas e ingresos de cada paquete."""
+    return ResumenesRepository().ocupacion_paquetes()
+
+def get_ingresos_destinos(desde=None, hasta=None, destino_id=None):
+    """Ingresos por destino y mes de viaje (por defecto, los últimos 12 meses)."""
+    return ResumenesRepository().ingresos_por_destino_mes(desde, hasta, destino_id)
+
+def get_reservas_por_dia(desde=None, hasta=None):
+    """Reservas hechas por día (por defecto, los últimos 30 días)."""
+    return ResumenesRepository().reservas_por_dia(desde, hasta)
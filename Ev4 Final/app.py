@@ -1,13 +1,25 @@
+import time
+_INICIO = time.perf_counter()  # Antes de los demás imports, para que --medir-arranque los cuente
+
+import argparse
+import sys
+import threading
 import tkinter as tk
-from database import inicializar_db_completa, crear_conexion
+from database import (inicializar_db_completa, crear_conexion, obtener_pool, cerrar_pools, instalacion_al_dia,
+                      marcar_instalacion, ESCRITURA, LECTURA)
 from ui.tkinter_app import App
 from persistencia.usuarios_repo import UsuarioRepository
+from persistencia.destinos_repo import DestinosRepository
 from servicio_negocio.usuario_service import UsuarioService
+from servicio_negocio.hash_contrasenas import hasher
+
+# Módulos pesados que la aplicación solo carga cuando de verdad los usa (ver --medir-arranque)
+MODULOS_DIFERIDOS = ('numpy', 'requests', 'PIL')
 
 def asegurar_admin():
-    """Crea un usuario administrador por defecto si no existe."""
-    conn = crear_conexion()
-    if not conn: return
+    """Crea un usuario administrador por defecto si no existe. Devuelve True si al terminar el admin existe."""
+    conn = crear_conexion(ESCRITURA)
+    if not conn: return False
     
     cursor = conn.cursor()
     try:
@@ -19,37 +31,99 @@ def asegurar_admin():
             repo = UsuarioRepository()
             service = UsuarioService(repo)
             # Registramos el usuario (por defecto será cliente)
-            service.registrar_usuario_nuevo("admin@agencia.com", "admin123", "Admin", "Sistema", "admin@agencia.com")
+            exito, _ = service.registrar_usuario_nuevo("admin@agencia.com", "admin123", "Admin", "Sistema", "admin@agencia.com")
+            if not exito:
+                return False
             # Forzamos el rol a 'admin'
             cursor.execute("UPDATE usuarios SET rol = 'admin' WHERE correo = 'admin@agencia.com'")
             conn.commit()
             print("Admin creado: admin@agencia.com / admin123")
+        return True
     finally:
         cursor.close()
         conn.close()
 
+def preparar_base_de_datos(forzar=False):
+    """
+    Deja la base de datos lista para usar.
+    Si ya se inicializó con esta versión del programa (esquema y datos semilla al día), basta con una consulta.
+    Si no (primera ejecución, migraciones nuevas o datos semilla nuevos), se hace la inicialización completa
+    y, si todo salió bien, se anota para no repetirla en los próximos arranques.
+    """
+    if not forzar and instalacion_al_dia():
+        print("Base de datos al día.")
+        return True
+
+    print("Verificando e inicializando base de datos...")
+    if not inicializar_db_completa():
+        print("ADVERTENCIA: Hubo problemas al inicializar la base de datos. La aplicación podría no funcionar correctamente.")
+        return False
+    if not asegurar_admin():
+        print("ADVERTENCIA: No se pudo crear el usuario administrador.")
+        return False
+    marcar_instalacion()
+    print("Base de datos lista.")
+    return True
+
+def precalentar():
+    """
+    Trabajo que no hace falta para mostrar la ventana, pero sí para que lo primero que haga el usuario sea rápido.
+    Corre en un hilo aparte mientras la ventana ya está a la vista.
+    """
+    for pool in {obtener_pool(), obtener_pool(LECTURA)}:
+        if pool:
+            pool.precalentar()              # Conexiones abiertas para las primeras consultas (principal y réplica)
+    DestinosRepository().precargar()        # Catálogo de destinos en caché e índice de búsqueda armado
+    hasher.precalentar()                    # Costo de scrypt calibrado y procesos listos para el primer login
+
+def medir_arranque(app, marcas):
+    """Muestra cuánto tardó cada etapa del arranque, ya con la ventana dibujada, y cierra la aplicación."""
+    app.update_idletasks()
+    marcas.append(("ventana visible", time.perf_counter()))
+    print("--- Tiempos de arranque ---")
+    anterior = _INICIO
+    for etapa, momento in marcas:
+        print(f"{etapa:22} {(momento - anterior) * 1000:>8.1f} ms   (acumulado {(momento - _INICIO) * 1000:>8.1f} ms)")
+        anterior = momento
+    cargados = [m for m in MODULOS_DIFERIDOS if m in sys.modules]
+    print(f"Módulos pesados cargados al arrancar: {', '.join(cargados) if cargados else 'ninguno'}")
+    app.destroy()
+
 def main():
     """
     Punto de entrada principal de la aplicación.
-    1. Verifica e inicializa la base de datos MySQL.
-    2. Lanza la interfaz gráfica Tkinter.
+    1. Verifica (y si hace falta inicializa) la base de datos MySQL.
+    2. Lanza la interfaz gráfica Tkinter; el precalentamiento sigue en segundo plano.
     """
+    parser = argparse.ArgumentParser(description="Sistema de Agencia de Viajes")
+    parser.add_argument('--inicializar', action='store_true',
+                        help="Hace la inicialización completa de la base de datos aunque ya esté al día")
+    parser.add_argument('--medir-arranque', action='store_true',
+                        help="Muestra el tiempo de cada etapa del arranque y cierra al aparecer la ventana")
+    args = parser.parse_args()
+
+    marcas = [("imports", time.perf_counter())]
     print("--- Iniciando Sistema de Agencia de Viajes ---")
     
-    # 1. Inicialización de Base de Datos
-    print("Verificando e inicializando base de datos...")
-    if inicializar_db_completa():
-        print("Base de datos lista.")
-    else:
-        print("ADVERTENCIA: Hubo problemas al inicializar la base de datos. La aplicación podría no funcionar correctamente.")
-
-    # 1.5 Asegurar Admin
-    asegurar_admin()
+    # 1. Base de Datos
+    preparar_base_de_datos(forzar=args.inicializar)
+    marcas.append(("base de datos", time.perf_counter()))
 
     # 2. Iniciar Interfaz Gráfica
     print("Lanzando interfaz gráfica...")
     app = App()
+    marcas.append(("crear ventana", time.perf_counter()))
+
+    if args.medir_arranque:
+        app.after_idle(medir_arranque, app, marcas)
+    else:
+        # Cuando la ventana ya está dibujada, el resto de la preparación sigue en un hilo aparte.
+        app.after_idle(threading.Thread(target=precalentar, name="precalentar", daemon=True).start)
     app.mainloop()
 
+    # Al cerrar la ventana cerramos las conexiones que quedaron abiertas en los pools.
+    cerrar_pools()
+    hasher.cerrar()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,35 +1,395 @@
 import json
 import os
+import threading
+import time
+from contextlib import contextmanager
 import mysql.connector
 from mysql.connector import Error
+from trazas_sql import Trazador
+
+_config_cache = None
+_config_lock = threading.Lock()
+
+def _load_config():
+    """Lee 'config.json' una sola vez y guarda el resultado para no volver a abrir el archivo en cada consulta."""
+    global _config_cache
+    if _config_cache is None:
+        with _config_lock:
+            if _config_cache is None:
+                try:
+                    base_dir = os.path.dirname(os.path.abspath(__file__))
+                    config_path = os.path.join(base_dir, 'config.json')
+                    with open(config_path, 'r') as f:
+                        _config_cache = json.load(f)
+                except (FileNotFoundError, json.JSONDecodeError) as e:
+                    print(f"Error: No se pudo leer el archivo 'config.json' con los datos de la base de datos: {e}")
+                    return {}
+    return _config_cache
+
+def leer_configuracion(seccion):
+    """Opciones de una sección de 'config.json' (por ejemplo 'HASH_CONFIG'), como copia; {} si no está."""
+    return dict(_load_config().get(seccion) or {})
 
 def _load_db_config():
     """Lee el archivo 'config.json' para encontrar los datos de acceso a la base de datos (usuario, contraseña, etc.)."""
-    try:
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        config_path = os.path.join(base_dir, 'config.json')
-        with open(config_path, 'r') as f:
-            config = json.load(f)
-            return config.get('MYSQL_CONFIG')
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"Error: No se pudo leer el archivo 'config.json' con los datos de la base de datos: {e}")
-        return None
-
-def crear_conexion():
+    config = _load_config().get('MYSQL_CONFIG')
+    # Devolvemos una copia para que nadie modifique por accidente la configuración guardada.
+    return dict(config) if config else None
+
+def _load_replica_config():
+    """
+    Datos de la réplica de solo lectura ('MYSQL_REPLICA_CONFIG' en config.json). Basta con indicar lo que
+    cambia respecto de 'MYSQL_CONFIG' (por ejemplo 'host' o 'database'). None si no hay réplica configurada.
+    """
+    replica = _load_config().get('MYSQL_REPLICA_CONFIG')
+    if not replica: return None
+    config = _load_db_config() or {}
+    config.update(replica)
+    return config
+
+def _load_pool_config():
+    """Opciones del pool de conexiones ('POOL_CONFIG' en config.json), con valores por defecto razonables."""
+    opciones = {
+        'tamano_maximo': 10,        # Cuántas conexiones abiertas como máximo a la vez
+        'espera_maxima': 10,        # Segundos que se espera una conexión libre antes de rendirse
+        'reciclar_tras': 1800,      # Segundos de vida de una conexión antes de renovarla
+        'verificar_tras': 30,       # Segundos de inactividad tras los cuales se hace ping antes de prestarla
+    }
+    opciones.update(_load_config().get('POOL_CONFIG') or {})
+    return opciones
+
+
+class _ConexionPrestada:
+    """
+    Envoltorio de una conexión del pool. Se comporta igual que una conexión de MySQL,
+    pero al llamar a close() la conexión vuelve al pool en lugar de cerrarse de verdad.
+    """
+
+    def __init__(self, pool, conexion):
+        self._pool = pool
+        self._conexion = conexion
+
+    def close(self):
+        if self._conexion is not None:
+            conexion, self._conexion = self._conexion, None
+            self._pool._devolver(conexion)
+
+    def commit(self):
+        if self._conexion is None:
+            raise Error(msg="La conexión ya fue devuelta al pool.")
+        self._conexion.commit()
+        self._pool.ultima_escritura = time.monotonic()  # Ver obtener_pool(): lecturas justo después de escribir
+
+    def __getattr__(self, nombre):
+        if self._conexion is None:
+            raise Error(msg="La conexión ya fue devuelta al pool.")
+        return getattr(self._conexion, nombre)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class PoolConexiones:
+    """
+    Un 'estacionamiento' de conexiones a MySQL ya abiertas. En lugar de hacer el saludo completo
+    (TCP + autenticación) en cada consulta, pedimos prestada una conexión y la devolvemos al terminar.
+    """
+
+    def __init__(self, db_config, tamano_maximo=10, espera_maxima=10, reciclar_tras=1800, verificar_tras=30):
+        self.db_config = db_config
+        self.tamano_maximo = tamano_maximo
+        self.espera_maxima = espera_maxima
+        self.reciclar_tras = reciclar_tras
+        self.verificar_tras = verificar_tras
+        self._libres = []       # Lista de (conexion, creada_en, devuelta_en)
+        self._creadas_en = {}   # id(conexion) -> momento de creación
+        self._abiertas = 0
+        self.ultima_escritura = float('-inf')   # Último commit hecho con una conexión de este pool
+        self._cond = threading.Condition()
+        self._stats = {
+            'creadas': 0, 'reutilizadas': 0, 'recicladas': 0, 'descartadas': 0,
+            'fallos_conexion': 0, 'esperas': 0, 'timeouts': 0,
+        }
+
+    def _abrir(self):
+        conexion = mysql.connector.connect(**self.db_config)
+        self._creadas_en[id(conexion)] = time.monotonic()
+        return conexion
+
+    def _cerrar(self, conexion):
+        self._creadas_en.pop(id(conexion), None)
+        try:
+            conexion.close()
+        except Error:
+            pass
+
+    def _sana(self, conexion, devuelta_en):
+        """Revisa que una conexión libre siga sirviendo; si lleva rato quieta le hacemos un ping."""
+        if time.monotonic() - devuelta_en < self.verificar_tras:
+            return True
+        try:
+            conexion.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def obtener(self):
+        """Presta una conexión del pool (o abre una nueva si hay espacio). Devuelve None si no es posible."""
+        limite = time.monotonic() + self.espera_maxima
+        while True:
+            candidata = None
+            with self._cond:
+                while True:
+                    if self._libres:
+                        candidata = self._libres.pop()
+                        break
+                    if self._abiertas < self.tamano_maximo:
+                        self._abiertas += 1
+                        break
+
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        self._stats['timeouts'] += 1
+                        print("Error: No hay conexiones libres en el pool de la base de datos.")
+                        return None
+                    self._stats['esperas'] += 1
+                    self._cond.wait(restante)
+            if candidata is None:
+                break  # Hay lugar para abrir una nueva
+
+            # La revisamos fuera del candado: el ping (y el cierre si no sirve) no frena a los demás hilos.
+            conexion, creada_en, devuelta_en = candidata
+            if time.monotonic() - creada_en > self.reciclar_tras:
+                motivo = 'recicladas'
+            elif self._sana(conexion, devuelta_en):
+                with self._cond:
+                    self._stats['reutilizadas'] += 1
+                return _ConexionPrestada(self, conexion)
+            else:
+                motivo = 'descartadas'
+            self._cerrar(conexion)
+            with self._cond:
+                self._abiertas -= 1
+                self._stats[motivo] += 1
+                self._cond.notify()  # Quedó lugar para abrir otra
+
+        # Abrimos la conexión fuera del candado para no bloquear a los demás hilos durante el saludo.
+        try:
+            conexion = self._abrir()
+        except Error as e:
+            with self._cond:
+                self._abiertas -= 1
+                self._stats['fallos_conexion'] += 1
+                self._cond.notify()
+            print(f"Error al conectar a MySQL: {e}")
+            return None
+        with self._cond:
+            self._stats['creadas'] += 1
+        return _ConexionPrestada(self, conexion)
+
+    def _devolver(self, conexion):
+        """Recibe una conexión de vuelta. Deshace lo que haya quedado sin confirmar para que el próximo la reciba limpia."""
+        reutilizable = True
+        try:
+            # Incluso un SELECT abre una transacción implícita (autocommit apagado);
+            # si no la cerramos, el siguiente usuario vería una 'foto' vieja de los datos.
+            if conexion.in_transaction:
+                conexion.rollback()
+        except Error:
+            reutilizable = False
+
+        with self._cond:
+            if reutilizable:
+                creada_en = self._creadas_en.get(id(conexion), time.monotonic())
+                self._libres.append((conexion, creada_en, time.monotonic()))
+            else:
+                self._abiertas -= 1
+                self._stats['descartadas'] += 1
+                self._cerrar(conexion)
+            self._cond.notify()
+
+    def precalentar(self, cantidad=2):
+        """
+        Deja 'cantidad' conexiones abiertas y libres (sin pasarse del máximo), así las primeras consultas
+        no pagan el saludo con el servidor. Pensado para correr en segundo plano al arrancar.
+        """
+        prestadas = []
+        try:
+            while len(prestadas) < cantidad:
+                with self._cond:
+                    if len(self._libres) + len(prestadas) >= cantidad or self._abiertas >= self.tamano_maximo:
+                        break
+                conexion = self.obtener()
+                if conexion is None:
+                    break
+                prestadas.append(conexion)
+        finally:
+            for conexion in prestadas:
+                conexion.close()
+        return len(prestadas)
+
+    def cerrar_todas(self):
+        """Cierra las conexiones libres (por ejemplo al salir de la aplicación)."""
+        with self._cond:
+            while self._libres:
+                conexion, _, _ = self._libres.pop()
+                self._abiertas -= 1
+                self._cerrar(conexion)
+            self._cond.notify_all()
+
+    def estadisticas(self):
+        """Devuelve un resumen del uso del pool: cuántas conexiones se crearon, reutilizaron, etc."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['abiertas'] = self._abiertas
+            stats['libres'] = len(self._libres)
+            stats['en_uso'] = self._abiertas - len(self._libres)
+            stats['tamano_maximo'] = self.tamano_maximo
+            return stats
+
+
+# Para qué se pide una conexión. Cada repositorio lo declara al llamar a crear_conexion():
+ESCRITURA = 'escritura'             # INSERT/UPDATE/DELETE y transacciones: siempre a la base principal
+LECTURA = 'lectura'                 # Consultas que toleran unos segundos de atraso (catálogo, historial, reportes): a la réplica
+LECTURA_FRESCA = 'lectura_fresca'   # Lecturas que deben ver lo último (login, rol, cupos de un paquete): a la principal
+
+_pool = None
+_pool_lock = threading.Lock()
+_replica = None              # Pool de la réplica; False si no hay réplica configurada
+_segundos_tras_escritura = 2
+_segundos_tras_fallo = 30    # Tiempo que las lecturas van directo a la principal si la réplica no respondió
+_replica_caida_hasta = float('-inf')
+
+def _pool_replica():
+    global _replica, _segundos_tras_escritura, _segundos_tras_fallo
+    if _replica is None:
+        with _pool_lock:
+            if _replica is None:
+                config = _load_replica_config()
+                if config:
+                    _segundos_tras_escritura = config.pop('segundos_tras_escritura', _segundos_tras_escritura)
+                    _segundos_tras_fallo = config.pop('segundos_tras_fallo', _segundos_tras_fallo)
+                    _replica = PoolConexiones(config, **_load_pool_config())
+                else:
+                    _replica = False
+    return _replica or None
+
+def configurar_replica(db_config, segundos_tras_escritura=2):
+    """
+    Cambia (o quita, con db_config=None) la réplica de lectura sin tocar config.json; por ejemplo,
+    para probar con dos bases locales (ver rendimiento/prueba_replica.py).
+    """
+    global _replica, _segundos_tras_escritura, _replica_caida_hasta
+    with _pool_lock:
+        anterior = _replica
+        _replica = PoolConexiones(dict(db_config), **_load_pool_config()) if db_config else False
+        _segundos_tras_escritura = segundos_tras_escritura
+        _replica_caida_hasta = float('-inf')
+    if anterior:
+        anterior.cerrar_todas()
+
+def obtener_pool(modo=ESCRITURA):
+    """
+    Devuelve el pool compartido que corresponde al modo, creándolo la primera vez que se necesita.
+    Las lecturas van a la réplica si hay una configurada, salvo durante unos segundos después de una escritura
+    ('segundos_tras_escritura'): así quien acaba de reservar o editar ve su cambio aunque la réplica vaya atrasada.
+    Tampoco van a la réplica durante 'segundos_tras_fallo' después de que no pudo entregar una conexión: así, con
+    la réplica caída, cada lectura no espera un intento de conexión fallido antes de ir a la principal.
+    Todo lo demás (y todo, si no hay réplica) va a la base principal.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = _load_db_config()
+                if not config: return None
+                _pool = PoolConexiones(config, **_load_pool_config())
+    if modo != LECTURA:
+        return _pool
+    replica = _pool_replica()
+    ahora = time.monotonic()
+    if replica is None or ahora - _pool.ultima_escritura < _segundos_tras_escritura or ahora < _replica_caida_hasta:
+        return _pool
+    return replica
+
+_heredados = []
+
+def _olvidar_pools_heredados():
+    """
+    Se ejecuta en cada proceso hijo creado con fork() (por ejemplo, los trabajadores de servidor_http.py).
+    Los pools del padre no sirven en el hijo: sus sockets son compartidos con el padre. Se olvidan sin cerrarlos
+    (cerrarlos aquí le cortaría las conexiones al padre) y cada hijo abre su propio pool cuando lo necesite.
+    """
+    global _pool, _replica, _pool_lock
+    _heredados.extend(p for p in (_pool, _replica) if p)  # Guardados para que el recolector no los cierre
+    _pool = None
+    _replica = None
+    _pool_lock = threading.Lock()  # Otro hilo del padre podía tenerlo tomado justo al hacer fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_olvidar_pools_heredados)
+
+def cerrar_pools():
+    """Cierra las conexiones libres de la base principal y de la réplica (al salir de la aplicación)."""
+    for pool in (_pool, _replica):
+        if pool:
+            pool.cerrar_todas()
+
+_trazador = None
+
+def obtener_trazador():
+    """Trazador de consultas SQL compartido ('TRAZAS_CONFIG' en config.json)."""
+    global _trazador
+    if _trazador is None:
+        with _pool_lock:
+            if _trazador is None:
+                _trazador = Trazador.desde_config(_load_config().get('TRAZAS_CONFIG'))
+    return _trazador
+
+def crear_conexion(modo=ESCRITURA):
     """
     Usa la configuración que leímos antes para abrir una 'puerta' a la base de datos y poder hablar con ella.
+    La conexión sale del pool: al llamar a close() vuelve al pool para que otro la reutilice.
+    'modo' dice para qué se usará (ESCRITURA, LECTURA o LECTURA_FRESCA) y decide si va a la base principal
+    o a la réplica (ver obtener_pool). Si la réplica no responde, la lectura se hace en la principal (y las
+    siguientes también, durante 'segundos_tras_fallo').
+    Además va envuelta por el trazador, que anota el tiempo y el origen de cada consulta.
     """
-    config = _load_db_config()
-    if not config: return None
+    global _replica_caida_hasta
+    pool = obtener_pool(modo)
+    if not pool: return None
+    conexion = pool.obtener()
+    if conexion is None and pool is not _pool:
+        _replica_caida_hasta = time.monotonic() + _segundos_tras_fallo
+        conexion = _pool.obtener()
+    return obtener_trazador().envolver(conexion)
+
+@contextmanager
+def conexion_pool(modo=ESCRITURA):
+    """
+    Forma cómoda de pedir prestada una conexión:
+
+        with conexion_pool(LECTURA) as conn:
+            ...
+
+    Al salir del bloque la conexión se devuelve sola al pool (si no se pudo conectar, entrega None).
+    """
+    conexion = crear_conexion(modo)
     try:
-        conexion = mysql.connector.connect(**config)
+        yield conexion
+    finally:
+        if conexion:
+            conexion.close()
 
-        if conexion.is_connected():
-            # Comentamos esto para que no nos llene la consola de mensajes cada vez que nos conectamos.
-            return conexion
-    except Error as e:
-        print(f"Error al conectar a MySQL: {e}")
-        return None
+def estadisticas_pool():
+    """Estadísticas del pool compartido (vacío si todavía no se ha creado) y, si la hay, de la réplica en 'replica'."""
+    stats = _pool.estadisticas() if _pool else {}
+    if _replica:
+        stats['replica'] = _replica.estadisticas()
+    return stats
 
 def crear_tablas_iniciales(conexion):
     """
@@ -113,6 +473,277 @@ def crear_tablas_iniciales(conexion):
     finally:
         cursor.close()
 
+# --- Migraciones del esquema ---
+#
+# 'crear_tablas_iniciales' solo crea tablas que no existen; los cambios posteriores (índices, columnas nuevas...)
+# se aplican como migraciones numeradas. La tabla 'schema_version' anota cuáles ya se aplicaron, así cada
+# migración corre una sola vez por base de datos y siempre en orden.
+
+def _existe_indice(cursor, tabla, nombre):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+        (tabla, nombre)
+    )
+    return cursor.fetchone()[0] > 0
+
+def _crear_indice(cursor, tabla, nombre, columnas):
+    """Crea el índice solo si todavía no existe (MySQL no tiene 'CREATE INDEX IF NOT EXISTS')."""
+    if not _existe_indice(cursor, tabla, nombre):
+        cursor.execute(f"CREATE INDEX {nombre} ON {tabla} ({columnas})")
+
+def _migracion_indice_username(cursor):
+    # Cada login y cada registro buscan al usuario por 'username'.
+    _crear_indice(cursor, 'usuarios', 'idx_usuarios_username', 'username')
+
+def _migracion_indice_historial(cursor):
+    # El historial filtra por usuario y ordena por fecha: con este índice MySQL lee las filas ya ordenadas.
+    _crear_indice(cursor, 'reservas', 'idx_reservas_usuario_fecha', 'usuario_id, fecha_reserva')
+
+def _migracion_indice_fecha_paquetes(cursor):
+    # Para listar los paquetes que salen a partir de una fecha.
+    _crear_indice(cursor, 'paquetes', 'idx_paquetes_fecha_inicio', 'fecha_inicio')
+
+def _existe_columna(cursor, tabla, columna):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s",
+        (tabla, columna)
+    )
+    return cursor.fetchone()[0] > 0
+
+def _migracion_resumenes(cursor):
+    # Precio por persona al momento de reservar (para que los ingresos no cambien si luego cambia el precio)
+    # y tablas de resumen para los reportes. Se llenan una vez con lo que ya había.
+    from persistencia.resumenes_repo import crear_tablas_resumen, reconstruir_resumenes
+    if not _existe_columna(cursor, 'reservas', 'precio_unitario'):
+        cursor.execute("ALTER TABLE reservas ADD COLUMN precio_unitario INT NULL")
+    crear_tablas_resumen(cursor)
+    reconstruir_resumenes(cursor)
+
+def _migracion_precios_paquetes(cursor):
+    # Precio de cada paquete guardado en la tabla: la suma de sus destinos se mantiene al día desde la
+    # aplicación y 'precio' lo calcula MySQL (el costo propio del paquete o, si es 0, esa suma).
+    from persistencia.precios_paquetes import recalcular_precios
+    if not _existe_columna(cursor, 'paquetes', 'costo_destinos'):
+        cursor.execute("ALTER TABLE paquetes ADD COLUMN costo_destinos INT NOT NULL DEFAULT 0")
+    if not _existe_columna(cursor, 'paquetes', 'destinos_nombres'):
+        cursor.execute("ALTER TABLE paquetes ADD COLUMN destinos_nombres TEXT NULL")
+    if not _existe_columna(cursor, 'paquetes', 'precio'):
+        cursor.execute("ALTER TABLE paquetes ADD COLUMN precio INT AS (IF(costo <> 0, costo, costo_destinos)) STORED")
+    recalcular_precios(cursor)
+
+def _migracion_estado_instalacion(cursor):
+    # Guarda qué versión de los datos semilla ya se cargó (ver instalacion_al_dia()).
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS instalacion (
+        clave VARCHAR(50) PRIMARY KEY,
+        valor INT NOT NULL
+    )
+    """)
+
+def _migracion_busqueda_correo(cursor):
+    # El correo al revés ('moc.aserpme@ana'), para buscar por dominio con el índice: '@empresa.com' es un
+    # sufijo del correo, pero un prefijo del correo invertido. La columna es virtual (no ocupa espacio en la
+    # tabla ni obliga a reescribirla); solo su índice se guarda. La búsqueda por prefijo usa el índice UNIQUE de 'correo'.
+    if not _existe_columna(cursor, 'usuarios', 'correo_invertido'):
+        cursor.execute("ALTER TABLE usuarios ADD COLUMN correo_invertido VARCHAR(255) AS (REVERSE(correo)) VIRTUAL")
+    _crear_indice(cursor, 'usuarios', 'idx_usuarios_correo_invertido', 'correo_invertido')
+
+def _migracion_inventario_destinos(cursor):
+    # Capacidad por día de cada destino y noches de cada reserva, con el inventario diario de lugares
+    # (ver persistencia/inventario_destinos.py). Se llena una vez con las reservas que ya había.
+    from persistencia.inventario_destinos import CAPACIDAD_DIARIA_POR_DEFECTO, crear_tabla_inventario, llenar_inventario_inicial
+    if not _existe_columna(cursor, 'destinos', 'capacidad_diaria'):
+        cursor.execute(f"ALTER TABLE destinos ADD COLUMN capacidad_diaria INT NOT NULL DEFAULT {CAPACIDAD_DIARIA_POR_DEFECTO}")
+    if not _existe_columna(cursor, 'reservas', 'noches'):
+        cursor.execute("ALTER TABLE reservas ADD COLUMN noches SMALLINT NULL")  # Nulo en las de paquetes
+    crear_tabla_inventario(cursor)
+    llenar_inventario_inicial(cursor)
+
+def _migracion_resumenes_pendientes(cursor):
+    # Las reservas dejan lo que hay que sumar a los resúmenes en 'resumen_pendientes' en vez de
+    # actualizarlos en su transacción (ver persistencia/resumenes_repo.py). Los resúmenes ya están al día.
+    from persistencia.resumenes_repo import crear_tablas_resumen
+    crear_tablas_resumen(cursor)
+
+# (versión, descripción, función). Las versiones nunca se reutilizan ni se reordenan: solo se agregan al final.
+MIGRACIONES = [
+    (1, "Índice en usuarios.username", _migracion_indice_username),
+    (2, "Índice en reservas(usuario_id, fecha_reserva)", _migracion_indice_historial),
+    (3, "Índice en paquetes.fecha_inicio", _migracion_indice_fecha_paquetes),
+    (4, "Precio por reserva y tablas de resumen para reportes", _migracion_resumenes),
+    (5, "Precio materializado de los paquetes", _migracion_precios_paquetes),
+    (6, "Tabla con el estado de la instalación", _migracion_estado_instalacion),
+    (7, "Índice del correo invertido para buscar por dominio", _migracion_busqueda_correo),
+    (8, "Inventario diario de lugares de los destinos", _migracion_inventario_destinos),
+    (9, "Reservas pendientes de sumar a los resúmenes", _migracion_resumenes_pendientes),
+]
+VERSION_ESQUEMA = MIGRACIONES[-1][0]
+
+# Sube este número cuando cambien los datos semilla (destinos, paquetes o el usuario administrador):
+# en el siguiente arranque se vuelve a hacer la inicialización completa.
+VERSION_SEMILLA = 1
+
+def instalacion_al_dia():
+    """
+    Comprobación rápida para el arranque: con una sola consulta (y una conexión del pool, que la aplicación
+    usará de todos modos) compara la versión del esquema y de los datos semilla guardadas con las de este código.
+    Si coinciden, no hace falta crear la base, las tablas ni revisar los datos semilla.
+    """
+    conn = crear_conexion(LECTURA_FRESCA)
+    if not conn: return False
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT (SELECT MAX(version) FROM schema_version), "
+            "(SELECT valor FROM instalacion WHERE clave = 'semilla')"
+        )
+        esquema, semilla = cursor.fetchone()
+        return esquema == VERSION_ESQUEMA and semilla == VERSION_SEMILLA
+    except Error:
+        return False  # Base nueva (todavía sin estas tablas): hay que inicializarla
+    finally:
+        cursor.close()
+        conn.close()
+
+def marcar_instalacion():
+    """Anota que los datos semilla de esta versión ya están cargados (tras una inicialización completa)."""
+    conn = crear_conexion(ESCRITURA)
+    if not conn: return False
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO instalacion (clave, valor) VALUES ('semilla', %s) ON DUPLICATE KEY UPDATE valor = VALUES(valor)",
+            (VERSION_SEMILLA,)
+        )
+        conn.commit()
+        return True
+    except Error as e:
+        print(f"Error al guardar el estado de la instalación: {e}")
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+def version_esquema(conexion):
+    """Devuelve la versión más alta ya aplicada (0 si todavía no se aplicó ninguna)."""
+    cursor = conexion.cursor()
+    try:
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        return cursor.fetchone()[0]
+    except Error:
+        return 0
+    finally:
+        cursor.close()
+
+def aplicar_migraciones(conexion):
+    """
+    Aplica, en orden, las migraciones que falten y devuelve la lista de versiones aplicadas.
+    Usa un candado de MySQL (GET_LOCK) para que dos instancias que arrancan a la vez no migren al mismo tiempo.
+    """
+    cursor = conexion.cursor()
+    aplicadas = []
+    try:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            descripcion VARCHAR(255) NOT NULL,
+            aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        cursor.execute("SELECT GET_LOCK('agencia_migraciones', 30)")
+        if cursor.fetchone()[0] != 1:
+            print("Error: otra instancia está aplicando migraciones; se intentará en el próximo arranque.")
+            return aplicadas
+        try:
+            cursor.execute("SELECT version FROM schema_version")
+            ya_aplicadas = {fila[0] for fila in cursor.fetchall()}
+            for version, descripcion, migrar in MIGRACIONES:
+                if version in ya_aplicadas:
+                    continue
+                print(f"Aplicando migración {version}: {descripcion}...")
+                # Ojo: en MySQL los CREATE/ALTER se confirman solos, por eso cada migración debe poder repetirse.
+                migrar(cursor)
+                cursor.execute("INSERT INTO schema_version (version, descripcion) VALUES (%s, %s)", (version, descripcion))
+                conexion.commit()
+                aplicadas.append(version)
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK('agencia_migraciones')")
+            cursor.fetchone()
+        if not aplicadas:
+            print("El esquema ya está al día.")
+    except Error as e:
+        conexion.rollback()
+        print(f"Error al aplicar las migraciones: {e}")
+    finally:
+        cursor.close()
+    return aplicadas
+
+# Consultas que se ejecutan todo el tiempo (login, paquetes próximos, paginación del admin...), con valores
+# de ejemplo para poder pedir su plan con EXPLAIN. verificar_planes() les suma la del historial.
+CONSULTAS_FRECUENTES = {
+    'login': (
+        "SELECT id, username, password_hash, nombre, apellido, correo FROM usuarios WHERE username = %s",
+        ('admin@agencia.com',)
+    ),
+    'paquetes_proximos': (
+        "SELECT id, nombre, fecha_inicio FROM paquetes WHERE fecha_inicio >= %s ORDER BY fecha_inicio LIMIT 50",
+        ('2030-01-01',)
+    ),
+    'reservas_admin': (
+        "SELECT r.id, u.correo FROM reservas r JOIN usuarios u ON r.usuario_id = u.id "
+        "WHERE r.id < %s ORDER BY r.id DESC LIMIT 200",
+        (2 ** 31 - 1,)
+    ),
+    'buscar_correo': (
+        "SELECT id FROM usuarios WHERE correo LIKE %s ORDER BY correo LIMIT 1000",
+        ('admin%',)
+    ),
+    'buscar_dominio': (
+        "SELECT id FROM usuarios WHERE correo_invertido LIKE %s ORDER BY correo_invertido LIMIT 1000",
+        ('moc.aicnega@%',)
+    ),
+    'reservas_de_usuarios': (
+        "SELECT r.id FROM reservas r WHERE r.usuario_id IN (%s, %s) AND r.id < %s ORDER BY r.id DESC LIMIT 200",
+        (1, 2, 2 ** 31 - 1)
+    ),
+    'inventario_destino': (
+        "SELECT fecha, disponibles FROM inventario_destinos WHERE destino_id = %s AND fecha BETWEEN %s AND %s",
+        (1, '2030-01-01', '2030-03-31')
+    ),
+}
+
+def verificar_planes(conexion, umbral_filas=1000):
+    """
+    Pide el plan (EXPLAIN) de cada consulta frecuente y devuelve la lista de problemas encontrados
+    (vacía si todo está bien). Se considera problema un recorrido completo de tabla (type = ALL) cuando:
+      - la tabla no tiene ningún índice que sirva para la consulta (possible_keys vacío), o
+      - MySQL estima que tendrá que leer 'umbral_filas' filas o más.
+    En tablas pequeñas MySQL a veces prefiere leerlo todo aunque el índice exista; eso no es un problema.
+    """
+    # El historial se revisa con la misma consulta que usa la aplicación (se importa aquí porque
+    # persistencia.reservas_repo importa este módulo).
+    from persistencia.reservas_repo import CONSULTA_HISTORIAL
+    consultas = {**CONSULTAS_FRECUENTES, 'historial': (CONSULTA_HISTORIAL, (1,))}
+    problemas = []
+    cursor = conexion.cursor(dictionary=True)
+    try:
+        for nombre, (consulta, parametros) in consultas.items():
+            cursor.execute("EXPLAIN " + consulta, parametros)
+            for fila in cursor.fetchall():
+                if fila.get('type') != 'ALL' or not fila.get('table'):
+                    continue
+                filas = fila.get('rows') or 0
+                if not fila.get('possible_keys') or filas >= umbral_filas:
+                    problemas.append(
+                        f"{nombre}: recorrido completo de la tabla '{fila['table']}' "
+                        f"(~{filas} filas, índices posibles: {fila.get('possible_keys') or 'ninguno'})"
+                    )
+    finally:
+        cursor.close()
+    return problemas
+
 def seed_destinos(conexion):
     """
     Esta función es como un 'semillero'. Si la tabla de destinos está vacía, la llena con datos iniciales
@@ -127,20 +758,15 @@ def seed_destinos(conexion):
             return
 
         # 2. Si está vacía, leemos el archivo JSON y metemos todos esos destinos en la tabla.
+        #    El importador lo lee por partes y lo guarda por lotes, así sirve también para catálogos enormes.
         print("Poblando la tabla 'destinos' con datos iniciales...")
+        from persistencia.importador_destinos import importar_destinos
         base_dir = os.path.dirname(os.path.abspath(__file__))
         json_path = os.path.join(base_dir, 'destinos_data.json')
-        with open(json_path, 'r', encoding='utf-8') as f:
-            destinos = json.load(f)
-
-        query = "INSERT INTO destinos (id, nombre, descripcion, actividades, costo) VALUES (%s, %s, %s, %s, %s)"
-        for d in destinos:
-            cursor.execute(query, (d['id'], d['nombre'], d['descripcion'], d['actividades'], d['costo']))
-        
-        conexion.commit()
-        print(f"{len(destinos)} destinos han sido agregados.")
+        resumen = importar_destinos(json_path, conexion=conexion, progreso=None)
+        print(f"{resumen['filas']} destinos han sido agregados.")
 
-    except Error as e:
+    except (Error, ValueError, KeyError) as e:
         print(f"Error al poblar la base de datos: {e}")
     finally:
         cursor.close()
@@ -190,6 +816,9 @@ def seed_paquetes(conexion):
         # Metemos los paquetes y sus relaciones en la base de datos.
         cursor.executemany("INSERT INTO paquetes (nombre, fecha_inicio, fecha_fin, cupos, costo, descripcion) VALUES (%s, %s, %s, %s, %s, %s)", paquetes)
         cursor.executemany("INSERT INTO paquete_destinos (paquete_id, destino_id) VALUES (%s, %s)", relaciones)
+        # Guardamos la suma y los nombres de sus destinos (ver persistencia/precios_paquetes.py).
+        from persistencia.precios_paquetes import recalcular_precios
+        recalcular_precios(cursor)
         
         conexion.commit()
         print(f"{len(paquetes)} paquetes de ejemplo han sido agregados.")
@@ -226,9 +855,10 @@ def inicializar_db_completa():
         print(f"Base de datos '{db_name}' verificada.")
 
         # 2. Conectar a la BD específica e inicializar tablas/datos
-        conn_db = crear_conexion()
+        conn_db = crear_conexion(ESCRITURA)
         if conn_db:
             crear_tablas_iniciales(conn_db)
+            aplicar_migraciones(conn_db)
             seed_destinos(conn_db)
             seed_paquetes(conn_db)
             conn_db.close()
@@ -241,7 +871,11 @@ def inicializar_db_completa():
 
 # Este bloque de código solo se ejecuta si abres este archivo directamente (y no desde otro).
 # Su misión es preparar toda la base de datos desde cero.
+#   python database.py              -> crea la BD, las tablas, aplica migraciones y carga los datos semilla
+#   python database.py --verificar  -> además revisa con EXPLAIN que las consultas frecuentes usen índices
 if __name__ == '__main__':
+    import sys
+
     try:
         db_config = _load_db_config()
         if not db_config:
@@ -258,15 +892,26 @@ if __name__ == '__main__':
         conn_server.close()
 
         # 3. Ahora sí, nos conectamos a nuestra base de datos específica para empezar a trabajar.
-        conn_db = crear_conexion()
+        conn_db = crear_conexion(ESCRITURA)
         if conn_db:
             print("Inicializando tablas...")
             crear_tablas_iniciales(conn_db)
+            aplicar_migraciones(conn_db)
+            print(f"Versión del esquema: {version_esquema(conn_db)}")
             # Después de crear las tablas, poblamos los datos iniciales
             seed_destinos(conn_db)
             seed_paquetes(conn_db)
+
+            problemas = verificar_planes(conn_db) if '--verificar' in sys.argv else []
             conn_db.close()
             print("Inicialización de la base de datos completada.")
+            if problemas:
+                print("Consultas frecuentes sin índice:")
+                for problema in problemas:
+                    print(f"  - {problema}")
+                sys.exit(1)
+            elif '--verificar' in sys.argv:
+                print("Todas las consultas frecuentes usan índices.")
 
     except Error as e:
         print(f"Ocurrió un error durante la inicialización: {e}")
@@ -1,7 +1,23 @@
 class Destino:
+    # __slots__ evita el diccionario interno de cada objeto: con miles de destinos en memoria ocupa bastante menos.
+    __slots__ = ('id', 'nombre', 'descripcion', 'actividades', 'costo')
+    # Orden de columnas que espera desde_fila (el mismo del SELECT de los repositorios).
+    COLUMNAS = "id, nombre, descripcion, actividades, costo"
+
     def __init__(self, id, nombre, descripcion, actividades, costo):
         self.id = id
         self.nombre = nombre
         self.descripcion = descripcion
         self.actividades = actividades
         self.costo = costo
+
+    @classmethod
+    def desde_fila(cls, fila):
+        """Crea el destino directamente desde una fila (tupla) del cursor, sin pasar por un diccionario."""
+        d = cls.__new__(cls)
+        d.id, d.nombre, d.descripcion, d.actividades, d.costo = fila
+        return d
+
+    @classmethod
+    def desde_filas(cls, filas):
+        return list(map(cls.desde_fila, filas))
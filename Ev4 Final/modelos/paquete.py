@@ -1,9 +1,25 @@
 class Paquete:
-    def __init__(self, id, nombre, fecha_inicio, fecha_fin, cupos, costo, descripcion=""):
+    __slots__ = ('id', 'nombre', 'fecha_inicio', 'fecha_fin', 'cupos', 'costo', 'descripcion', 'precio')
+    COLUMNAS = "id, nombre, fecha_inicio, fecha_fin, cupos, costo, descripcion, precio"
+
+    def __init__(self, id, nombre, fecha_inicio, fecha_fin, cupos, costo, descripcion="", precio=None):
         self.id = id
         self.nombre = nombre
         self.fecha_inicio = fecha_inicio
         self.fecha_fin = fecha_fin
         self.cupos = cupos
         self.costo = costo
-        self.descripcion = descripcion
\ No newline at end of file
+        self.descripcion = descripcion
+        # Precio por persona que se cobra: el costo propio o, si es 0, la suma de sus destinos (lo calcula la BD)
+        self.precio = costo if precio is None else precio
+
+    @classmethod
+    def desde_fila(cls, fila):
+        """Crea el paquete desde una fila (tupla) con las columnas en el orden de COLUMNAS."""
+        p = cls.__new__(cls)
+        p.id, p.nombre, p.fecha_inicio, p.fecha_fin, p.cupos, p.costo, p.descripcion, p.precio = fila
+        return p
+
+    @classmethod
+    def desde_filas(cls, filas):
+        return list(map(cls.desde_fila, filas))
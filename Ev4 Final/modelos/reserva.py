@@ -1,10 +1,25 @@
 # modelos/reserva.py (Ahora completo)
 class Reserva:
-    def __init__(self, usuario_id, fecha_reserva, cantidad_personas, paquete_id=None, destino_id=None, id=None):
+    __slots__ = ('id', 'usuario_id', 'paquete_id', 'destino_id', 'fecha_reserva', 'cantidad_personas', 'fecha_creacion', 'noches')
+    COLUMNAS = "id, usuario_id, paquete_id, destino_id, fecha_reserva, cantidad_personas, fecha_creacion, noches"
+
+    def __init__(self, usuario_id, fecha_reserva, cantidad_personas, paquete_id=None, destino_id=None, id=None, noches=1):
         self.id = id
         self.usuario_id = usuario_id
         self.paquete_id = paquete_id
         self.destino_id = destino_id
         self.fecha_reserva = fecha_reserva
         self.cantidad_personas = cantidad_personas
-        self.fecha_creacion = None  # Se asigna automáticamente en la base de datos
\ No newline at end of file
+        self.fecha_creacion = None  # Se asigna automáticamente en la base de datos
+        self.noches = noches  # Días que ocupa una reserva de destino (en las de paquete no se usa)
+
+    @classmethod
+    def desde_fila(cls, fila):
+        """Crea la reserva desde una fila (tupla) con las columnas en el orden de COLUMNAS."""
+        r = cls.__new__(cls)
+        r.id, r.usuario_id, r.paquete_id, r.destino_id, r.fecha_reserva, r.cantidad_personas, r.fecha_creacion, r.noches = fila
+        return r
+
+    @classmethod
+    def desde_filas(cls, filas):
+        return list(map(cls.desde_fila, filas))
@@ -2,6 +2,8 @@ import hashlib
 
 class Usuario:
     """Clase que representa a un usuario (solo datos y hashing)."""
+    __slots__ = ('id', 'username', 'password', 'nombre', 'apellido', 'correo')
+    COLUMNAS = "id, username, password_hash, nombre, apellido, correo"
     
     def __init__(self, username, password, nombre=None, apellido=None, correo=None, id=None):
         self.id = id
@@ -11,9 +13,19 @@ class Usuario:
         self.apellido = apellido
         self.correo = correo
         
+    @classmethod
+    def desde_fila(cls, fila):
+        """Crea el usuario desde una fila (tupla) con las columnas en el orden de COLUMNAS."""
+        u = cls.__new__(cls)
+        u.id, u.username, u.password, u.nombre, u.apellido, u.correo = fila
+        return u
+
     @staticmethod
     def hash_password(password):
-        """Genera un hash seguro para la contraseña."""
+        """
+        Hash SHA-256 del formato antiguo. Solo se usa para reconocer contraseñas guardadas antes de
+        pasar a scrypt (ver servicio_negocio/hash_contrasenas.py), que se renuevan al iniciar sesión.
+        """
         # Se asegura de que la entrada sea bytes y usa SHA256.
         return hashlib.sha256(password.encode('utf-8')).hexdigest()
 
@@ -0,0 +1,75 @@
+# persistencia/cache_catalogo.py
+import threading
+import time
+
+class CacheCatalogo:
+    """
+    Guarda en memoria una copia del catálogo (por ejemplo, todos los destinos) para no ir a MySQL
+    cada vez que se muestra una pantalla. La copia caduca tras 'ttl' segundos y se descarta
+    en cuanto alguien modifica el catálogo (invalidar()).
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.version = 0          # Sube cada vez que el catálogo cambia en la base de datos
+        self._datos = None
+        self._version_datos = -1  # Versión con la que se cargaron los datos guardados
+        self._cargado_en = 0.0
+        self.recargas = 0         # Cuántas veces se guardó una lectura nueva (sirve de 'sello' para índices derivados)
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, cargar):
+        """
+        Devuelve el catálogo desde memoria si sigue vigente. Si no, llama a 'cargar()' para leerlo
+        de la base de datos y lo guarda para las siguientes veces.
+        """
+        with self._lock:
+            if self._datos is not None and self._version_datos == self.version \
+                    and time.monotonic() - self._cargado_en < self.ttl:
+                self.aciertos += 1
+                return list(self._datos)
+            self.fallos += 1
+            version_inicial = self.version
+
+        datos = cargar()
+
+        with self._lock:
+            # Si mientras leíamos alguien cambió el catálogo, no guardamos esta lectura (podría estar vieja).
+            # Tampoco guardamos listas vacías: suelen venir de un error de conexión.
+            if datos and self.version == version_inicial:
+                self._datos = list(datos)
+                self._version_datos = version_inicial
+                self._cargado_en = time.monotonic()
+                self.recargas += 1
+        return datos
+
+    def invalidar(self):
+        """Marca el catálogo como modificado: la próxima lectura irá de nuevo a la base de datos."""
+        with self._lock:
+            self.version += 1
+            self._datos = None
+
+    def sello(self):
+        """Marca que cambia cada vez que el contenido guardado cambia (por escritura o por caducidad)."""
+        with self._lock:
+            return (self.version, self.recargas)
+
+    def estadisticas(self):
+        """Aciertos/fallos de la caché, para comprobar que está funcionando."""
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': (self.aciertos / total) if total else 0.0,
+                'version': self.version,
+                'en_memoria': len(self._datos) if self._datos is not None else 0,
+            }
+
+# Caché compartida del catálogo de destinos (la usan DestinosRepository y las escrituras de api.py).
+cache_destinos = CacheCatalogo(ttl=300)
+
+# Caché de los paquetes para el cotizador. Se invalida cuando cambia un paquete, su precio o sus cupos.
+cache_paquetes = CacheCatalogo(ttl=60)
@@ -1,18 +1,23 @@
-from database import crear_conexion
+from database import crear_conexion, LECTURA
 from modelos.destino import Destino
+from persistencia.cache_catalogo import cache_destinos
+from persistencia.indice_busqueda import indice_destinos
 import mysql.connector
 
 class DestinosRepository:
     def obtener_todos(self):
-        """Obtiene todos los destinos de la base de datos."""
-        conn = crear_conexion()
+        """Obtiene todos los destinos (desde la caché en memoria si sigue vigente)."""
+        return cache_destinos.obtener(self._leer_todos)
+
+    def _leer_todos(self):
+        """Obtiene todos los destinos directamente de la base de datos."""
+        conn = crear_conexion(LECTURA)
         if not conn: return []
         
         cursor = conn.cursor()
         try:
-            cursor.execute("SELECT id, nombre, descripcion, actividades, costo FROM destinos")
-            rows = cursor.fetchall()
-            return [Destino(*row) for row in rows]
+            cursor.execute(f"SELECT {Destino.COLUMNAS} FROM destinos")
+            return Destino.desde_filas(cursor.fetchall())
         except mysql.connector.Error as e:
             print(f"Error al obtener destinos: {e}")
             return []
@@ -20,20 +25,20 @@ class DestinosRepository:
             cursor.close()
             conn.close()
 
-    def buscar_por_nombre(self, query):
-        """Busca destinos cuyo nombre coincida parcialmente con la query."""
-        conn = crear_conexion()
-        if not conn: return []
-        
-        cursor = conn.cursor()
-        try:
-            sql = "SELECT id, nombre, descripcion, actividades, costo FROM destinos WHERE nombre LIKE %s"
-            cursor.execute(sql, (f"%{query}%",))
-            rows = cursor.fetchall()
-            return [Destino(*row) for row in rows]
-        except mysql.connector.Error as e:
-            print(f"Error al buscar destinos: {e}")
-            return []
-        finally:
-            cursor.close()
-            conn.close()
\ No newline at end of file
+    def precargar(self):
+        """Carga el catálogo en la caché y arma el índice de búsqueda (para hacerlo en segundo plano al arrancar)."""
+        destinos = self.obtener_todos()
+        if destinos:
+            indice_destinos.sincronizar(destinos, cache_destinos.sello())
+        return len(destinos)
+
+    def buscar_por_nombre(self, query, limite=None):
+        """
+        Busca destinos cuyo nombre coincida con la query (sin importar acentos ni mayúsculas),
+        usando el índice en memoria en lugar de un 'LIKE %q%' que recorre toda la tabla.
+        Los resultados vienen ordenados por relevancia.
+        """
+        destinos = self.obtener_todos()
+        if not destinos: return []
+        indice_destinos.sincronizar(destinos, cache_destinos.sello())
+        return indice_destinos.buscar(query, limite=limite)
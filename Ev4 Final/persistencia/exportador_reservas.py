@@ -0,0 +1,121 @@
+# persistencia/exportador_reservas.py
+"""
+Exportación de reservas a CSV (opcionalmente comprimido con gzip) sin cargar el resultado en memoria.
+
+Se usa un cursor sin búfer (las filas se quedan en el servidor y llegan a medida que se piden) y se
+leen por bloques con fetchmany(), que van directo al escritor CSV. Así exportar 100 o 10 millones de
+reservas ocupa la misma memoria.
+
+Uso como comando de administración (desde la carpeta del proyecto):
+    python -m persistencia.exportador_reservas reservas.csv.gz
+    python -m persistencia.exportador_reservas historial.csv --usuario 15
+"""
+import csv
+import gzip
+import time
+
+from database import crear_conexion, LECTURA
+from persistencia.reservas_repo import CONSULTA_HISTORIAL, COSTO_TOTAL_SQL
+import mysql.connector
+
+COLUMNAS_HISTORIAL = ('id', 'destino_id', 'paquete_id', 'nombre_item', 'fecha_reserva', 'cantidad_personas', 'costo_total')
+
+COLUMNAS_ADMIN = ('id', 'usuario_id', 'correo', 'tipo', 'item', 'fecha_reserva', 'cantidad_personas', 'costo_total', 'fecha_creacion')
+CONSULTA_ADMIN = f"""
+    SELECT r.id, r.usuario_id, u.correo,
+           CASE WHEN r.destino_id IS NOT NULL THEN 'Destino' ELSE 'Paquete' END as tipo,
+           COALESCE(d.nombre, p.nombre, 'Desconocido') as item,
+           r.fecha_reserva, r.cantidad_personas,
+           {COSTO_TOTAL_SQL} as costo_total,
+           r.fecha_creacion
+    FROM reservas r
+    JOIN usuarios u ON r.usuario_id = u.id
+    LEFT JOIN destinos d ON r.destino_id = d.id
+    LEFT JOIN paquetes p ON r.paquete_id = p.id
+    ORDER BY r.id
+"""
+
+def _abrir_salida(ruta, comprimir):
+    # newline='' porque el módulo csv se encarga de los saltos de línea
+    if comprimir:
+        return gzip.open(ruta, 'wt', encoding='utf-8', newline='', compresslevel=6)
+    return open(ruta, 'w', encoding='utf-8', newline='')
+
+def _imprimir_progreso(filas, filas_por_segundo):
+    print(f"  {filas:,} reservas exportadas ({filas_por_segundo:,.0f} filas/s)")
+
+def exportar_consulta(consulta, parametros, columnas, ruta, comprimir=None, tamano_lote=5000, progreso=_imprimir_progreso):
+    """
+    Ejecuta la consulta y escribe el resultado en 'ruta' como CSV (con cabecera).
+
+    - comprimir: True/False; si no se indica, se comprime cuando la ruta termina en '.gz'.
+    - progreso: función progreso(filas, filas_por_segundo) llamada tras cada bloque (None para silenciar).
+
+    Devuelve un diccionario con el total de filas, el tiempo y las filas por segundo.
+    """
+    if comprimir is None:
+        comprimir = ruta.lower().endswith('.gz')
+
+    conn = crear_conexion(LECTURA)
+    if not conn:
+        raise mysql.connector.Error(msg="Sin conexión a la base de datos.")
+    # buffered=False: el conector no descarga todo el resultado de golpe; fetchmany() lo va trayendo por partes.
+    cursor = conn.cursor(buffered=False)
+    total = 0
+    inicio = time.perf_counter()
+    try:
+        cursor.execute(consulta, parametros)
+        with _abrir_salida(ruta, comprimir) as f:
+            escritor = csv.writer(f)
+            escritor.writerow(columnas)
+            while True:
+                filas = cursor.fetchmany(tamano_lote)
+                if not filas:
+                    break
+                escritor.writerows(filas)
+                total += len(filas)
+                if progreso:
+                    progreso(total, total / (time.perf_counter() - inicio))
+    finally:
+        try:
+            # Si se cortó a la mitad, hay que leer (y descartar) lo que quedó en camino antes de devolver la conexión.
+            if conn.unread_result:
+                conn.consume_results()
+        except mysql.connector.Error:
+            pass
+        cursor.close()
+        conn.close()
+
+    segundos = time.perf_counter() - inicio
+    return {
+        'filas': total,
+        'segundos': round(segundos, 3),
+        'filas_por_segundo': round(total / segundos, 1) if segundos else 0.0,
+        'ruta': ruta,
+        'comprimido': comprimir,
+    }
+
+def exportar_historial(usuario_id, ruta, comprimir=None, tamano_lote=5000, progreso=_imprimir_progreso):
+    """Exporta el historial de un usuario (las mismas columnas que se ven en su panel)."""
+    return exportar_consulta(CONSULTA_HISTORIAL, (usuario_id,), COLUMNAS_HISTORIAL, ruta, comprimir, tamano_lote, progreso)
+
+def exportar_reservas(ruta, comprimir=None, tamano_lote=5000, progreso=_imprimir_progreso):
+    """Exporta la tabla de reservas completa (para el administrador)."""
+    return exportar_consulta(CONSULTA_ADMIN, (), COLUMNAS_ADMIN, ruta, comprimir, tamano_lote, progreso)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Exporta reservas a CSV (o CSV comprimido si el archivo termina en .gz).")
+    parser.add_argument('archivo')
+    parser.add_argument('--usuario', type=int, default=None, help="Exporta solo el historial de este usuario")
+    parser.add_argument('--lote', type=int, default=5000, help="Filas leídas por bloque")
+    args = parser.parse_args()
+
+    if args.usuario is not None:
+        resumen = exportar_historial(args.usuario, args.archivo, tamano_lote=args.lote)
+    else:
+        resumen = exportar_reservas(args.archivo, tamano_lote=args.lote)
+    print(f"Exportación terminada: {resumen['filas']:,} reservas en {resumen['segundos']} s "
+          f"({resumen['filas_por_segundo']:,.0f} filas/s).")
@@ -0,0 +1,248 @@
+# persistencia/importador_destinos.py
+"""
+Carga masiva de destinos desde archivos JSON, NDJSON (un JSON por línea) o CSV.
+
+El archivo se lee 'en streaming' (nunca se carga entero en memoria) y las filas se guardan
+por lotes grandes: con un INSERT de muchas filas a la vez o, si el servidor y la configuración
+lo permiten ('allow_local_infile': true en MYSQL_CONFIG), con LOAD DATA LOCAL INFILE.
+
+Uso como comando de administración (desde la carpeta del proyecto):
+    python -m persistencia.importador_destinos catalogo.csv --lote 2000
+"""
+import csv
+import json
+import os
+import tempfile
+import time
+
+from database import crear_conexion, _load_db_config, ESCRITURA
+from persistencia.cache_catalogo import cache_destinos, cache_paquetes
+from persistencia.precios_paquetes import recalcular_precios
+import mysql.connector
+
+COLUMNAS = ('id', 'nombre', 'descripcion', 'actividades', 'costo')
+
+# --- Lectores en streaming ---
+
+def _leer_json_array(f, tamano_bloque=1 << 16):
+    """
+    Recorre los objetos de un arreglo JSON ('[ {...}, {...} ]') leyendo el archivo por bloques.
+    Lanza ValueError si el archivo no empieza con '['.
+    """
+    decoder = json.JSONDecoder()
+    buf, i, abierto = '', 0, False
+    fin_archivo = False
+    while True:
+        # Saltamos espacios y las comas entre elementos
+        while i < len(buf) and (buf[i].isspace() or (abierto and buf[i] == ',')):
+            i += 1
+        if i < len(buf) and not abierto:
+            if buf[i] != '[':
+                raise ValueError("El archivo JSON debe contener un arreglo de destinos ('[ {...}, {...} ]').")
+            abierto = True
+            i += 1
+            continue
+        if i < len(buf) and buf[i] == ']':
+            return
+        if i < len(buf):
+            try:
+                obj, fin = decoder.raw_decode(buf, i)
+            except json.JSONDecodeError:
+                if fin_archivo: raise
+            else:
+                # Un valor se acepta recién cuando lo sigue un separador (o se acabó el archivo): un número
+                # cortado al final del bloque ('12' de '1234') también se decodifica sin error.
+                if fin_archivo or (fin < len(buf) and (buf[fin] in ',]' or buf[fin].isspace())):
+                    yield obj
+                    i = fin
+                    continue
+        elif fin_archivo:
+            return
+        # Necesitamos más texto: descartamos lo ya procesado y leemos otro bloque
+        bloque = f.read(tamano_bloque)
+        fin_archivo = not bloque
+        buf, i = buf[i:] + bloque, 0
+
+def _leer_ndjson(f):
+    for linea in f:
+        linea = linea.strip()
+        if linea:
+            yield json.loads(linea)
+
+def _leer_csv(f):
+    yield from csv.DictReader(f)
+
+LECTORES = {'json': _leer_json_array, 'ndjson': _leer_ndjson, 'csv': _leer_csv}
+
+def detectar_formato(ruta):
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in ('.ndjson', '.jsonl'): return 'ndjson'
+    if extension == '.csv': return 'csv'
+    return 'json'
+
+def _fila(registro):
+    """Convierte un registro leído (dict) en la tupla que se guarda en la tabla destinos."""
+    id_ = registro.get('id')
+    costo = registro.get('costo') or 0
+    return (
+        int(id_) if id_ not in (None, '') else None,
+        registro['nombre'],
+        registro.get('descripcion') or '',
+        registro.get('actividades') or '',
+        int(float(costo)),
+    )
+
+# --- Escritores por lotes ---
+
+_ACTUALIZAR = """
+    ON DUPLICATE KEY UPDATE
+    nombre=VALUES(nombre), descripcion=VALUES(descripcion), actividades=VALUES(actividades), costo=VALUES(costo)
+"""
+
+def _insertar_lote(cursor, filas):
+    valores = ", ".join(["(%s, %s, %s, %s, %s)"] * len(filas))
+    cursor.execute(
+        f"INSERT INTO destinos (id, nombre, descripcion, actividades, costo) VALUES {valores} {_ACTUALIZAR}",
+        [v for fila in filas for v in fila]
+    )
+
+def _escapar_tsv(valor):
+    if valor is None: return '\\N'
+    return str(valor).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def _cargar_lote_infile(cursor, filas):
+    """Escribe el lote en un archivo temporal y lo sube con LOAD DATA LOCAL INFILE a una tabla de paso."""
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.tsv', delete=False, newline='\n') as tmp:
+        for fila in filas:
+            tmp.write('\t'.join(_escapar_tsv(v) for v in fila) + '\n')
+        ruta = tmp.name
+    try:
+        cursor.execute("TRUNCATE TABLE destinos_import")
+        cursor.execute(
+            "LOAD DATA LOCAL INFILE %s INTO TABLE destinos_import CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' (id, nombre, descripcion, actividades, costo)",
+            (ruta.replace('\\', '/'),)
+        )
+        # Pasamos de la tabla de paso a la real sin REPLACE (que borraría y rompería los paquetes en cascada)
+        cursor.execute(
+            f"INSERT INTO destinos (id, nombre, descripcion, actividades, costo) "
+            f"SELECT id, nombre, descripcion, actividades, costo FROM destinos_import {_ACTUALIZAR}"
+        )
+    finally:
+        os.remove(ruta)
+
+def _preparar_infile(cursor):
+    cursor.execute("""
+        CREATE TEMPORARY TABLE IF NOT EXISTS destinos_import (
+            id INT NULL,
+            nombre VARCHAR(255) NOT NULL,
+            descripcion TEXT,
+            actividades TEXT,
+            costo INT NOT NULL
+        )
+    """)
+
+def _imprimir_progreso(filas, filas_por_segundo):
+    print(f"  {filas:,} destinos importados ({filas_por_segundo:,.0f} filas/s)")
+
+def importar_destinos(ruta, formato=None, conexion=None, tamano_lote=1000, metodo='auto', progreso=_imprimir_progreso):
+    """
+    Importa destinos desde 'ruta' (insertando o actualizando por id).
+
+    - formato: 'json', 'ndjson' o 'csv' (si no se indica, se deduce de la extensión).
+    - conexion: conexión a usar; si no se pasa, se pide una al pool.
+    - metodo: 'insert' (INSERT de varias filas), 'infile' (LOAD DATA LOCAL INFILE) o 'auto'
+      (infile si 'allow_local_infile' está activado en la configuración, y si falla, insert).
+    - progreso: función progreso(filas, filas_por_segundo) llamada tras cada lote (None para silenciar).
+
+    Devuelve un diccionario con el total de filas, el tiempo y las filas por segundo.
+    """
+    formato = formato or detectar_formato(ruta)
+    if formato not in LECTORES:
+        raise ValueError(f"Formato no soportado: {formato}")
+    if metodo == 'auto':
+        metodo = 'infile' if (_load_db_config() or {}).get('allow_local_infile') else 'insert'
+
+    propia = conexion is None
+    conn = conexion or crear_conexion(ESCRITURA)
+    if not conn:
+        raise mysql.connector.Error(msg="Sin conexión a la base de datos.")
+    cursor = conn.cursor()
+
+    total = 0
+    inicio = time.perf_counter()
+    escribir = _insertar_lote
+
+    def guardar(lote):
+        nonlocal escribir, metodo
+        try:
+            escribir(cursor, lote)
+        except mysql.connector.Error as e:
+            if escribir is not _cargar_lote_infile: raise
+            # El servidor no permite LOAD DATA LOCAL: seguimos con INSERT de varias filas.
+            print(f"Aviso: LOAD DATA LOCAL INFILE no disponible ({e}). Se usará INSERT por lotes.")
+            escribir, metodo = _insertar_lote, 'insert'
+            escribir(cursor, lote)
+
+    try:
+        if metodo == 'infile':
+            try:
+                _preparar_infile(cursor)
+                escribir = _cargar_lote_infile
+            except mysql.connector.Error:
+                metodo = 'insert'
+
+        with open(ruta, 'r', encoding='utf-8', newline='' if formato == 'csv' else None) as f:
+            lote = []
+            for registro in LECTORES[formato](f):
+                lote.append(_fila(registro))
+                if len(lote) >= tamano_lote:
+                    guardar(lote)
+                    total += len(lote)
+                    lote = []
+                    conn.commit()  # Confirmamos por lote para no acumular una transacción gigante
+                    if progreso:
+                        progreso(total, total / (time.perf_counter() - inicio))
+            if lote:
+                guardar(lote)
+                total += len(lote)
+        # Una sola pasada al final: los paquetes quedan con el precio de los costos importados.
+        recalcular_precios(cursor)
+        conn.commit()
+    except (mysql.connector.Error, ValueError, KeyError):
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        if propia:
+            conn.close()
+        if total:
+            cache_destinos.invalidar()
+            cache_paquetes.invalidar()
+
+    segundos = time.perf_counter() - inicio
+    resumen = {
+        'filas': total,
+        'segundos': round(segundos, 3),
+        'filas_por_segundo': round(total / segundos, 1) if segundos else 0.0,
+        'metodo': metodo,
+        'formato': formato,
+    }
+    if progreso:
+        progreso(total, resumen['filas_por_segundo'])
+    return resumen
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Importa (o actualiza) destinos desde un archivo JSON, NDJSON o CSV.")
+    parser.add_argument('archivo')
+    parser.add_argument('--formato', choices=sorted(LECTORES), default=None)
+    parser.add_argument('--lote', type=int, default=1000, help="Filas por lote")
+    parser.add_argument('--metodo', choices=['auto', 'insert', 'infile'], default='auto')
+    args = parser.parse_args()
+
+    resumen = importar_destinos(args.archivo, args.formato, tamano_lote=args.lote, metodo=args.metodo)
+    print(f"Importación terminada: {resumen['filas']:,} destinos en {resumen['segundos']} s "
+          f"({resumen['filas_por_segundo']:,.0f} filas/s, método {resumen['metodo']}).")
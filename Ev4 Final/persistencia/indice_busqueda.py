@@ -0,0 +1,278 @@
+# persistencia/indice_busqueda.py
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+
+CIUDAD = 1
+PAIS = 2
+
+# Puntaje de cada tipo de coincidencia: primero las exactas, luego los prefijos y al final
+# los fragmentos (n-gramas). A igual tipo, pesa más coincidir en la ciudad que en el país.
+_PUNTAJES = {
+    'exacta': {CIUDAD: 6, PAIS: 5},
+    'prefijo': {CIUDAD: 4, PAIS: 3},
+    'fragmento': {CIUDAD: 2, PAIS: 1},
+}
+_PUNTAJE_MAXIMO = 6
+_N = 3  # Tamaño de los n-gramas (trigramas)
+
+def normalizar(texto):
+    """Pasa el texto a minúsculas y le quita los acentos: 'París' -> 'paris', 'Perú' -> 'peru'."""
+    texto = texto or ''
+    if texto.isascii():
+        return texto.casefold()
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return sin_acentos.casefold()
+
+def tokenizar(texto):
+    """Separa un texto ya normalizado en palabras."""
+    return re.findall(r'[a-z0-9]+', texto)
+
+def separar_nombre(nombre):
+    """Divide 'Ciudad, País' en sus dos partes (si no hay coma, todo se considera ciudad)."""
+    if ',' in nombre:
+        ciudad, pais = nombre.rsplit(',', 1)
+        return ciudad, pais
+    return nombre, ''
+
+def _trigramas(token):
+    return {token[i:i + _N] for i in range(len(token) - _N + 1)}
+
+
+class _Documento:
+    __slots__ = ('nombre', 'payload', 'ciudad', 'pais', 'orden')
+
+    def __init__(self, nombre, payload):
+        normalizado = normalizar(nombre)
+        ciudad, pais = separar_nombre(normalizado)
+        self.nombre = nombre
+        self.payload = payload
+        self.ciudad = tuple(dict.fromkeys(tokenizar(ciudad)))
+        self.pais = tuple(dict.fromkeys(tokenizar(pais)))
+        # A igual puntaje, primero los nombres más cortos (más parecidos a lo buscado) y luego por orden alfabético.
+        self.orden = (len(nombre), normalizado)
+
+
+class IndiceBusqueda:
+    """
+    Índice invertido en memoria para buscar destinos por nombre sin hacer 'LIKE %q%' en MySQL.
+    Guarda cada palabra de la ciudad y del país (sin acentos ni mayúsculas) y sabe encontrar
+    coincidencias exactas, por prefijo ('par' -> 'paris') y por fragmento ('ris' -> 'paris').
+    """
+
+    def __init__(self):
+        self._docs = {}        # id -> _Documento
+        self._postings = {}    # palabra -> {id: máscara de campos (CIUDAD | PAIS)}
+        self._palabras = []    # Todas las palabras ordenadas, para buscar prefijos con bisect
+        self._trigramas = {}   # trigrama -> conjunto de palabras que lo contienen
+        self._construyendo = False
+        self._lock = threading.RLock()
+        self.sello = None      # Marca del catálogo con el que se sincronizó el índice por última vez
+
+    def __len__(self):
+        return len(self._docs)
+
+    # --- Mantenimiento del índice ---
+
+    def _indexar_palabra(self, palabra, doc_id, campo):
+        post = self._postings.get(palabra)
+        if post is None:
+            post = self._postings[palabra] = {}
+            if not self._construyendo:
+                bisect.insort(self._palabras, palabra)
+            for tri in _trigramas(palabra):
+                self._trigramas.setdefault(tri, set()).add(palabra)
+        post[doc_id] = post.get(doc_id, 0) | campo
+
+    def _desindexar_palabra(self, palabra, doc_id):
+        post = self._postings.get(palabra)
+        if post is None: return
+        post.pop(doc_id, None)
+        if post: return
+        # La palabra ya no aparece en ningún destino: la sacamos de todas las estructuras.
+        del self._postings[palabra]
+        i = bisect.bisect_left(self._palabras, palabra)
+        if i < len(self._palabras) and self._palabras[i] == palabra:
+            del self._palabras[i]
+        for tri in _trigramas(palabra):
+            conjunto = self._trigramas.get(tri)
+            if conjunto is not None:
+                conjunto.discard(palabra)
+                if not conjunto:
+                    del self._trigramas[tri]
+
+    def agregar(self, doc_id, nombre, payload=None):
+        """Agrega (o reemplaza) un destino en el índice."""
+        with self._lock:
+            actual = self._docs.get(doc_id)
+            if actual is not None:
+                if actual.nombre == nombre:
+                    actual.payload = payload
+                    return
+                self.eliminar(doc_id)
+            doc = _Documento(nombre, payload)
+            self._docs[doc_id] = doc
+            for palabra in doc.ciudad:
+                self._indexar_palabra(palabra, doc_id, CIUDAD)
+            for palabra in doc.pais:
+                self._indexar_palabra(palabra, doc_id, PAIS)
+
+    def eliminar(self, doc_id):
+        """Quita un destino del índice."""
+        with self._lock:
+            doc = self._docs.pop(doc_id, None)
+            if doc is None: return
+            for palabra in set(doc.ciudad) | set(doc.pais):
+                self._desindexar_palabra(palabra, doc_id)
+
+    def reconstruir(self, items):
+        """Construye el índice desde cero con una lista de (id, nombre, payload)."""
+        with self._lock:
+            self._docs, self._postings, self._palabras, self._trigramas = {}, {}, [], {}
+            self._construyendo = True
+            try:
+                for doc_id, nombre, payload in items:
+                    self.agregar(doc_id, nombre, payload)
+            finally:
+                self._construyendo = False
+            self._palabras = sorted(self._postings)
+
+    def sincronizar(self, destinos, sello):
+        """
+        Pone el índice al día con el catálogo de destinos. Solo re-indexa los destinos que
+        cambiaron de nombre, aparecieron o desaparecieron; si cambió buena parte del catálogo,
+        sale más barato reconstruirlo entero.
+        """
+        with self._lock:
+            if sello is not None and sello == self.sello:
+                return
+            nuevos = {d.id: d for d in destinos}
+            cambios = [d for d in destinos if d.id not in self._docs or self._docs[d.id].nombre != d.nombre]
+            borrados = [doc_id for doc_id in self._docs if doc_id not in nuevos]
+
+            if not self._docs or len(cambios) + len(borrados) > len(nuevos) // 10:
+                self.reconstruir((d.id, d.nombre, d) for d in destinos)
+            else:
+                for doc_id in borrados:
+                    self.eliminar(doc_id)
+                for d in destinos:
+                    self.agregar(d.id, d.nombre, d)
+            self.sello = sello
+
+    # --- Búsqueda ---
+
+    def _coincidencias(self, termino):
+        """
+        Recorre las palabras que coinciden con el término, agrupadas por tipo de coincidencia
+        (exacta, prefijo, fragmento), para poder cortar la búsqueda en cuanto ya no hay mejores resultados.
+        """
+        if termino in self._postings:
+            yield 'exacta', [termino]
+        inicio = bisect.bisect_right(self._palabras, termino)
+        fin = bisect.bisect_left(self._palabras, termino + '\uffff', lo=inicio)
+        yield 'prefijo', self._palabras[inicio:fin]
+        if len(termino) >= _N:
+            conjuntos = [self._trigramas.get(tri) for tri in _trigramas(termino)]
+            if all(conjuntos):
+                conjuntos.sort(key=len)
+                candidatas = set.intersection(*conjuntos)
+                yield 'fragmento', [p for p in candidatas if termino in p and not p.startswith(termino)]
+
+    @staticmethod
+    def _puntaje(termino, doc):
+        """Mejor puntaje que obtiene un término contra las palabras de un destino (0 si no coincide)."""
+        mejor = 0
+        for campo, palabras in ((CIUDAD, doc.ciudad), (PAIS, doc.pais)):
+            for palabra in palabras:
+                if palabra == termino:
+                    tipo = 'exacta'
+                elif palabra.startswith(termino):
+                    tipo = 'prefijo'
+                elif len(termino) >= _N and termino in palabra:
+                    tipo = 'fragmento'
+                else:
+                    continue
+                mejor = max(mejor, _PUNTAJES[tipo][campo])
+        return mejor
+
+    def buscar(self, consulta, limite=None):
+        """
+        Devuelve los destinos que coinciden con TODAS las palabras de la consulta, ordenados por relevancia.
+        Con 'limite' se devuelven solo los mejores resultados (y la búsqueda termina antes).
+        """
+        with self._lock:
+            terminos = list(dict.fromkeys(tokenizar(normalizar(consulta))))
+            if not terminos:
+                docs = sorted(self._docs.values(), key=lambda d: d.orden)
+                return [d.payload for d in docs[:limite]]
+
+            # Empezamos por el término más largo, que suele ser el más selectivo.
+            guia = max(terminos, key=len)
+            otros = [t for t in terminos if t != guia]
+            extra_maximo = _PUNTAJE_MAXIMO * len(otros)
+
+            puntajes = {}
+            tipos = ['exacta', 'prefijo', 'fragmento']
+            for tipo, palabras in self._coincidencias(guia):
+                for palabra in palabras:
+                    for doc_id, mascara in self._postings[palabra].items():
+                        if doc_id in puntajes: continue
+                        campo = CIUDAD if mascara & CIUDAD else PAIS
+                        puntaje = _PUNTAJES[tipo][campo]
+                        doc = self._docs[doc_id]
+                        for t in otros:
+                            p = self._puntaje(t, doc)
+                            if not p:
+                                puntaje = 0
+                                break
+                            puntaje += p
+                        if puntaje:
+                            puntajes[doc_id] = puntaje
+
+                # Si ya tenemos 'limite' resultados que ningún tipo de coincidencia posterior puede superar, paramos.
+                siguiente = tipos.index(tipo) + 1
+                if limite and len(puntajes) >= limite and siguiente < len(tipos):
+                    umbral = heapq.nlargest(limite, puntajes.values())[-1]
+                    if umbral > _PUNTAJES[tipos[siguiente]][CIUDAD] + extra_maximo:
+                        break
+
+            clave = lambda doc_id: (-puntajes[doc_id], self._docs[doc_id].orden)
+            if limite:
+                ids = heapq.nsmallest(limite, puntajes, key=clave)
+            else:
+                ids = sorted(puntajes, key=clave)
+            return [self._docs[doc_id].payload for doc_id in ids]
+
+# Índice compartido del catálogo de destinos.
+indice_destinos = IndiceBusqueda()
+
+
+if __name__ == '__main__':
+    # Pequeña prueba de velocidad con un catálogo sintético de 300.000 destinos.
+    import random
+    import string
+    import time
+
+    random.seed(7)
+    paises = ['Francia', 'Perú', 'México', 'Japón', 'España', 'Italia', 'Brasil', 'Canadá', 'Egipto', 'Turquía']
+    def palabra():
+        return ''.join(random.choices(string.ascii_lowercase, k=random.randint(4, 10))).capitalize()
+    items = [(i, f"{palabra()} {palabra()}, {random.choice(paises)}", i) for i in range(300_000)]
+    items.append((300_000, 'París, Francia', 300_000))
+    items.append((300_001, 'Cusco, Perú', 300_001))
+
+    indice = IndiceBusqueda()
+    t0 = time.perf_counter()
+    indice.reconstruir(items)
+    print(f"Índice construido con {len(indice)} destinos en {time.perf_counter() - t0:.2f} s")
+
+    for consulta in ['Paris', 'peru cusco', 'Cusc', 'ari', 'zzqx']:
+        repeticiones = 200
+        t0 = time.perf_counter()
+        for _ in range(repeticiones):
+            resultado = indice.buscar(consulta, limite=20)
+        ms = (time.perf_counter() - t0) / repeticiones * 1000
+        print(f"{consulta!r:14} -> {len(resultado):3} resultados en {ms:.3f} ms (primero: {items[resultado[0]][1] if resultado else '-'})")
@@ -0,0 +1,220 @@
+# persistencia/inventario_destinos.py
+"""
+Inventario diario de los destinos: cuántos lugares quedan en cada destino para cada día.
+
+  * destinos.capacidad_diaria:   personas que puede recibir el destino en un día (por defecto 20).
+  * inventario_destinos:         una fila por (destino, fecha) con su 'capacidad' y sus lugares 'disponibles'.
+                                 La clave primaria es (destino_id, fecha): las filas de un destino quedan
+                                 guardadas juntas y ordenadas por fecha, así un rango de días es un solo
+                                 tramo del índice (nada de recorrer la tabla).
+
+Las filas se crean a medida que hacen falta, con la capacidad diaria del destino: un día que todavía no
+tiene fila tiene todos sus lugares libres. Una reserva de destino ocupa 'noches' días seguidos a partir de
+su fecha, es decir [fecha, fecha + noches). Igual que con los cupos de los paquetes (ver motor_reservas.py),
+la comprobación y la resta van en una sola sentencia:
+
+    UPDATE inventario_destinos SET disponibles = disponibles - n
+    WHERE destino_id = ? AND fecha >= desde AND fecha < hasta AND disponibles >= n
+
+Si cambiaron menos filas que noches tiene la estadía, algún día no alcanzaba y se deshace la transacción.
+"""
+import datetime
+
+from database import crear_conexion, ESCRITURA, LECTURA
+import mysql.connector
+
+CAPACIDAD_DIARIA_POR_DEFECTO = 20
+MAX_NOCHES = 30         # Estadía más larga que se puede reservar de una vez
+MAX_DIAS_CONSULTA = 366 # Rango más largo que se puede consultar de una vez
+
+def crear_tabla_inventario(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS inventario_destinos (
+        destino_id INT NOT NULL,
+        fecha DATE NOT NULL,
+        capacidad INT NOT NULL,
+        disponibles INT NOT NULL,
+        PRIMARY KEY (destino_id, fecha),
+        FOREIGN KEY (destino_id) REFERENCES destinos(id) ON DELETE CASCADE
+    )
+    """)
+
+def llenar_inventario_inicial(cursor):
+    """
+    Para la migración: llena el inventario con las reservas de destinos que ya existían, que son todas de
+    una noche (la columna 'noches' es nueva). Cada día queda con su capacidad menos lo reservado.
+    """
+    cursor.execute("""
+        INSERT INTO inventario_destinos (destino_id, fecha, capacidad, disponibles)
+        SELECT r.destino_id, r.fecha_reserva, d.capacidad_diaria, d.capacidad_diaria - SUM(r.cantidad_personas)
+        FROM reservas r
+        JOIN destinos d ON d.id = r.destino_id
+        GROUP BY r.destino_id, r.fecha_reserva, d.capacidad_diaria
+        ON DUPLICATE KEY UPDATE disponibles = capacidad - (VALUES(capacidad) - VALUES(disponibles))
+    """)
+    cursor.execute("UPDATE reservas SET noches = 1 WHERE destino_id IS NOT NULL AND noches IS NULL")
+
+def _dias(desde, noches):
+    return [desde + datetime.timedelta(days=i) for i in range(noches)]
+
+def abrir_fechas(cursor, destino_id, desde, noches):
+    """
+    Crea las filas que falten del destino para [desde, desde + noches), con su capacidad diaria.
+    Las que ya existen no se tocan. Conviene confirmarlo (commit) antes de reservar: así las filas nuevas
+    no quedan bloqueadas durante toda la reserva y las demás reservas del mismo día no esperan por ellas.
+    """
+    dias = _dias(desde, noches)
+    cursor.execute(
+        f"""
+        INSERT INTO inventario_destinos (destino_id, fecha, capacidad, disponibles)
+        SELECT d.id, f.fecha, d.capacidad_diaria, d.capacidad_diaria
+        FROM destinos d
+        JOIN ({' UNION ALL '.join(['SELECT CAST(%s AS DATE) AS fecha'] * len(dias))}) f
+        WHERE d.id = %s
+        ON DUPLICATE KEY UPDATE destino_id = inventario_destinos.destino_id
+        """,
+        [*dias, destino_id]
+    )
+
+def ocupar(cursor, destino_id, desde, noches, personas):
+    """
+    Resta 'personas' lugares en cada día de [desde, desde + noches), dentro de la transacción del cursor.
+    Devuelve True si alcanzaron en todos los días. Si devuelve False, algunos días pudieron quedar restados:
+    quien llama tiene que deshacer (rollback o ROLLBACK TO SAVEPOINT).
+    Las filas tienen que existir (ver abrir_fechas).
+    """
+    cursor.execute(
+        "UPDATE inventario_destinos SET disponibles = disponibles - %s "
+        "WHERE destino_id = %s AND fecha >= %s AND fecha < %s AND disponibles >= %s",
+        (personas, destino_id, desde, desde + datetime.timedelta(days=noches), personas)
+    )
+    return cursor.rowcount == noches
+
+def liberar(cursor, destino_id, desde, noches, personas):
+    """Devuelve 'personas' lugares a cada día de [desde, desde + noches) (al borrar o achicar una reserva)."""
+    cursor.execute(
+        "UPDATE inventario_destinos SET disponibles = disponibles + %s "
+        "WHERE destino_id = %s AND fecha >= %s AND fecha < %s",
+        (personas, destino_id, desde, desde + datetime.timedelta(days=noches))
+    )
+
+def disponibilidad(cursor, destino_id, desde, hasta):
+    """
+    Lugares libres de cada día de [desde, hasta] como lista de (fecha, disponibles), en orden.
+    Lee solo el tramo del índice de ese destino y esas fechas; los días sin fila valen la capacidad diaria.
+    Devuelve None si el destino no existe.
+    """
+    cursor.execute("SELECT capacidad_diaria FROM destinos WHERE id = %s", (destino_id,))
+    fila = cursor.fetchone()
+    if fila is None:
+        return None
+    capacidad = fila[0]
+    cursor.execute(
+        "SELECT fecha, disponibles FROM inventario_destinos WHERE destino_id = %s AND fecha BETWEEN %s AND %s",
+        (destino_id, desde, hasta)
+    )
+    guardados = dict(cursor.fetchall())
+    return [(dia, guardados.get(dia, capacidad)) for dia in _dias(desde, (hasta - desde).days + 1)]
+
+def inicios_con_lugar(dias, personas, noches=1):
+    """
+    A partir de la lista de (fecha, disponibles) de disponibilidad(), las fechas en las que puede empezar
+    una estadía de 'noches' noches para 'personas' personas (todos sus días tienen lugar y caen en el rango).
+    """
+    inicios = []
+    seguidos = 0  # Días seguidos con lugar que terminan en el día actual
+    for i, (_, libres) in enumerate(dias):
+        seguidos = seguidos + 1 if libres >= personas else 0
+        if seguidos >= noches:
+            inicios.append(dias[i - noches + 1][0])
+    return inicios
+
+
+class InventarioRepository:
+    """Consultas y ajustes del inventario diario de los destinos."""
+
+    @staticmethod
+    def _validar_rango(desde, hasta):
+        if hasta < desde:
+            raise ValueError("La fecha final no puede ser anterior a la inicial.")
+        if (hasta - desde).days >= MAX_DIAS_CONSULTA:
+            raise ValueError(f"Se pueden consultar como máximo {MAX_DIAS_CONSULTA} días a la vez.")
+
+    def disponibilidad(self, destino_id, desde, hasta):
+        """Lista de (fecha, disponibles) del destino para cada día de [desde, hasta]. None si no existe."""
+        self._validar_rango(desde, hasta)
+        conn = crear_conexion(LECTURA)
+        if not conn: return None
+        cursor = conn.cursor()
+        try:
+            return disponibilidad(cursor, destino_id, desde, hasta)
+        except mysql.connector.Error as e:
+            print(f"Error al consultar la disponibilidad del destino: {e}")
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+
+    def fechas_disponibles(self, destino_id, desde, hasta, personas=1, noches=1):
+        """
+        Fechas de [desde, hasta] en las que se puede reservar el destino para 'personas' personas y
+        'noches' noches. Es una consulta para mostrar: la reserva vuelve a comprobar los lugares al guardarse.
+        """
+        dias = self.disponibilidad(destino_id, desde, hasta)
+        if dias is None:
+            return []
+        return inicios_con_lugar(dias, personas, noches)
+
+    def fijar_capacidad(self, destino_id, capacidad, desde=None, hasta=None):
+        """
+        Cambia cuántas personas recibe el destino por día. Sin fechas, cambia su capacidad diaria y la de
+        todos los días desde hoy; con fechas, solo la de [desde, hasta] (por ejemplo, una temporada alta).
+        Lo ya reservado se mantiene: los lugares disponibles se mueven lo mismo que la capacidad.
+        No se puede bajar por debajo de lo ya reservado: si algún día quedaría con lugares negativos,
+        no se cambia nada y el mensaje indica esos días. Retorna (exito, mensaje).
+        """
+        if capacidad < 0:
+            return False, "La capacidad no puede ser negativa."
+        if desde is not None:
+            hasta = hasta or desde
+            self._validar_rango(desde, hasta)
+        conn = crear_conexion(ESCRITURA)
+        if not conn: return False, "Error de conexión."
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT id FROM destinos WHERE id = %s FOR UPDATE", (destino_id,))
+            if cursor.fetchone() is None:
+                conn.rollback()
+                return False, "Destino no encontrado."
+            if desde is None:
+                cursor.execute("UPDATE destinos SET capacidad_diaria = %s WHERE id = %s", (capacidad, destino_id))
+                desde, hasta = datetime.date.today(), datetime.date.max
+            else:
+                abrir_fechas(cursor, destino_id, desde, (hasta - desde).days + 1)
+            cursor.execute(
+                "UPDATE inventario_destinos SET disponibles = disponibles + (%s - capacidad), capacidad = %s "
+                "WHERE destino_id = %s AND fecha BETWEEN %s AND %s",
+                (capacidad, capacidad, destino_id, desde, hasta)
+            )
+            # Las filas quedaron bloqueadas por el UPDATE: nadie puede reservar entre el cambio y esta revisión.
+            cursor.execute(
+                "SELECT fecha, capacidad - disponibles FROM inventario_destinos "
+                "WHERE destino_id = %s AND fecha BETWEEN %s AND %s AND disponibles < 0 ORDER BY fecha",
+                (destino_id, desde, hasta)
+            )
+            conflictos = cursor.fetchall()
+            if conflictos:
+                conn.rollback()
+                detalle = ", ".join(f"{fecha} ({reservadas} reservadas)" for fecha, reservadas in conflictos[:5])
+                if len(conflictos) > 5:
+                    detalle += f" y {len(conflictos) - 5} días más"
+                return False, f"No se puede bajar la capacidad a {capacidad}: hay días con más personas reservadas: {detalle}."
+            conn.commit()
+            return True, "Capacidad actualizada."
+        except mysql.connector.Error as e:
+            print(f"Error al cambiar la capacidad del destino: {e}")
+            conn.rollback()
+            return False, f"Error al cambiar la capacidad: {e}"
+        finally:
+            cursor.close()
+            conn.close()
@@ -0,0 +1,305 @@
+# persistencia/motor_reservas.py
+from database import crear_conexion, ESCRITURA
+from persistencia.inventario_destinos import abrir_fechas, ocupar
+from persistencia.resumenes_repo import aplicar_reserva, aplicar_reservas
+import mysql.connector
+
+class ResultadoReserva:
+    """Resultado detallado de un intento de reserva (además del clásico 'exito, mensaje')."""
+
+    # Motivos posibles cuando la reserva no se pudo hacer
+    OK = 'ok'
+    SIN_CUPOS = 'sin_cupos'
+    NO_ENCONTRADO = 'no_encontrado'
+    SIN_CONEXION = 'sin_conexion'
+    ERROR_BD = 'error_bd'
+    DATOS_INVALIDOS = 'datos_invalidos'
+    CANCELADA = 'cancelada'  # En un lote 'todo o nada', otra reserva del lote falló y esta no se guardó
+
+    def __init__(self, exito, motivo, mensaje, reserva_id=None, paquete_id=None, cantidad=0, cupos_restantes=None, destino_id=None,
+                 nombre=None):
+        self.exito = exito
+        self.motivo = motivo
+        self.mensaje = mensaje
+        self.reserva_id = reserva_id
+        self.paquete_id = paquete_id
+        self.destino_id = destino_id
+        self.cantidad = cantidad
+        self.cupos_restantes = cupos_restantes
+        self.nombre = nombre  # Nombre del paquete o destino reservado (lo informan las reservas sueltas)
+
+    def __iter__(self):
+        # Permite seguir escribiendo: exito, mensaje = motor.reservar_paquete(...)
+        return iter((self.exito, self.mensaje))
+
+    def como_dict(self):
+        return {
+            'exito': self.exito, 'motivo': self.motivo, 'mensaje': self.mensaje, 'reserva_id': self.reserva_id,
+            'paquete_id': self.paquete_id, 'destino_id': self.destino_id, 'cantidad': self.cantidad,
+            'cupos_restantes': self.cupos_restantes, 'nombre': self.nombre,
+        }
+
+    def __repr__(self):
+        return f"ResultadoReserva(exito={self.exito}, motivo={self.motivo!r}, reserva_id={self.reserva_id}, cupos_restantes={self.cupos_restantes})"
+
+
+class MotorReservas:
+    """
+    Único lugar donde se reservan cupos de un paquete. En vez de leer los cupos, comprobarlos y
+    luego restarlos (lo que permite vender de más si dos personas reservan a la vez), hacemos
+    la comprobación y la resta en una sola sentencia:
+
+        UPDATE paquetes SET cupos = cupos - n WHERE id = ? AND cupos >= n
+
+    Si la fila no cambia, es que no había cupos suficientes. El bloqueo de la fila dura solo
+    lo que tarda guardar la reserva y confirmar. Los destinos siguen la misma idea, pero con un
+    inventario de lugares por día (ver inventario_destinos.py).
+    """
+
+    def reservar_paquete(self, usuario_id, paquete_id, cantidad, fecha_reserva=None):
+        """
+        Resta los cupos y guarda la reserva en una misma transacción.
+        Si no se indica 'fecha_reserva', se usa la fecha de inicio del paquete.
+        """
+        conn = crear_conexion(ESCRITURA)
+        if not conn:
+            return ResultadoReserva(False, ResultadoReserva.SIN_CONEXION, "Error de conexión a la base de datos.", paquete_id=paquete_id, cantidad=cantidad)
+        cursor = conn.cursor()
+        try:
+            # 1. Comprobar y restar a la vez. LAST_INSERT_ID(expr) nos devuelve los cupos que quedan
+            #    en la misma respuesta del UPDATE, sin tener que volver a consultarlos.
+            cursor.execute(
+                "UPDATE paquetes SET cupos = LAST_INSERT_ID(cupos - %s) WHERE id = %s AND cupos >= %s",
+                (cantidad, paquete_id, cantidad)
+            )
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return self._motivo_rechazo(cursor, paquete_id, cantidad)
+            cupos_restantes = cursor.lastrowid or 0
+
+            # 2. Guardar la reserva (la fecha por defecto sale del propio paquete, que ya tenemos bloqueado)
+            #    junto con el precio por persona de este momento (ya calculado en 'paquetes.precio').
+            cursor.execute(
+                """
+                INSERT INTO reservas (usuario_id, paquete_id, fecha_reserva, cantidad_personas, precio_unitario)
+                SELECT %s, id, COALESCE(%s, fecha_inicio), %s, precio FROM paquetes WHERE id = %s
+                """,
+                (usuario_id, fecha_reserva, cantidad, paquete_id)
+            )
+            reserva_id = cursor.lastrowid
+            # 3. Dejarla pendiente de sumar a los resúmenes: una fila nueva, sin filas disputadas (de paso trae el nombre del paquete).
+            nombre = aplicar_reserva(cursor, reserva_id, +1)
+            conn.commit()
+            return ResultadoReserva(True, ResultadoReserva.OK, "Reserva creada exitosamente.",
+                                    reserva_id=reserva_id, paquete_id=paquete_id, cantidad=cantidad,
+                                    cupos_restantes=cupos_restantes, nombre=nombre)
+        except mysql.connector.Error as e:
+            print(f"Error en la transacción de reserva: {e}")
+            conn.rollback()
+            return ResultadoReserva(False, ResultadoReserva.ERROR_BD, "Error al procesar la transacción de la reserva.", paquete_id=paquete_id, cantidad=cantidad)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def reservar_destino(self, usuario_id, destino_id, fecha_reserva, cantidad, noches=1):
+        """
+        Ocupa 'cantidad' lugares del destino en cada día de la estadía (de 'fecha_reserva' y 'noches' noches)
+        y guarda la reserva en una misma transacción: o alcanzan los lugares de todos los días o no se reserva nada.
+        """
+        conn = crear_conexion(ESCRITURA)
+        if not conn:
+            return ResultadoReserva(False, ResultadoReserva.SIN_CONEXION, "Error de conexión a la base de datos.", destino_id=destino_id, cantidad=cantidad)
+        cursor = conn.cursor()
+        try:
+            # 1. Precio por persona de este momento (una lectura sin bloqueo: el destino no se toca).
+            cursor.execute("SELECT costo FROM destinos WHERE id = %s", (destino_id,))
+            fila = cursor.fetchone()
+            if fila is None:
+                conn.rollback()
+                return ResultadoReserva(False, ResultadoReserva.NO_ENCONTRADO, "Destino no encontrado.", destino_id=destino_id, cantidad=cantidad)
+            costo = fila[0]
+            # 2. Crear los días que todavía no están en el inventario, en su propia transacción corta.
+            abrir_fechas(cursor, destino_id, fecha_reserva, noches)
+            conn.commit()
+
+            # 3. Comprobar y restar los lugares de todos los días a la vez.
+            if not ocupar(cursor, destino_id, fecha_reserva, noches, cantidad):
+                conn.rollback()
+                return ResultadoReserva(False, ResultadoReserva.SIN_CUPOS,
+                                        "No quedan lugares suficientes en todas las fechas de la estadía.",
+                                        destino_id=destino_id, cantidad=cantidad)
+
+            # 4. Guardar la reserva y sumarla a los resúmenes de los reportes.
+            cursor.execute(
+                "INSERT INTO reservas (usuario_id, destino_id, fecha_reserva, cantidad_personas, precio_unitario, noches) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                (usuario_id, destino_id, fecha_reserva, cantidad, costo, noches)
+            )
+            reserva_id = cursor.lastrowid
+            nombre = aplicar_reserva(cursor, reserva_id, +1)
+            conn.commit()
+            return ResultadoReserva(True, ResultadoReserva.OK, "Reserva de destino creada exitosamente.",
+                                    reserva_id=reserva_id, destino_id=destino_id, cantidad=cantidad, nombre=nombre)
+        except mysql.connector.Error as e:
+            print(f"Error en la transacción de reserva de destino: {e}")
+            conn.rollback()
+            return ResultadoReserva(False, ResultadoReserva.ERROR_BD, "Error al procesar la transacción de la reserva.", destino_id=destino_id, cantidad=cantidad)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def reservar_lote(self, reservas, todo_o_nada=False):
+        """
+        Guarda muchas reservas (de paquetes y/o destinos, ya validadas) en una sola transacción,
+        por ejemplo el manifiesto de un grupo. Devuelve un ResultadoReserva por reserva, en el mismo orden.
+
+        - Los paquetes del lote se bloquean una sola vez (en orden de id, para no provocar bloqueos
+          cruzados con otros lotes) y los cupos se reparten en orden entre las reservas del lote.
+        - Los cupos se restan con un único UPDATE y las reservas se guardan con un único INSERT de varias filas.
+        - Los lugares de los destinos se ocupan reserva por reserva (en orden de destino y fecha), cada una
+          con su SAVEPOINT: si a una no le alcanzan, se deshace solo esa.
+        - Con todo_o_nada=True, si alguna reserva no se puede hacer no se guarda ninguna.
+        """
+        if not reservas:
+            return []
+        conn = crear_conexion(ESCRITURA)
+        if not conn:
+            return [self._rechazo(r, ResultadoReserva.SIN_CONEXION, "Error de conexión a la base de datos.") for r in reservas]
+        cursor = conn.cursor()
+        try:
+            paquete_ids = sorted({r.paquete_id for r in reservas if r.paquete_id is not None})
+            destino_ids = sorted({r.destino_id for r in reservas if r.destino_id is not None})
+            # Los días que faltan en el inventario se crean antes, en su propia transacción (ver reservar_destino).
+            for destino_id, fecha, noches in sorted({(r.destino_id, r.fecha_reserva, r.noches) for r in reservas if r.destino_id is not None}):
+                abrir_fechas(cursor, destino_id, fecha, noches)
+            conn.commit()
+            # Con una foto consistente desde el principio, las reservas que otros guarden mientras tanto no se
+            # ven en esta transacción (hace falta para reconocer las nuestras en el paso 4).
+            conn.start_transaction(consistent_snapshot=True)
+            paquetes = {}
+            if paquete_ids:
+                cursor.execute(
+                    f"SELECT id, cupos, fecha_inicio, precio FROM paquetes WHERE id IN ({', '.join(['%s'] * len(paquete_ids))}) "
+                    f"ORDER BY id FOR UPDATE",
+                    paquete_ids
+                )
+                paquetes = {fila[0]: list(fila[1:]) for fila in cursor.fetchall()}
+            costos = {}
+            if destino_ids:
+                cursor.execute(f"SELECT id, costo FROM destinos WHERE id IN ({', '.join(['%s'] * len(destino_ids))})", destino_ids)
+                costos = dict(cursor.fetchall())
+
+            # 1. Repartir los cupos en memoria (las filas de los paquetes ya están bloqueadas)
+            resultados = []
+            filas = []       # (usuario_id, paquete_id, destino_id, fecha_reserva, cantidad_personas, precio_unitario, noches)
+            aceptadas = []   # Posición de cada fila en 'resultados'
+            for r in reservas:
+                if r.paquete_id is not None:
+                    paquete = paquetes.get(r.paquete_id)
+                    if paquete is None:
+                        resultados.append(self._rechazo(r, ResultadoReserva.NO_ENCONTRADO, "Paquete no encontrado."))
+                        continue
+                    cupos, fecha_inicio, precio = paquete
+                    if cupos < r.cantidad_personas:
+                        resultados.append(self._rechazo(r, ResultadoReserva.SIN_CUPOS, "No hay suficientes cupos disponibles.", cupos_restantes=cupos))
+                        continue
+                    paquete[0] = cupos - r.cantidad_personas
+                    fila = (r.usuario_id, r.paquete_id, None, r.fecha_reserva or fecha_inicio, r.cantidad_personas, precio, None)
+                else:
+                    if r.destino_id not in costos:
+                        resultados.append(self._rechazo(r, ResultadoReserva.NO_ENCONTRADO, "Destino no encontrado."))
+                        continue
+                    fila = (r.usuario_id, None, r.destino_id, r.fecha_reserva, r.cantidad_personas, costos[r.destino_id], r.noches)
+                aceptadas.append(len(resultados))
+                filas.append(fila)
+                resultados.append(None)
+
+            # 2. Ocupar los lugares de los destinos. Siempre en el mismo orden (destino y fecha), para que dos
+            #    lotes que comparten días no se bloqueen mutuamente.
+            rechazadas = set()
+            por_destino = sorted((j for j, f in enumerate(filas) if f[2] is not None), key=lambda j: (filas[j][2], filas[j][3]))
+            for j in por_destino:
+                _, _, destino_id, fecha, personas, _, noches = filas[j]
+                cursor.execute("SAVEPOINT reserva_destino")
+                if not ocupar(cursor, destino_id, fecha, noches, personas):
+                    cursor.execute("ROLLBACK TO SAVEPOINT reserva_destino")
+                    rechazadas.add(j)
+            if rechazadas:
+                for j in sorted(rechazadas):
+                    resultados[aceptadas[j]] = self._rechazo(reservas[aceptadas[j]], ResultadoReserva.SIN_CUPOS,
+                                                             "No quedan lugares suficientes en todas las fechas de la estadía.")
+                aceptadas = [i for j, i in enumerate(aceptadas) if j not in rechazadas]
+                filas = [f for j, f in enumerate(filas) if j not in rechazadas]
+
+            if not filas or (todo_o_nada and len(filas) < len(reservas)):
+                conn.rollback()
+                for i in aceptadas:
+                    resultados[i] = self._rechazo(reservas[i], ResultadoReserva.CANCELADA,
+                                                  "No se guardó: otra reserva del lote no se pudo hacer.")
+                return resultados
+
+            # 3. Restar los cupos de todos los paquetes con un solo UPDATE
+            restantes = {pid: p[0] for pid, p in paquetes.items()}
+            usados = {pid: restantes[pid] for pid in sorted({f[1] for f in filas if f[1] is not None})}
+            if usados:
+                casos = " ".join(["WHEN %s THEN %s"] * len(usados))
+                cursor.execute(
+                    f"UPDATE paquetes SET cupos = CASE id {casos} END WHERE id IN ({', '.join(['%s'] * len(usados))})",
+                    [v for par in usados.items() for v in par] + list(usados)
+                )
+
+            # 4. Guardar todas las reservas con un INSERT de varias filas y leer sus ids. Los ids de un mismo
+            #    INSERT crecen en el orden de las filas, pero no siempre quedan seguidos (con
+            #    innodb_autoinc_lock_mode = 2, el de MySQL 8, se intercalan con los de otras conexiones).
+            #    lastrowid es el de la primera fila y, gracias a la foto consistente, las filas de otros con ids
+            #    mayores no se ven: las reservas con id >= lastrowid son justo las de este lote, en orden.
+            cursor.execute(
+                f"INSERT INTO reservas (usuario_id, paquete_id, destino_id, fecha_reserva, cantidad_personas, precio_unitario, noches) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(filas))}",
+                [v for fila in filas for v in fila]
+            )
+            usuarios = sorted({f[0] for f in filas})
+            cursor.execute(
+                f"SELECT id FROM reservas WHERE id >= %s AND usuario_id IN ({', '.join(['%s'] * len(usuarios))}) "
+                f"ORDER BY id LIMIT %s",
+                (cursor.lastrowid, *usuarios, len(filas))
+            )
+            reserva_ids = [fila[0] for fila in cursor.fetchall()]
+            if len(reserva_ids) != len(filas):
+                raise mysql.connector.Error("No se pudieron leer los ids de las reservas del lote.")
+
+            # 5. Resúmenes de los reportes: una sola fila pendiente por grupo para todo el lote
+            aplicar_reservas(cursor, reserva_ids, +1)
+            conn.commit()
+
+            for i, reserva_id in zip(aceptadas, reserva_ids):
+                r = reservas[i]
+                r.id = reserva_id
+                resultados[i] = ResultadoReserva(True, ResultadoReserva.OK, "Reserva creada exitosamente.",
+                                                 reserva_id=reserva_id, paquete_id=r.paquete_id, destino_id=r.destino_id,
+                                                 cantidad=r.cantidad_personas,
+                                                 cupos_restantes=restantes.get(r.paquete_id))
+            return resultados
+        except mysql.connector.Error as e:
+            print(f"Error en la transacción del lote de reservas: {e}")
+            conn.rollback()
+            return [self._rechazo(r, ResultadoReserva.ERROR_BD, "Error al procesar la transacción del lote.") for r in reservas]
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def _rechazo(reserva, motivo, mensaje, cupos_restantes=None):
+        return ResultadoReserva(False, motivo, mensaje, paquete_id=reserva.paquete_id, destino_id=reserva.destino_id,
+                                cantidad=reserva.cantidad_personas, cupos_restantes=cupos_restantes)
+
+    def _motivo_rechazo(self, cursor, paquete_id, cantidad):
+        """Averigua (sin bloquear nada) por qué no se pudo restar: el paquete no existe o no le quedan cupos."""
+        cursor.execute("SELECT cupos FROM paquetes WHERE id = %s", (paquete_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return ResultadoReserva(False, ResultadoReserva.NO_ENCONTRADO, "Paquete no encontrado.", paquete_id=paquete_id, cantidad=cantidad)
+        return ResultadoReserva(False, ResultadoReserva.SIN_CUPOS, "No hay suficientes cupos disponibles.",
+                                paquete_id=paquete_id, cantidad=cantidad, cupos_restantes=row[0])
+
+motor_reservas = MotorReservas()
@@ -1,21 +1,16 @@
-from database import crear_conexion
+from database import crear_conexion, LECTURA, LECTURA_FRESCA
 from mysql.connector import Error
 from modelos.paquete import Paquete
 
 class PaquetesRepository:
     def obtener_todos(self):
-        conexion = crear_conexion()
+        conexion = crear_conexion(LECTURA)
         if not conexion: return []
-        cursor = conexion.cursor(dictionary=True)
-        lista_paquetes = []
+        # Cursor de tuplas: las filas pasan directo al modelo, sin armar un diccionario por fila
+        cursor = conexion.cursor()
         try:
-            cursor.execute("SELECT * FROM paquetes")
-            result = cursor.fetchall()
-            for row in result:
-                lista_paquetes.append(Paquete(
-                    row['id'], row['nombre'], row['fecha_inicio'], row['fecha_fin'], row['cupos'], row['costo'], row['descripcion']
-                ))
-            return lista_paquetes
+            cursor.execute(f"SELECT {Paquete.COLUMNAS} FROM paquetes")
+            return Paquete.desde_filas(cursor.fetchall())
         except Error as e:
             print(f"Error al obtener paquetes: {e}")
             return []
@@ -23,19 +18,47 @@ class PaquetesRepository:
             cursor.close()
             conexion.close()
 
+    def obtener_cupos(self):
+        """Solo (id, cupos) de cada paquete: lo que cambia con las reservas, sin volver a leer el catálogo entero."""
+        conexion = crear_conexion(LECTURA)
+        if not conexion: return []
+        cursor = conexion.cursor()
+        try:
+            cursor.execute("SELECT id, cupos FROM paquetes")
+            return cursor.fetchall()
+        except Error as e:
+            print(f"Error al obtener cupos de paquetes: {e}")
+            return []
+        finally:
+            cursor.close()
+            conexion.close()
+
     def obtener_por_id(self, id):
-        conexion = crear_conexion()
+        conexion = crear_conexion(LECTURA_FRESCA)  # Cupos al día (se consultan justo antes de reservar)
         if not conexion: return None
-        cursor = conexion.cursor(dictionary=True)
+        cursor = conexion.cursor()
         try:
-            cursor.execute("SELECT * FROM paquetes WHERE id = %s", (id,))
+            cursor.execute(f"SELECT {Paquete.COLUMNAS} FROM paquetes WHERE id = %s", (id,))
             row = cursor.fetchone()
-            if row:
-                return Paquete(row['id'], row['nombre'], row['fecha_inicio'], row['fecha_fin'], row['cupos'], row['costo'], row['descripcion'])
-            return None
+            return Paquete.desde_fila(row) if row else None
         except Error as e:
             print(f"Error al obtener paquete: {e}")
             return None
         finally:
             cursor.close()
-            conexion.close()
\ No newline at end of file
+            conexion.close()
+
+    def obtener_proximos(self, desde, limite=50):
+        """Paquetes que salen a partir de la fecha 'desde', del más cercano al más lejano (usa idx_paquetes_fecha_inicio)."""
+        conexion = crear_conexion(LECTURA)
+        if not conexion: return []
+        cursor = conexion.cursor()
+        try:
+            cursor.execute(f"SELECT {Paquete.COLUMNAS} FROM paquetes WHERE fecha_inicio >= %s ORDER BY fecha_inicio LIMIT %s", (desde, limite))
+            return Paquete.desde_filas(cursor.fetchall())
+        except Error as e:
+            print(f"Error al obtener próximos paquetes: {e}")
+            return []
+        finally:
+            cursor.close()
+            conexion.close()
@@ -0,0 +1,91 @@
+# persistencia/precios_paquetes.py
+"""
+Precio de los paquetes guardado (materializado) en la propia tabla 'paquetes':
+
+  * costo_destinos:    suma del costo de sus destinos.
+  * destinos_nombres:  nombres de sus destinos, separados por coma (para los listados).
+  * precio:            lo que se cobra por persona. Es una columna calculada por MySQL:
+                       'costo' si el paquete tiene un precio propio, y si no, 'costo_destinos'.
+
+Así los listados ya no tienen que sumar los destinos en cada consulta, y el precio que se muestra
+es siempre el mismo que se cobra al reservar. Las dos primeras columnas se recalculan aquí cada vez que
+cambian los destinos de un paquete o el costo/nombre de un destino (ver api.py y el importador).
+"""
+from database import crear_conexion, ESCRITURA
+import mysql.connector
+
+def _marcadores(cantidad):
+    return ", ".join(["%s"] * cantidad)
+
+def recalcular_precios(cursor, paquete_ids=None):
+    """
+    Recalcula costo_destinos y destinos_nombres de los paquetes indicados (o de todos si es None),
+    dentro de la transacción del cursor.
+    """
+    if paquete_ids is not None:
+        paquete_ids = list(paquete_ids)
+        if not paquete_ids:
+            return
+        filtro_interno = f"WHERE pd.paquete_id IN ({_marcadores(len(paquete_ids))})"
+        filtro = f"WHERE p.id IN ({_marcadores(len(paquete_ids))})"
+        parametros = paquete_ids * 2
+    else:
+        filtro_interno = filtro = ""
+        parametros = []
+    cursor.execute(
+        f"""
+        UPDATE paquetes p
+        LEFT JOIN (
+            SELECT pd.paquete_id, SUM(d.costo) AS suma,
+                   GROUP_CONCAT(d.nombre ORDER BY d.nombre SEPARATOR ', ') AS nombres
+            FROM paquete_destinos pd
+            JOIN destinos d ON d.id = pd.destino_id
+            {filtro_interno}
+            GROUP BY pd.paquete_id
+        ) x ON x.paquete_id = p.id
+        SET p.costo_destinos = COALESCE(x.suma, 0), p.destinos_nombres = x.nombres
+        {filtro}
+        """,
+        parametros
+    )
+
+def paquetes_con_destinos(cursor, destino_ids):
+    """Ids de los paquetes que incluyen alguno de los destinos indicados."""
+    destino_ids = list(destino_ids)
+    if not destino_ids:
+        return []
+    cursor.execute(
+        f"SELECT DISTINCT paquete_id FROM paquete_destinos WHERE destino_id IN ({_marcadores(len(destino_ids))})",
+        destino_ids
+    )
+    return [fila[0] for fila in cursor.fetchall()]
+
+def recalcular_por_destinos(cursor, destino_ids):
+    """Tras cambiar el costo o el nombre de unos destinos, recalcula solo los paquetes que los incluyen."""
+    recalcular_precios(cursor, paquetes_con_destinos(cursor, destino_ids))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mantenimiento de los precios guardados de los paquetes.")
+    parser.add_argument('--recalcular', action='store_true', help="Recalcula el precio de todos los paquetes")
+    args = parser.parse_args()
+
+    if args.recalcular:
+        conn = crear_conexion(ESCRITURA)
+        if not conn:
+            raise SystemExit("Sin conexión a la base de datos.")
+        cursor = conn.cursor()
+        try:
+            recalcular_precios(cursor)
+            conn.commit()
+            print(f"Precios recalculados ({cursor.rowcount} paquetes cambiaron).")
+        except mysql.connector.Error as e:
+            conn.rollback()
+            print(f"Error al recalcular los precios: {e}")
+        finally:
+            cursor.close()
+            conn.close()
+    else:
+        parser.print_help()
@@ -1,106 +1,242 @@
 # persistencia/reservas_repo.py
-from database import crear_conexion
+from database import crear_conexion, ESCRITURA, LECTURA, LECTURA_FRESCA
 from modelos.reserva import Reserva # Si ya lo movimos
+from persistencia.inventario_destinos import ocupar, liberar
+from persistencia.motor_reservas import motor_reservas
+from persistencia.resumenes_repo import aplicar_reserva
+from persistencia.usuarios_repo import ids_por_correo
 import mysql.connector
 
+# Se usa el precio por persona guardado al reservar. Si falta, el precio actual: el del destino o
+# 'paquetes.precio' (su costo propio o, si quedó en 0, la suma de sus destinos; ver precios_paquetes.py).
+COSTO_TOTAL_SQL = """
+    COALESCE(r.precio_unitario, d.costo, p.precio, 0) * r.cantidad_personas
+"""
+
+# Historial de un usuario. Usamos LEFT JOIN para traer el nombre ya sea de un destino o de un paquete.
+# (La misma consulta la usa el exportador a CSV.)
+CONSULTA_HISTORIAL = f"""
+    SELECT r.id, r.destino_id, r.paquete_id,
+           COALESCE(d.nombre, p.nombre, 'Desconocido') as nombre_item,
+           r.fecha_reserva, 
+           r.cantidad_personas,
+           {COSTO_TOTAL_SQL} as costo_total
+    FROM reservas r
+    LEFT JOIN destinos d ON r.destino_id = d.id
+    LEFT JOIN paquetes p ON r.paquete_id = p.id
+    WHERE r.usuario_id = %s
+    ORDER BY r.fecha_reserva DESC
+"""
+
 class ReservasRepository:
     """Clase dedicada exclusivamente a interactuar con la tabla 'reservas' y 'paquetes' de MySQL."""
     
     def crear_reserva_paquete(self, reserva: Reserva):
         """
-        Implementa la lógica de la TRANSACCIÓN para verificar cupos y guardar la reserva.
+        Verifica cupos, los descuenta y guarda la reserva en una sola transacción.
+        El trabajo lo hace el MotorReservas, el mismo que usa PaquetesService.
         """
-        conn = crear_conexion()
-        if not conn:
-            return False, "Error de conexión a la base de datos."
-        cursor = conn.cursor()
-        
-        try:
-            conn.start_transaction()
-            paquete_id = reserva.paquete_id
-            
-            # 1. Mirar si quedan plazas (Lógica de Persistencia original)
-            cursor.execute("SELECT cupos FROM paquetes WHERE id = %s FOR UPDATE", (paquete_id,))
-            cupos_actuales = cursor.fetchone()[0]
+        resultado = motor_reservas.reservar_paquete(
+            reserva.usuario_id, reserva.paquete_id, reserva.cantidad_personas, fecha_reserva=reserva.fecha_reserva
+        )
+        if resultado.exito:
+            reserva.id = resultado.reserva_id
+        return resultado.exito, resultado.mensaje
 
-            # ⛔ NOTA: La validación de cupos se queda en el Servicio, pero la consulta se hace aquí.
-            # En este caso, para simplificar la transacción, mantenemos el SELECT y el UPDATE aquí.
-            
-            if cupos_actuales < reserva.cantidad_personas:
-                conn.rollback()
-                # 🛑 Devolvemos un mensaje de error específico para que la Capa de Negocio lo evalúe.
-                return False, "No hay suficientes cupos disponibles."
-
-            # 2. Restamos las plazas (UPDATE)
-            cursor.execute("UPDATE paquetes SET cupos = cupos - %s WHERE id = %s", 
-                           (reserva.cantidad_personas, paquete_id))
+    def crear_reservas_lote(self, reservas, todo_o_nada=False):
+        """
+        Guarda varias reservas (de paquetes y/o destinos) en una sola transacción con el MotorReservas.
+        Devuelve un ResultadoReserva por reserva, en el mismo orden.
+        """
+        return motor_reservas.reservar_lote(reservas, todo_o_nada=todo_o_nada)
 
-            # 3. Guardamos la reserva (INSERT)
-            query_reserva = """
-                INSERT INTO reservas 
-                (usuario_id, destino_id, paquete_id, fecha_reserva, cantidad_personas) 
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            datos = (reserva.usuario_id, reserva.destino_id, reserva.paquete_id, reserva.fecha_reserva, reserva.cantidad_personas)
-            cursor.execute(query_reserva, datos)
+    def crear_reserva_destino(self, reserva: Reserva):
+        """
+        Guarda una reserva de un destino individual, ocupando sus lugares en cada día de la estadía
+        (ver MotorReservas.reservar_destino).
+        """
+        resultado = motor_reservas.reservar_destino(
+            reserva.usuario_id, reserva.destino_id, reserva.fecha_reserva, reserva.cantidad_personas, noches=reserva.noches
+        )
+        if resultado.exito:
+            reserva.id = resultado.reserva_id
+        return resultado.exito, resultado.mensaje
 
+    def eliminar_reserva(self, reserva_id):
+        """
+        Elimina una reserva, la descuenta de los resúmenes y devuelve sus cupos (si era de un paquete)
+        o sus lugares en el inventario (si era de un destino). Todo en una sola transacción. Retorna (exito, mensaje).
+        """
+        conn = crear_conexion(ESCRITURA)
+        if not conn: return False, "Error de conexión."
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT paquete_id, destino_id, fecha_reserva, noches, cantidad_personas FROM reservas WHERE id = %s FOR UPDATE",
+                (reserva_id,)
+            )
+            fila = cursor.fetchone()
+            if fila is None:
+                conn.rollback()
+                return False, "La reserva no existe."
+            paquete_id, destino_id, fecha, noches, personas = fila
+            aplicar_reserva(cursor, reserva_id, -1)
+            if paquete_id is not None:
+                cursor.execute("UPDATE paquetes SET cupos = cupos + %s WHERE id = %s", (personas, paquete_id))
+            elif destino_id is not None:
+                liberar(cursor, destino_id, fecha, noches or 1, personas)
+            cursor.execute("DELETE FROM reservas WHERE id = %s", (reserva_id,))
             conn.commit()
-            return True, "Reserva creada exitosamente."
-            
+            return True, "Reserva eliminada."
         except mysql.connector.Error as e:
-            print(f"Error en la transacción de reserva: {e}")
+            print(f"Error al eliminar reserva: {e}")
             conn.rollback()
-            return False, "Error al procesar la transacción de la reserva."
+            return False, f"Error al eliminar: {e}"
         finally:
             cursor.close()
             conn.close()
 
-    def crear_reserva_destino(self, reserva: Reserva):
-        """Guarda una reserva de un destino individual."""
-        conn = crear_conexion()
+    def actualizar_cantidad_personas(self, reserva_id, nueva_cantidad):
+        """
+        Cambia la cantidad de personas de una reserva manteniendo al día los resúmenes y los cupos del
+        paquete o los lugares del destino (solo se permite aumentar si alcanzan). Retorna (exito, mensaje).
+        """
+        conn = crear_conexion(ESCRITURA)
         if not conn: return False, "Error de conexión."
         cursor = conn.cursor()
         try:
-            query = """
-                INSERT INTO reservas 
-                (usuario_id, destino_id, fecha_reserva, cantidad_personas) 
-                VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(query, (reserva.usuario_id, reserva.destino_id, reserva.fecha_reserva, reserva.cantidad_personas))
+            cursor.execute(
+                "SELECT paquete_id, destino_id, fecha_reserva, noches, cantidad_personas FROM reservas WHERE id = %s FOR UPDATE",
+                (reserva_id,)
+            )
+            fila = cursor.fetchone()
+            if fila is None:
+                conn.rollback()
+                return False, "La reserva no existe."
+            paquete_id, destino_id, fecha, noches, actual = fila
+            diferencia = nueva_cantidad - actual
+            if paquete_id is not None and diferencia:
+                # Misma idea que el motor de reservas: comprobar y restar en una sola sentencia.
+                cursor.execute(
+                    "UPDATE paquetes SET cupos = cupos - %s WHERE id = %s AND cupos >= %s",
+                    (diferencia, paquete_id, diferencia)
+                )
+                if cursor.rowcount == 0:
+                    conn.rollback()
+                    return False, "No hay suficientes cupos disponibles en el paquete."
+            elif destino_id is not None and diferencia > 0:
+                if not ocupar(cursor, destino_id, fecha, noches or 1, diferencia):
+                    conn.rollback()
+                    return False, "No quedan lugares suficientes en todas las fechas de la estadía."
+            elif destino_id is not None and diferencia < 0:
+                liberar(cursor, destino_id, fecha, noches or 1, -diferencia)
+            aplicar_reserva(cursor, reserva_id, -1)
+            cursor.execute("UPDATE reservas SET cantidad_personas = %s WHERE id = %s", (nueva_cantidad, reserva_id))
+            aplicar_reserva(cursor, reserva_id, +1)
             conn.commit()
-            return True, "Reserva de destino creada exitosamente."
-        except Exception as e:
-            print(f"Error al crear reserva de destino: {e}")
-            return False, f"Error al guardar reserva: {e}"
+            return True, "Reserva actualizada."
+        except mysql.connector.Error as e:
+            print(f"Error al actualizar reserva: {e}")
+            conn.rollback()
+            return False, f"Error al actualizar: {e}"
         finally:
             cursor.close()
             conn.close()
 
-    def obtener_reservas_por_usuario(self, usuario_id):
-        """Obtiene el historial de reservas de un usuario con detalles."""
-        conn = crear_conexion()
+    def obtener_reservas_por_usuario(self, usuario_id, al_dia=False):
+        """
+        Obtiene el historial de reservas de un usuario con detalles y el costo total ya calculado
+        (tanto para destinos como para paquetes), todo en una sola consulta.
+        Con al_dia=True se lee de la base principal, para que aparezcan las reservas recién hechas aunque la
+        escritura la haya hecho otro proceso (por ejemplo, otro trabajador de servidor_http.py).
+        """
+        conn = crear_conexion(LECTURA_FRESCA if al_dia else LECTURA)
         if not conn: return []
         cursor = conn.cursor(dictionary=True)
         try:
-            # Usamos LEFT JOIN para traer el nombre ya sea de un destino o de un paquete
+            cursor.execute(CONSULTA_HISTORIAL, (usuario_id,))
+            return cursor.fetchall()
+        except mysql.connector.Error as e:
+            print(f"Error al obtener historial: {e}")
+            return []
+        finally:
+            cursor.close()
+            conn.close()
+
+    def obtener_reservas_admin(self, antes_de_id=None, limite=200, filtro_correo=None):
+        """
+        Devuelve una 'página' de reservas para el panel de administración, de la más nueva a la más antigua.
+        Para pedir la siguiente página se pasa el id de la última fila recibida en 'antes_de_id'
+        (paginación por clave: MySQL salta directo a ese id en vez de contar y descartar filas con OFFSET).
+
+        Con 'filtro_correo' primero se buscan los usuarios con ese correo en su índice (prefijo, o dominio si
+        empieza con '@'; ver usuarios_repo.condicion_correo) y luego sus reservas por 'usuario_id', en vez de
+        comparar el correo de cada reserva con un LIKE '%...%'.
+        """
+        conn = crear_conexion(LECTURA)
+        if not conn: return []
+        cursor = conn.cursor()
+        try:
+            usuario_ids = None
+            if filtro_correo and filtro_correo.strip():
+                usuario_ids = ids_por_correo(cursor, filtro_correo)
+                if not usuario_ids:
+                    return []
             query = """
-                SELECT r.id, 
-                       COALESCE(d.nombre, p.nombre, 'Desconocido') as nombre_item,
-                       r.fecha_reserva, 
-                       r.cantidad_personas,
-                       COALESCE(d.costo * r.cantidad_personas, 0) as costo_total
+                SELECT r.id, u.correo, 
+                       COALESCE(d.nombre, p.nombre) as item,
+                       CASE WHEN r.destino_id IS NOT NULL THEN 'Destino' ELSE 'Paquete' END as tipo,
+                       r.fecha_reserva, r.cantidad_personas, r.fecha_creacion
                 FROM reservas r
+                JOIN usuarios u ON r.usuario_id = u.id
                 LEFT JOIN destinos d ON r.destino_id = d.id
                 LEFT JOIN paquetes p ON r.paquete_id = p.id
-                WHERE r.usuario_id = %s
-                ORDER BY r.fecha_reserva DESC
             """
-            cursor.execute(query, (usuario_id,))
+            condiciones, params = [], []
+            if antes_de_id is not None:
+                condiciones.append("r.id < %s")
+                params.append(antes_de_id)
+            if usuario_ids is not None:
+                condiciones.append(f"r.usuario_id IN ({', '.join(['%s'] * len(usuario_ids))})")
+                params.extend(usuario_ids)
+            if condiciones:
+                query += " WHERE " + " AND ".join(condiciones)
+            query += " ORDER BY r.id DESC LIMIT %s"
+            params.append(limite)
+
+            cursor.execute(query, tuple(params))
             return cursor.fetchall()
         except mysql.connector.Error as e:
-            print(f"Error al obtener historial: {e}")
+            print(f"Error al obtener reservas (admin): {e}")
+            return []
+        finally:
+            cursor.close()
+            conn.close()
+
+    def pares_usuario_destino(self, desde_id=0):
+        """
+        Qué usuario reservó qué destino, para las recomendaciones de 'también reservaron'
+        (ver servicio_negocio/recomendador_destinos.py). Una reserva de paquete cuenta para cada destino del paquete.
+        Devuelve una lista de (reserva_id, usuario_id, destino_id) con las reservas de id mayor a 'desde_id',
+        así quien ya tiene las anteriores pide solo las nuevas.
+        """
+        conn = crear_conexion(LECTURA)
+        if not conn: return []
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                """
+                SELECT r.id, r.usuario_id, COALESCE(r.destino_id, pd.destino_id)
+                FROM reservas r
+                LEFT JOIN paquete_destinos pd ON r.destino_id IS NULL AND pd.paquete_id = r.paquete_id
+                WHERE r.id > %s AND (r.destino_id IS NOT NULL OR pd.destino_id IS NOT NULL)
+                """,
+                (desde_id,)
+            )
+            return cursor.fetchall()
+        except mysql.connector.Error as e:
+            print(f"Error al obtener los destinos reservados: {e}")
             return []
         finally:
             cursor.close()
             conn.close()
-# Además, mueva las funciones relacionadas con Paquetes y Destinos desde api.py aquí.
@@ -0,0 +1,318 @@
+# persistencia/resumenes_repo.py
+"""
+Tablas de resumen para los reportes de gestión:
+
+  * resumen_ocupacion_paquete:     reservas, personas e ingresos de cada paquete.
+  * resumen_ingresos_destino_mes:  reservas, personas e ingresos de cada destino por mes de viaje.
+  * resumen_reservas_dia:          reservas, personas e ingresos por día en que se hizo la reserva.
+
+En vez de recorrer toda la tabla 'reservas' cada vez que se abre un reporte, estos totales se
+actualizan 'de a poco' (sumando o restando). La transacción que crea, edita o elimina una reserva no
+toca los resúmenes: solo agrega una fila a 'resumen_pendientes' con lo que hay que sumar o restar.
+Así las reservas concurrentes no se pelean por la misma fila (la del día de hoy o la de un paquete
+muy vendido) mientras tienen bloqueado el paquete. Las filas pendientes se pasan a los resúmenes
+de a lotes (consolidar_pendientes): antes de cada reporte o con
+    python -m persistencia.resumenes_repo --consolidar
+Los reportes leen solo los resúmenes, así que tardan lo mismo con 100 o con 10 millones de reservas.
+
+Si alguna vez quedan desalineados (por ejemplo, tras cambios hechos a mano en la base), se recalculan con:
+    python -m persistencia.resumenes_repo --reconstruir
+"""
+from datetime import date, timedelta
+
+from database import crear_conexion, ESCRITURA, LECTURA
+import mysql.connector
+
+# Precio por persona de un paquete: el guardado en 'paquetes.costo' o, si es 0, la suma de sus destinos.
+PRECIO_PAQUETE_SQL = """
+    COALESCE(NULLIF(p.costo, 0), (
+        SELECT SUM(d2.costo)
+        FROM paquete_destinos pd
+        JOIN destinos d2 ON pd.destino_id = d2.id
+        WHERE pd.paquete_id = p.id
+    ), 0)
+"""
+
+def crear_tablas_resumen(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS resumen_ocupacion_paquete (
+        paquete_id INT PRIMARY KEY,
+        reservas INT NOT NULL DEFAULT 0,
+        personas INT NOT NULL DEFAULT 0,
+        ingresos BIGINT NOT NULL DEFAULT 0
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS resumen_ingresos_destino_mes (
+        destino_id INT NOT NULL,
+        mes DATE NOT NULL, -- Primer día del mes de viaje
+        reservas INT NOT NULL DEFAULT 0,
+        personas INT NOT NULL DEFAULT 0,
+        ingresos BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (destino_id, mes),
+        INDEX idx_resumen_ingresos_mes (mes)
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS resumen_reservas_dia (
+        dia DATE PRIMARY KEY, -- Día en que se hizo la reserva
+        reservas INT NOT NULL DEFAULT 0,
+        personas INT NOT NULL DEFAULT 0,
+        ingresos BIGINT NOT NULL DEFAULT 0
+    )
+    """)
+    # Solo se agregan filas al final (id creciente) y se borran de a lotes al consolidar: no hay filas disputadas.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS resumen_pendientes (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        paquete_id INT NULL,
+        destino_id INT NULL,
+        mes DATE NULL, -- Primer día del mes de viaje (solo reservas de destinos)
+        dia DATE NOT NULL, -- Día en que se hizo la reserva
+        reservas INT NOT NULL,
+        personas INT NOT NULL,
+        ingresos BIGINT NOT NULL
+    )
+    """)
+
+_SUMAR = "reservas = reservas + VALUES(reservas), personas = personas + VALUES(personas), ingresos = ingresos + VALUES(ingresos)"
+
+def aplicar_reserva(cursor, reserva_id, signo=1):
+    """
+    Suma (signo=1) o resta (signo=-1) una reserva en los tres resúmenes, dejándola en 'resumen_pendientes'
+    (una sola fila nueva, sin tocar las filas de los resúmenes). Debe llamarse dentro de la transacción
+    que la crea (después del INSERT), la edita (restar antes, sumar después) o la elimina (antes del DELETE).
+    Devuelve el nombre del destino o paquete reservado (así el motor lo informa sin otra consulta),
+    o None si la reserva no existe.
+    """
+    # Las subconsultas del nombre no bloquean nada: FOR UPDATE solo alcanza a la fila de 'reservas'.
+    cursor.execute(
+        "SELECT destino_id, paquete_id, fecha_reserva, cantidad_personas, COALESCE(precio_unitario, 0), DATE(fecha_creacion), "
+        "COALESCE((SELECT d.nombre FROM destinos d WHERE d.id = r.destino_id), (SELECT p.nombre FROM paquetes p WHERE p.id = r.paquete_id)) "
+        "FROM reservas r WHERE r.id = %s FOR UPDATE",
+        (reserva_id,)
+    )
+    fila = cursor.fetchone()
+    if fila is None:
+        return None
+    destino_id, paquete_id, fecha_reserva, personas, precio, dia, nombre = fila
+    cursor.execute(
+        "INSERT INTO resumen_pendientes (paquete_id, destino_id, mes, dia, reservas, personas, ingresos) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+        (paquete_id, destino_id, fecha_reserva.replace(day=1) if destino_id is not None else None,
+         dia or date.today(), signo, signo * personas, signo * personas * precio)
+    )
+    return nombre
+
+def aplicar_reservas(cursor, reserva_ids, signo=1):
+    """
+    Igual que aplicar_reserva(), pero para muchas reservas a la vez (por ejemplo, un lote de reservas
+    de grupo): una sola sentencia, con una fila pendiente por cada paquete o destino y mes, y día.
+    """
+    reserva_ids = list(reserva_ids)
+    if not reserva_ids:
+        return
+    marcadores = ", ".join(["%s"] * len(reserva_ids))
+    cursor.execute(
+        f"INSERT INTO resumen_pendientes (paquete_id, destino_id, mes, dia, reservas, personas, ingresos) "
+        f"SELECT paquete_id, destino_id, "
+        f"IF(destino_id IS NULL, NULL, DATE_SUB(fecha_reserva, INTERVAL DAYOFMONTH(fecha_reserva) - 1 DAY)) AS mes, "
+        f"DATE(fecha_creacion) AS dia, %s * COUNT(*), %s * SUM(cantidad_personas), "
+        f"%s * SUM(cantidad_personas * COALESCE(precio_unitario, 0)) "
+        f"FROM reservas WHERE id IN ({marcadores}) GROUP BY paquete_id, destino_id, mes, dia",
+        (signo, signo, signo, *reserva_ids)
+    )
+
+def consolidar_pendientes(cursor):
+    """
+    Pasa a los tres resúmenes todas las filas de 'resumen_pendientes' (tres sentencias para todo el lote)
+    y las borra. Debe ir en su propia transacción, corta; devuelve cuántas filas se consolidaron.
+    """
+    cursor.execute("SELECT MAX(id) FROM resumen_pendientes")
+    hasta = cursor.fetchone()[0]
+    if hasta is None:
+        return 0
+    # FOR UPDATE: si dos consolidaciones se cruzan, la segunda espera y ya no encuentra estas filas (no se suman dos veces).
+    cursor.execute("SELECT COUNT(*) FROM resumen_pendientes WHERE id <= %s FOR UPDATE", (hasta,))
+    filas = cursor.fetchone()[0]
+    if not filas:
+        return 0
+    totales = "SUM(reservas), SUM(personas), SUM(ingresos)"
+    cursor.execute(
+        f"INSERT INTO resumen_ocupacion_paquete (paquete_id, reservas, personas, ingresos) "
+        f"SELECT paquete_id, {totales} FROM resumen_pendientes WHERE id <= %s AND paquete_id IS NOT NULL "
+        f"GROUP BY paquete_id ON DUPLICATE KEY UPDATE {_SUMAR}",
+        (hasta,)
+    )
+    cursor.execute(
+        f"INSERT INTO resumen_ingresos_destino_mes (destino_id, mes, reservas, personas, ingresos) "
+        f"SELECT destino_id, mes, {totales} FROM resumen_pendientes WHERE id <= %s AND destino_id IS NOT NULL "
+        f"GROUP BY destino_id, mes ON DUPLICATE KEY UPDATE {_SUMAR}",
+        (hasta,)
+    )
+    cursor.execute(
+        f"INSERT INTO resumen_reservas_dia (dia, reservas, personas, ingresos) "
+        f"SELECT dia, {totales} FROM resumen_pendientes WHERE id <= %s "
+        f"GROUP BY dia ON DUPLICATE KEY UPDATE {_SUMAR}",
+        (hasta,)
+    )
+    cursor.execute("DELETE FROM resumen_pendientes WHERE id <= %s", (hasta,))
+    return filas
+
+def descontar_paquete(cursor, paquete_id):
+    """Antes de borrar un paquete (sus reservas se borran en cascada), quita sus reservas de los resúmenes."""
+    # Primero lo pendiente: si no, una fila del paquete consolidada después volvería a crear su resumen.
+    consolidar_pendientes(cursor)
+    cursor.execute(
+        """
+        UPDATE resumen_reservas_dia rd
+        JOIN (
+            SELECT DATE(fecha_creacion) AS dia, COUNT(*) AS reservas, SUM(cantidad_personas) AS personas,
+                   SUM(cantidad_personas * COALESCE(precio_unitario, 0)) AS ingresos
+            FROM reservas WHERE paquete_id = %s
+            GROUP BY DATE(fecha_creacion)
+        ) x ON rd.dia = x.dia
+        SET rd.reservas = rd.reservas - x.reservas, rd.personas = rd.personas - x.personas, rd.ingresos = rd.ingresos - x.ingresos
+        """,
+        (paquete_id,)
+    )
+    cursor.execute("DELETE FROM resumen_ocupacion_paquete WHERE paquete_id = %s", (paquete_id,))
+
+def reconstruir_resumenes(cursor):
+    """Recalcula los tres resúmenes desde cero a partir de la tabla de reservas (comando de respaldo)."""
+    # Las reservas anteriores a la columna 'precio_unitario' toman el precio actual.
+    cursor.execute("""
+        UPDATE reservas r JOIN destinos d ON r.destino_id = d.id
+        SET r.precio_unitario = d.costo WHERE r.precio_unitario IS NULL
+    """)
+    cursor.execute(f"""
+        UPDATE reservas r JOIN paquetes p ON r.paquete_id = p.id
+        SET r.precio_unitario = {PRECIO_PAQUETE_SQL} WHERE r.precio_unitario IS NULL
+    """)
+
+    cursor.execute("DELETE FROM resumen_pendientes")  # Ya quedan contadas al recalcular desde 'reservas'
+    cursor.execute("DELETE FROM resumen_ocupacion_paquete")
+    cursor.execute("""
+        INSERT INTO resumen_ocupacion_paquete (paquete_id, reservas, personas, ingresos)
+        SELECT paquete_id, COUNT(*), SUM(cantidad_personas), SUM(cantidad_personas * COALESCE(precio_unitario, 0))
+        FROM reservas WHERE paquete_id IS NOT NULL GROUP BY paquete_id
+    """)
+    cursor.execute("DELETE FROM resumen_ingresos_destino_mes")
+    cursor.execute("""
+        INSERT INTO resumen_ingresos_destino_mes (destino_id, mes, reservas, personas, ingresos)
+        SELECT destino_id, DATE_SUB(fecha_reserva, INTERVAL DAYOFMONTH(fecha_reserva) - 1 DAY) AS mes,
+               COUNT(*), SUM(cantidad_personas), SUM(cantidad_personas * COALESCE(precio_unitario, 0))
+        FROM reservas WHERE destino_id IS NOT NULL GROUP BY destino_id, mes
+    """)
+    cursor.execute("DELETE FROM resumen_reservas_dia")
+    cursor.execute("""
+        INSERT INTO resumen_reservas_dia (dia, reservas, personas, ingresos)
+        SELECT DATE(fecha_creacion) AS dia, COUNT(*), SUM(cantidad_personas), SUM(cantidad_personas * COALESCE(precio_unitario, 0))
+        FROM reservas GROUP BY dia
+    """)
+
+
+class ResumenesRepository:
+    """Lecturas para los reportes de gestión: solo consultan las tablas de resumen (y el catálogo por id)."""
+
+    def consolidar(self):
+        """Pasa las reservas pendientes a los resúmenes, en una transacción corta. Retorna cuántas filas pasó."""
+        conn = crear_conexion(ESCRITURA)
+        if not conn: return 0
+        cursor = conn.cursor()
+        try:
+            filas = consolidar_pendientes(cursor)
+            conn.commit()
+            return filas
+        except mysql.connector.Error as e:
+            print(f"Error al consolidar los resúmenes: {e}")
+            conn.rollback()
+            return 0
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _consultar(self, consulta, parametros=()):
+        self.consolidar()  # Así el reporte incluye las últimas reservas
+        conn = crear_conexion(LECTURA)
+        if not conn: return []
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(consulta, parametros)
+            return cursor.fetchall()
+        except mysql.connector.Error as e:
+            print(f"Error al obtener el reporte: {e}")
+            return []
+        finally:
+            cursor.close()
+            conn.close()
+
+    def ocupacion_paquetes(self):
+        """
+        Ocupación de cada paquete: personas reservadas sobre el total de plazas
+        (reservadas + cupos que quedan), de la más alta a la más baja.
+        """
+        return self._consultar("""
+            SELECT p.id, p.nombre, p.fecha_inicio,
+                   COALESCE(r.reservas, 0) AS reservas, COALESCE(r.personas, 0) AS personas, p.cupos AS cupos_libres,
+                   COALESCE(r.ingresos, 0) AS ingresos,
+                   ROUND(100 * COALESCE(r.personas, 0) / NULLIF(COALESCE(r.personas, 0) + p.cupos, 0), 1) AS ocupacion
+            FROM paquetes p
+            LEFT JOIN resumen_ocupacion_paquete r ON r.paquete_id = p.id
+            ORDER BY ocupacion DESC
+        """)
+
+    def ingresos_por_destino_mes(self, desde=None, hasta=None, destino_id=None):
+        """Ingresos por destino y mes de viaje entre 'desde' y 'hasta' (por defecto, los últimos 12 meses)."""
+        hasta = hasta or date.today()
+        desde = desde or (hasta.replace(day=1) - timedelta(days=365)).replace(day=1)
+        consulta = """
+            SELECT r.mes, r.destino_id, d.nombre, r.reservas, r.personas, r.ingresos
+            FROM resumen_ingresos_destino_mes r
+            JOIN destinos d ON d.id = r.destino_id
+            WHERE r.mes BETWEEN %s AND %s
+        """
+        parametros = [desde.replace(day=1), hasta]
+        if destino_id is not None:
+            consulta += " AND r.destino_id = %s"
+            parametros.append(destino_id)
+        consulta += " ORDER BY r.mes DESC, r.ingresos DESC"
+        return self._consultar(consulta, tuple(parametros))
+
+    def reservas_por_dia(self, desde=None, hasta=None):
+        """Reservas hechas por día entre 'desde' y 'hasta' (por defecto, los últimos 30 días)."""
+        hasta = hasta or date.today()
+        desde = desde or hasta - timedelta(days=30)
+        return self._consultar(
+            "SELECT dia, reservas, personas, ingresos FROM resumen_reservas_dia WHERE dia BETWEEN %s AND %s ORDER BY dia DESC",
+            (desde, hasta)
+        )
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mantenimiento de las tablas de resumen de reservas.")
+    parser.add_argument('--reconstruir', action='store_true', help="Recalcula los resúmenes desde la tabla de reservas")
+    parser.add_argument('--consolidar', action='store_true', help="Pasa a los resúmenes las reservas pendientes")
+    args = parser.parse_args()
+
+    if args.consolidar:
+        print(f"{ResumenesRepository().consolidar()} filas pendientes consolidadas.")
+    elif args.reconstruir:
+        conn = crear_conexion(ESCRITURA)
+        if not conn:
+            raise SystemExit("Sin conexión a la base de datos.")
+        cursor = conn.cursor()
+        try:
+            reconstruir_resumenes(cursor)
+            conn.commit()
+            print("Resúmenes reconstruidos.")
+        except mysql.connector.Error as e:
+            conn.rollback()
+            print(f"Error al reconstruir los resúmenes: {e}")
+        finally:
+            cursor.close()
+            conn.close()
+    else:
+        parser.print_help()
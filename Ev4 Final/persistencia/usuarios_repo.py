@@ -1,33 +1,52 @@
 # persistencia/usuarios_repo.py
-from database import crear_conexion
+from database import crear_conexion, ESCRITURA, LECTURA, LECTURA_FRESCA
 from modelos.usuario import Usuario
 import mysql.connector
 
+# Una búsqueda por correo mira como máximo esta cantidad de usuarios (los primeros en orden alfabético).
+# Con millones de usuarios, un término muy corto ('a') coincide con demasiados: conviene afinarlo.
+MAX_USUARIOS_BUSQUEDA = 1000
+
+def _escapar_like(texto):
+    # '%' y '_' son comodines de LIKE: si vienen en el término, se buscan tal cual.
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def condicion_correo(termino):
+    """
+    Condición SQL (y su parámetro) para buscar usuarios por correo usando siempre un índice:
+      * 'ana', 'ana.perez@' -> correos que EMPIEZAN con el término (índice de 'correo').
+      * '@empresa.com', '.cl' -> correos que TERMINAN con el término, es decir, los de ese dominio
+        (índice de 'correo_invertido': el sufijo del correo es un prefijo del correo invertido).
+    Un 'LIKE %término%' obligaría a MySQL a leer la tabla entera.
+    """
+    termino = termino.strip()
+    if termino.startswith(('@', '.')):
+        return "correo_invertido LIKE %s", _escapar_like(termino[::-1]) + '%'
+    return "correo LIKE %s", _escapar_like(termino) + '%'
+
+def ids_por_correo(cursor, termino, limite=MAX_USUARIOS_BUSQUEDA):
+    """Ids de los usuarios cuyo correo coincide con el término (ver condicion_correo), con el cursor dado."""
+    condicion, parametro = condicion_correo(termino)
+    columna = condicion.split()[0]  # Ordenar por la misma columna del índice evita ordenar aparte
+    cursor.execute(f"SELECT id FROM usuarios WHERE {condicion} ORDER BY {columna} LIMIT %s", (parametro, limite))
+    return [fila[0] for fila in cursor.fetchall()]
+
 class UsuarioRepository:
     """Maneja las operaciones CRUD de la tabla 'usuarios' de MySQL."""
 
     def obtener_usuario_por_username(self, username):
         """Busca y retorna un objeto Usuario por nombre de usuario."""
-        conn = crear_conexion()
+        conn = crear_conexion(LECTURA_FRESCA)  # Login y registro: un usuario recién creado o con contraseña nueva debe verse ya
         if not conn: return None
-        cursor = conn.cursor(dictionary=True) # dictionary=True permite obtener resultados como dict
+        cursor = conn.cursor() # Tuplas: la fila pasa directo al modelo sin armar un diccionario
         
         try:
-            query = "SELECT id, username, password_hash, nombre, apellido, correo FROM usuarios WHERE username = %s"
+            query = f"SELECT {Usuario.COLUMNAS} FROM usuarios WHERE username = %s"
             cursor.execute(query, (username,))
             data = cursor.fetchone()
             
-            if data:
-                # Retorna un objeto modelo Usuario
-                return Usuario(
-                    id=data['id'],
-                    username=data['username'],
-                    password=data['password_hash'], # Esto es el hash
-                    nombre=data['nombre'],
-                    apellido=data['apellido'],
-                    correo=data['correo']
-                )
-            return None
+            # Retorna un objeto modelo Usuario (password = el hash guardado)
+            return Usuario.desde_fila(data) if data else None
         except mysql.connector.Error as e:
             print(f"Error en el repositorio al obtener usuario: {e}")
             return None
@@ -35,9 +54,56 @@ class UsuarioRepository:
             cursor.close()
             conn.close()
 
+    def buscar_ids_por_correo(self, termino, limite=MAX_USUARIOS_BUSQUEDA):
+        """Ids de los usuarios cuyo correo empieza con el término (o termina, si empieza con '@' o '.')."""
+        conn = crear_conexion(LECTURA)
+        if not conn: return []
+        cursor = conn.cursor()
+        try:
+            return ids_por_correo(cursor, termino, limite)
+        except mysql.connector.Error as e:
+            print(f"Error en el repositorio al buscar usuarios por correo: {e}")
+            return []
+        finally:
+            cursor.close()
+            conn.close()
+
+    def obtener_rol(self, usuario_id):
+        """Devuelve el rol del usuario ('cliente' o 'admin'); 'cliente' si no se encuentra."""
+        conn = crear_conexion(LECTURA_FRESCA)  # Un cambio de rol (p. ej. quitar el admin) debe aplicarse al instante
+        if not conn: return 'cliente'
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT rol FROM usuarios WHERE id = %s", (usuario_id,))
+            res = cursor.fetchone()
+            return res[0] if res else 'cliente'
+        except mysql.connector.Error as e:
+            print(f"Error en el repositorio al obtener rol: {e}")
+            return 'cliente'
+        finally:
+            cursor.close()
+            conn.close()
+
+    def actualizar_password_hash(self, usuario_id, password_hash):
+        """Reemplaza el hash guardado (por ejemplo, al migrar un hash antiguo). Devuelve True si se guardó."""
+        conn = crear_conexion(ESCRITURA)
+        if not conn: return False
+        cursor = conn.cursor()
+        try:
+            cursor.execute("UPDATE usuarios SET password_hash = %s WHERE id = %s", (password_hash, usuario_id))
+            conn.commit()
+            return True
+        except mysql.connector.Error as e:
+            print(f"Error en el repositorio al actualizar hash: {e}")
+            conn.rollback()
+            return False
+        finally:
+            cursor.close()
+            conn.close()
+
     def registrar_nuevo_usuario(self, usuario: Usuario):
         """Inserta un nuevo usuario en la base de datos."""
-        conn = crear_conexion()
+        conn = crear_conexion(ESCRITURA)
         if not conn: return False, "Error de conexión a la base de datos."
         cursor = conn.cursor()
         
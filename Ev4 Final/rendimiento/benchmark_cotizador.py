@@ -0,0 +1,80 @@
+# rendimiento/benchmark_cotizador.py
+"""
+Compara dos formas de cotizar muchas combinaciones (paquete, personas, fecha):
+
+  * bucle: un diccionario id -> paquete y una vuelta de Python por combinación
+  * vectorizado: CotizadorPaquetes.cotizar(), que resuelve todas a la vez con NumPy
+
+El catálogo y las combinaciones se generan en memoria (no necesita MySQL).
+
+Uso (desde la carpeta del proyecto):
+    python -m rendimiento.benchmark_cotizador --paquetes 500 --combinaciones 1000000
+"""
+import argparse
+import datetime
+import random
+import time
+
+import numpy as np
+
+from modelos.paquete import Paquete
+from servicio_negocio.cotizador_paquetes import CotizadorPaquetes, TablaPrecios
+
+def generar_paquetes(cantidad):
+    inicio = datetime.date(2030, 1, 1)
+    paquetes = []
+    for i in range(1, cantidad + 1):
+        salida = inicio + datetime.timedelta(days=random.randrange(365))
+        paquetes.append(Paquete(i, f"Paquete {i}", salida, salida + datetime.timedelta(days=10),
+                                random.randrange(0, 30), 0, "", random.randrange(500_000, 6_000_000)))
+    return paquetes
+
+def cotizar_con_bucle(paquetes, ids, personas, fechas):
+    por_id = {p.id: p for p in paquetes}
+    resultado = []
+    for paquete_id, cantidad, fecha in zip(ids, personas, fechas):
+        p = por_id.get(paquete_id)
+        if p is None:
+            resultado.append((0, False))
+            continue
+        disponible = p.fecha_inicio <= fecha <= p.fecha_fin and p.cupos >= cantidad and cantidad > 0
+        resultado.append((p.precio * cantidad, disponible))
+    return resultado
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cotización en bucle contra cotización vectorizada.")
+    parser.add_argument('--paquetes', type=int, default=500)
+    parser.add_argument('--combinaciones', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    random.seed(1)
+    paquetes = generar_paquetes(args.paquetes)
+    # Cada forma recibe las combinaciones en su formato natural: arreglos para NumPy y listas para el bucle.
+    generador = np.random.default_rng(1)
+    ids_np = generador.integers(1, args.paquetes + 2, args.combinaciones)  # Algunos ids no existen
+    personas_np = generador.integers(1, 8, args.combinaciones)
+    fechas_np = np.datetime64('2030-01-01') + generador.integers(0, 380, args.combinaciones).astype('timedelta64[D]')
+    ids, personas, fechas = ids_np.tolist(), personas_np.tolist(), fechas_np.tolist()
+
+    inicio = time.perf_counter()
+    en_bucle = cotizar_con_bucle(paquetes, ids, personas, fechas)
+    segundos_bucle = time.perf_counter() - inicio
+
+    cotizador = CotizadorPaquetes(repo=object())  # No se usa el repositorio: la tabla se pasa armada
+    inicio = time.perf_counter()
+    tabla = TablaPrecios.desde_paquetes(paquetes)
+    segundos_tabla = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    vectorizado = cotizador.cotizar(ids_np, personas_np, fechas_np, tabla=tabla)
+    segundos_vector = time.perf_counter() - inicio
+
+    # Las dos formas tienen que dar exactamente lo mismo
+    totales = np.array([t for t, _ in en_bucle])
+    disponibles = np.array([d for _, d in en_bucle])
+    if not (np.array_equal(totales, vectorizado['total']) and np.array_equal(disponibles, vectorizado['disponible'])):
+        raise RuntimeError("Las cotizaciones no coinciden: el benchmark no es válido.")
+
+    print(f"{args.combinaciones:,} combinaciones sobre {args.paquetes:,} paquetes")
+    print(f"{'bucle de Python':24} {segundos_bucle:>8.3f} s")
+    print(f"{'vectorizado (NumPy)':24} {segundos_vector:>8.3f} s  (+{segundos_tabla * 1000:.1f} ms para armar la tabla, una vez por cambio del catálogo)")
+    print(f"Mejora: {segundos_bucle / segundos_vector:.0f}x más rápido")
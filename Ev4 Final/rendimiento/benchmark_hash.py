@@ -0,0 +1,60 @@
+# rendimiento/benchmark_hash.py
+"""
+Mide cuántos logins por segundo (y por núcleo) aguanta el hash de contraseñas con scrypt.
+
+Primero calibra el costo para la latencia objetivo y luego verifica contraseñas en un pool de
+procesos de distinto tamaño (1, 2, 4... hasta la cantidad de núcleos). No necesita MySQL.
+
+Uso (desde la carpeta del proyecto):
+    python -m rendimiento.benchmark_hash --objetivo-ms 100 --logins 200
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from servicio_negocio.hash_contrasenas import calibrar_costo, generar_hash, comprobar_hash
+from modelos.usuario import Usuario
+
+PASSWORD = 'benchmark123'
+
+def medir(hash_guardado, procesos, logins):
+    """Verifica 'logins' contraseñas con 'procesos' procesos y devuelve logins por segundo."""
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        # Calentamiento: arranca los procesos antes de medir
+        list(pool.map(comprobar_hash, [hash_guardado] * procesos, [PASSWORD] * procesos))
+        inicio = time.perf_counter()
+        resultados = list(pool.map(comprobar_hash, [hash_guardado] * logins, [PASSWORD] * logins))
+        duracion = time.perf_counter() - inicio
+    if not all(resultados):
+        raise RuntimeError("Alguna verificación falló: el benchmark no es válido.")
+    return logins / duracion
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Logins por segundo con scrypt en un pool de procesos.")
+    parser.add_argument('--objetivo-ms', type=float, default=100, help="Latencia objetivo de un hash")
+    parser.add_argument('--n', type=int, default=None, help="Costo fijo (si no se indica, se calibra)")
+    parser.add_argument('--logins', type=int, default=100, help="Verificaciones por medición")
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1, help="Máximo de procesos a probar")
+    args = parser.parse_args()
+
+    n = args.n or calibrar_costo(args.objetivo_ms)
+    hash_guardado = generar_hash(PASSWORD, n)
+    inicio = time.perf_counter()
+    comprobar_hash(hash_guardado, PASSWORD)
+    print(f"scrypt n={n} (r=8, p=1): {(time.perf_counter() - inicio) * 1000:.1f} ms por verificación")
+
+    legado = Usuario.hash_password(PASSWORD)
+    inicio = time.perf_counter()
+    for _ in range(10000):
+        comprobar_hash(legado, PASSWORD)
+    print(f"SHA-256 antiguo: {(time.perf_counter() - inicio) / 10000 * 1e6:.1f} µs por verificación (referencia)")
+
+    print(f"{'procesos':>8} {'logins/s':>10} {'logins/s/núcleo':>16}")
+    procesos = 1
+    while True:
+        por_segundo = medir(hash_guardado, procesos, args.logins)
+        print(f"{procesos:>8} {por_segundo:>10.1f} {por_segundo / procesos:>16.1f}")
+        if procesos >= args.procesos:
+            break
+        procesos = min(procesos * 2, args.procesos)
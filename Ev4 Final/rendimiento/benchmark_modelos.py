@@ -0,0 +1,77 @@
+# rendimiento/benchmark_modelos.py
+"""
+Compara el costo de convertir filas de la base de datos en objetos del modelo:
+
+  * antes: cursor con dictionary=True (un dict por fila) + clase normal (con __dict__ por objeto)
+  * ahora: cursor de tuplas + clase con __slots__ creada con desde_fila()
+
+Las filas se generan en memoria (no necesita MySQL), así se mide solo la materialización.
+
+Uso (desde la carpeta del proyecto):
+    python -m rendimiento.benchmark_modelos --filas 1000000
+"""
+import argparse
+import datetime
+import gc
+import time
+import tracemalloc
+
+from modelos.paquete import Paquete
+
+class _PaqueteSinSlots:
+    """Copia del modelo tal como era antes (cada objeto con su propio __dict__)."""
+    def __init__(self, id, nombre, fecha_inicio, fecha_fin, cupos, costo, descripcion=""):
+        self.id = id
+        self.nombre = nombre
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        self.cupos = cupos
+        self.costo = costo
+        self.descripcion = descripcion
+
+COLUMNAS = Paquete.COLUMNAS.split(', ')
+
+def generar_filas(cantidad):
+    """Filas de ejemplo con la misma forma que devuelve el cursor de tuplas para la tabla paquetes."""
+    inicio = datetime.date(2030, 1, 1)
+    fin = datetime.date(2030, 1, 10)
+    return [(i, f"Paquete {i}", inicio, fin, 20, 1000000 + i, "Descripción", 1000000 + i) for i in range(cantidad)]
+
+def como_antes(filas_dict):
+    return [_PaqueteSinSlots(r['id'], r['nombre'], r['fecha_inicio'], r['fecha_fin'], r['cupos'], r['costo'], r['descripcion'])
+            for r in filas_dict]
+
+def como_ahora(filas):
+    return Paquete.desde_filas(filas)
+
+def medir(funcion, filas):
+    """Devuelve (segundos, bytes de memoria que ocupan los objetos creados)."""
+    gc.collect()
+    inicio = time.perf_counter()
+    objetos = funcion(filas)
+    segundos = time.perf_counter() - inicio
+    del objetos
+    gc.collect()
+
+    tracemalloc.start()
+    objetos = funcion(filas)
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objetos
+    return segundos, memoria
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Costo de materializar filas como modelos.")
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    filas = generar_filas(args.filas)
+    # El cursor con dictionary=True además arma un dict por fila: lo contamos dentro del 'antes'.
+    antes = medir(lambda f: como_antes([dict(zip(COLUMNAS, r)) for r in f]), filas)
+    ahora = medir(como_ahora, filas)
+
+    print(f"{args.filas:,} filas")
+    print(f"{'':24} {'segundos':>10} {'memoria MB':>12}")
+    print(f"{'dict + clase normal':24} {antes[0]:>10.2f} {antes[1] / 2**20:>12.1f}")
+    print(f"{'tupla + __slots__':24} {ahora[0]:>10.2f} {ahora[1] / 2**20:>12.1f}")
+    print(f"Mejora: {antes[0] / ahora[0]:.1f}x más rápido, {antes[1] / ahora[1]:.1f}x menos memoria")
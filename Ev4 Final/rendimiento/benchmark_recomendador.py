@@ -0,0 +1,153 @@
+# rendimiento/benchmark_recomendador.py
+"""
+Velocidad del recomendador de destinos (servicio_negocio/recomendador_destinos.py) con un catálogo sintético
+grande, armado en memoria con las palabras y actividades de destinos_data.json (no necesita MySQL):
+
+  * armar los vectores TF-IDF de todo el catálogo,
+  * 'parecidos' de un destino y de un lote de destinos (tiempo por consulta),
+  * actualizar unos pocos destinos cambiados (incremental) frente a rearmar todo,
+  * 'también reservaron' con reservas sintéticas, de a uno y en lote.
+
+Antes de medir, comprueba con un catálogo chico que los puntajes coincidan con la cuenta directa
+(matriz densa de TF-IDF y producto de matrices).
+
+Uso (desde la carpeta del proyecto):
+    python -m rendimiento.benchmark_recomendador --destinos 100000 --lote 100
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from modelos.destino import Destino
+from servicio_negocio.recomendador_destinos import RecomendadorDestinos, terminos_de
+
+CARPETA_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class _Catalogo:
+    """Hace de DestinosRepository y de caché: devuelve la lista y un sello que cambia a mano."""
+    def __init__(self, destinos):
+        self.destinos = destinos
+        self.version = 0
+    def obtener_todos(self):
+        return self.destinos
+    def sello(self):
+        return (self.version, 0)
+
+class _Reservas:
+    """Hace de ReservasRepository: filas (reserva_id, usuario_id, destino_id) en memoria."""
+    def __init__(self, filas):
+        self.filas = filas
+    def pares_usuario_destino(self, desde_id=0):
+        return [f for f in self.filas if f[0] > desde_id]
+
+def generar_destinos(cantidad, semilla=1):
+    """Destinos con descripciones y actividades armadas al azar a partir de las del catálogo real."""
+    with open(os.path.join(CARPETA_PROYECTO, 'destinos_data.json'), encoding='utf-8') as f:
+        reales = json.load(f)
+    palabras = sorted({p for d in reales for p in d['descripcion'].replace('.', '').replace(',', '').split()})
+    actividades = sorted({a.strip() for d in reales for a in d['actividades'].split(',')})
+    # Palabras inventadas (nombres de lugares, por ejemplo), para que el vocabulario crezca con el catálogo.
+    rnd = random.Random(semilla)
+    inventadas = [''.join(rnd.choices('abcdefghijklmnoprstuvz', k=rnd.randint(5, 9))) for _ in range(max(1000, cantidad // 5))]
+    destinos = []
+    for i in range(1, cantidad + 1):
+        descripcion = ' '.join(rnd.choices(palabras, k=rnd.randint(8, 20)) + rnd.choices(inventadas, k=2))
+        destinos.append(Destino(i, f"Destino {i}", descripcion, ', '.join(rnd.sample(actividades, rnd.randint(2, 5))), 1000))
+    return destinos
+
+def verificar(destinos, k=10):
+    """Compara los puntajes del recomendador con el coseno calculado con una matriz densa."""
+    recomendador = RecomendadorDestinos(repo=_Catalogo(destinos), reservas_repo=_Reservas([]))
+    vocabulario = {}
+    filas = [terminos_de(d.descripcion, d.actividades) for d in destinos]
+    for terminos in filas:
+        for t in terminos:
+            vocabulario.setdefault(t, len(vocabulario))
+    tf = np.zeros((len(destinos), len(vocabulario)))
+    for i, terminos in enumerate(filas):
+        for t, veces in terminos.items():
+            tf[i, vocabulario[t]] = 1 + np.log(veces)
+    df = (tf > 0).sum(axis=0)
+    x = tf * (np.log((1 + len(destinos)) / (1 + df)) + 1)
+    x /= np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+    coseno = x @ x.T
+    np.fill_diagonal(coseno, -1)
+
+    consultas = list(range(0, len(destinos), max(1, len(destinos) // 50)))
+    resultados = recomendador.similares([destinos[i].id for i in consultas], k)
+    for i, obtenidos in zip(consultas, resultados):
+        esperado = np.sort(coseno[i])[::-1][:k]
+        esperado = esperado[esperado > 0]
+        if not np.allclose([p for _, p in obtenidos], np.round(esperado, 4), atol=1e-4):
+            return False
+        if any(abs(coseno[i, j - 1] - p) > 1e-4 for j, p in obtenidos):
+            return False
+    return True
+
+def medir(funcion, repeticiones):
+    """Mediana, en milisegundos, de 'repeticiones' llamadas."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return float(np.median(tiempos))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Velocidad del recomendador de destinos con un catálogo sintético.")
+    parser.add_argument('--destinos', type=int, default=100_000)
+    parser.add_argument('--lote', type=int, default=100, help="Destinos consultados a la vez en la prueba por lotes")
+    parser.add_argument('--cambios', type=int, default=100, help="Destinos que cambian en la prueba incremental")
+    parser.add_argument('--usuarios', type=int, default=200_000, help="Usuarios de las reservas sintéticas")
+    parser.add_argument('--reservas-por-usuario', type=int, default=4)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    if not verificar(generar_destinos(1500, semilla=2), args.k):
+        raise RuntimeError("Los puntajes no coinciden con la cuenta directa: el benchmark no es válido.")
+    print("Puntajes comprobados contra la matriz densa: OK")
+
+    rnd = random.Random(3)
+    destinos = generar_destinos(args.destinos)
+    catalogo = _Catalogo(destinos)
+    # Reservas con destinos 'populares' (distribución de Zipf), como pasa en la realidad.
+    populares = np.minimum(np.random.default_rng(3).zipf(1.3, args.usuarios * args.reservas_por_usuario), args.destinos)
+    filas = [(i + 1, i // args.reservas_por_usuario, int(d)) for i, d in enumerate(populares)]
+    recomendador = RecomendadorDestinos(repo=catalogo, cache=catalogo, reservas_repo=_Reservas(filas), intervalo_reservas=10 ** 9)
+
+    inicio = time.perf_counter()
+    recomendador.similares([1], args.k)
+    armado = time.perf_counter() - inicio
+    print(f"{args.destinos:,} destinos, {len(recomendador._vocabulario):,} términos: vectores armados en {armado:.2f} s")
+
+    ids = [rnd.randint(1, args.destinos) for _ in range(args.lote)]
+    uno = medir(lambda: recomendador.similares([rnd.randint(1, args.destinos)], args.k), 50)
+    lote = medir(lambda: recomendador.similares(ids, args.k), 5)
+    print(f"{'parecidos, 1 destino':32} {uno:8.2f} ms")
+    print(f"{f'parecidos, lote de {args.lote}':32} {lote:8.2f} ms ({lote / args.lote:.2f} ms por destino)")
+
+    for i in rnd.sample(range(args.destinos), args.cambios):
+        d = destinos[i]
+        destinos[i] = Destino(d.id, d.nombre, d.descripcion + ' termas volcanes', d.actividades, d.costo)
+    catalogo.version += 1
+    inicio = time.perf_counter()
+    recomendador.sincronizar(destinos, catalogo.sello())
+    incremental = (time.perf_counter() - inicio) * 1000
+    inicio = time.perf_counter()
+    RecomendadorDestinos(repo=catalogo, cache=catalogo, reservas_repo=_Reservas([])).reconstruir(destinos)
+    completo = (time.perf_counter() - inicio) * 1000
+    print(f"{f'actualizar {args.cambios} destinos':32} {incremental:8.2f} ms (rearmar todo: {completo:.0f} ms)")
+    uno_despues = medir(lambda: recomendador.similares([rnd.randint(1, args.destinos)], args.k), 50)
+    print(f"{'parecidos tras actualizar':32} {uno_despues:8.2f} ms")
+
+    inicio = time.perf_counter()
+    recomendador.tambien_reservaron([1], args.k)
+    print(f"{len(filas):,} reservas de {args.usuarios:,} usuarios: co-reservas armadas en {time.perf_counter() - inicio:.2f} s")
+    uno = medir(lambda: recomendador.tambien_reservaron([rnd.randint(1, 1000)], args.k), 50)
+    lote = medir(lambda: recomendador.tambien_reservaron(ids, args.k), 5)
+    print(f"{'también reservaron, 1 destino':32} {uno:8.2f} ms")
+    print(f"{f'también reservaron, lote de {args.lote}':32} {lote:8.2f} ms ({lote / args.lote:.2f} ms por destino)")
@@ -0,0 +1,266 @@
+# rendimiento/benchmark_servicios.py
+"""
+Prueba de carga de la capa de servicios contra un MySQL local.
+
+Varios hilos ejecutan, durante un tiempo fijo, una mezcla de operaciones (login, búsqueda,
+reservas e historial) y al final se informa, para cada operación, el rendimiento (ops/s)
+y las latencias p50/p95/p99. El resultado se guarda en JSON para comparar entre ejecuciones.
+
+Uso (desde la carpeta del proyecto):
+    python -m rendimiento.benchmark_servicios --hilos 16 --duracion 30 --salida resultado.json
+    python -m rendimiento.benchmark_servicios --mezcla buscar=70,historial=30 --comparar resultado.json
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from database import crear_conexion, obtener_pool, estadisticas_pool
+from persistencia.usuarios_repo import UsuarioRepository
+from persistencia.destinos_repo import DestinosRepository
+from persistencia.reservas_repo import ReservasRepository
+from servicio_negocio.usuario_service import UsuarioService
+from servicio_negocio.destinos_service import DestinosService
+from servicio_negocio.reserva_service import ReservaService
+from servicio_negocio.paquetes_service import PaquetesService
+
+MEZCLA_POR_DEFECTO = 'autenticar=20,buscar=40,reservar_destino=10,reservar_paquete=10,historial=20'
+PREFIJO_CORREO = 'bench'
+DOMINIO_CORREO = '@benchmark.local'
+PASSWORD = 'benchmark123'
+TERMINOS = ['paris', 'roma', 'peru', 'japon', 'new', 'bar', 'ciudad', 'isla', 'mex', 'tok']
+
+def parsear_mezcla(texto):
+    """Convierte 'buscar=70,historial=30' en {'buscar': 70, 'historial': 30}."""
+    mezcla = {}
+    for parte in texto.split(','):
+        nombre, _, peso = parte.partition('=')
+        nombre = nombre.strip()
+        if nombre not in OPERACIONES:
+            raise ValueError(f"Operación desconocida en la mezcla: '{nombre}'. Opciones: {', '.join(OPERACIONES)}")
+        mezcla[nombre] = float(peso or 1)
+    return mezcla
+
+def percentil(ordenados, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not ordenados: return 0.0
+    k = max(0, min(len(ordenados) - 1, math.ceil(p / 100 * len(ordenados)) - 1))
+    return ordenados[k]
+
+
+class Contexto:
+    """Datos y servicios compartidos por todos los hilos durante la prueba."""
+
+    def __init__(self, usuarios):
+        self.usuario_service = UsuarioService(UsuarioRepository())
+        self.destinos_service = DestinosService(DestinosRepository())
+        self.reserva_service = ReservaService(ReservasRepository())
+        self.paquetes_service = PaquetesService()
+        self.cantidad_usuarios = usuarios
+        self.usuarios = []       # Lista de (id, correo)
+        self.destinos_ids = []
+        self.paquete_id = None
+
+    def preparar(self):
+        """Crea los usuarios y el paquete de prueba (con cupos de sobra para no quedarnos sin ellos)."""
+        for i in range(self.cantidad_usuarios):
+            correo = f"{PREFIJO_CORREO}{i}{DOMINIO_CORREO}"
+            self.usuario_service.registrar_usuario_nuevo(correo, PASSWORD, 'Bench', str(i), correo)
+            usuario, _ = self.usuario_service.autenticar_usuario(correo, PASSWORD)
+            if usuario:
+                self.usuarios.append((usuario.id, correo))
+        if not self.usuarios:
+            raise RuntimeError("No se pudieron crear los usuarios de prueba (¿está MySQL en marcha?).")
+
+        self.destinos_ids = [d.id for d in self.destinos_service.obtener_todos_los_destinos()]
+        if not self.destinos_ids:
+            raise RuntimeError("No hay destinos en la base de datos; ejecuta primero app.py o database.py.")
+
+        conn = crear_conexion()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "INSERT INTO paquetes (nombre, fecha_inicio, fecha_fin, cupos, costo, descripcion) VALUES (%s, %s, %s, %s, %s, %s)",
+                ('Paquete de benchmark', '2030-01-01', '2030-01-10', 10 ** 9, 1, 'Creado por rendimiento/benchmark_servicios.py')
+            )
+            self.paquete_id = cursor.lastrowid
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def limpiar(self):
+        """Borra las reservas y el paquete creados por la prueba (los usuarios se reutilizan en la siguiente)."""
+        conn = crear_conexion()
+        cursor = conn.cursor()
+        try:
+            ids = [u[0] for u in self.usuarios]
+            if ids:
+                marcadores = ", ".join(["%s"] * len(ids))
+                cursor.execute(f"DELETE FROM reservas WHERE usuario_id IN ({marcadores})", ids)
+            if self.paquete_id:
+                cursor.execute("DELETE FROM paquetes WHERE id = %s", (self.paquete_id,))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+
+# --- Operaciones: cada una devuelve True si el servicio respondió con éxito ---
+
+def op_autenticar(ctx, rnd):
+    _, correo = rnd.choice(ctx.usuarios)
+    usuario, _ = ctx.usuario_service.autenticar_usuario(correo, PASSWORD)
+    return usuario is not None
+
+def op_buscar(ctx, rnd):
+    ctx.destinos_service.buscar_destinos(rnd.choice(TERMINOS))
+    return True
+
+def op_reservar_destino(ctx, rnd):
+    usuario_id, _ = rnd.choice(ctx.usuarios)
+    # Fechas repartidas en un año: cada destino recibe un máximo de personas por día (ver inventario_destinos.py).
+    fecha = date(2030, 1, 1) + timedelta(days=rnd.randrange(365))
+    exito, _ = ctx.reserva_service.procesar_reserva_destino(usuario_id, rnd.choice(ctx.destinos_ids), fecha.isoformat(), rnd.randint(1, 4))
+    return exito
+
+def op_reservar_paquete(ctx, rnd):
+    usuario_id, _ = rnd.choice(ctx.usuarios)
+    exito, _ = ctx.paquetes_service.procesar_reserva_paquete(usuario_id, ctx.paquete_id, rnd.randint(1, 4))
+    return exito
+
+def op_historial(ctx, rnd):
+    usuario_id, _ = rnd.choice(ctx.usuarios)
+    ctx.reserva_service.obtener_historial(usuario_id)
+    return True
+
+OPERACIONES = {
+    'autenticar': op_autenticar,
+    'buscar': op_buscar,
+    'reservar_destino': op_reservar_destino,
+    'reservar_paquete': op_reservar_paquete,
+    'historial': op_historial,
+}
+
+
+def ejecutar(hilos=8, duracion=20.0, calentamiento=2.0, mezcla=MEZCLA_POR_DEFECTO, usuarios=50, pool=None, semilla=None):
+    """Corre la prueba y devuelve un diccionario listo para guardarse como JSON."""
+    pesos = parsear_mezcla(mezcla) if isinstance(mezcla, str) else dict(mezcla)
+    nombres, ponderaciones = list(pesos), list(pesos.values())
+    if pool:
+        obtener_pool().tamano_maximo = pool
+
+    ctx = Contexto(usuarios)
+    ctx.preparar()
+
+    latencias = {nombre: [] for nombre in nombres}
+    errores = {nombre: 0 for nombre in nombres}
+    lock = threading.Lock()
+    midiendo = threading.Event()
+    detener = threading.Event()
+
+    def trabajador(n):
+        rnd = random.Random(None if semilla is None else semilla + n)
+        propias = {nombre: [] for nombre in nombres}
+        fallidas = {nombre: 0 for nombre in nombres}
+        while not detener.is_set():
+            nombre = rnd.choices(nombres, ponderaciones)[0]
+            t0 = time.perf_counter()
+            try:
+                ok = OPERACIONES[nombre](ctx, rnd)
+            except Exception:
+                ok = False
+            ms = (time.perf_counter() - t0) * 1000
+            if midiendo.is_set():
+                propias[nombre].append(ms)
+                if not ok: fallidas[nombre] += 1
+        with lock:
+            for nombre in nombres:
+                latencias[nombre].extend(propias[nombre])
+                errores[nombre] += fallidas[nombre]
+
+    trabajadores = [threading.Thread(target=trabajador, args=(n,)) for n in range(hilos)]
+    try:
+        for t in trabajadores: t.start()
+        time.sleep(calentamiento)
+        midiendo.set()
+        inicio = time.perf_counter()
+        time.sleep(duracion)
+        detener.set()
+        medido = time.perf_counter() - inicio
+        for t in trabajadores: t.join()
+    finally:
+        detener.set()
+        ctx.limpiar()
+
+    operaciones = {}
+    total = 0
+    for nombre in nombres:
+        datos = sorted(latencias[nombre])
+        total += len(datos)
+        operaciones[nombre] = {
+            'cantidad': len(datos),
+            'errores': errores[nombre],
+            'ops_por_segundo': round(len(datos) / medido, 2),
+            'p50_ms': round(percentil(datos, 50), 3),
+            'p95_ms': round(percentil(datos, 95), 3),
+            'p99_ms': round(percentil(datos, 99), 3),
+            'max_ms': round(datos[-1], 3) if datos else 0.0,
+        }
+
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'maquina': {'python': platform.python_version(), 'sistema': platform.platform()},
+        'parametros': {'hilos': hilos, 'duracion_s': duracion, 'calentamiento_s': calentamiento,
+                       'mezcla': pesos, 'usuarios': usuarios, 'semilla': semilla},
+        'total': {'cantidad': total, 'ops_por_segundo': round(total / medido, 2)},
+        'operaciones': operaciones,
+        'pool': estadisticas_pool(),
+    }
+
+def comparar(actual, previo):
+    """Imprime la variación de rendimiento y p95 de cada operación respecto a una ejecución anterior."""
+    print("\nComparación con la ejecución anterior:")
+    for nombre, datos in actual['operaciones'].items():
+        antes = previo.get('operaciones', {}).get(nombre)
+        if not antes:
+            print(f"  {nombre:18} (sin datos previos)")
+            continue
+        def variacion(a, b):
+            return f"{(a - b) / b * 100:+.1f}%" if b else "n/a"
+        print(f"  {nombre:18} ops/s {variacion(datos['ops_por_segundo'], antes['ops_por_segundo']):>8}"
+              f"   p95 {variacion(datos['p95_ms'], antes['p95_ms']):>8}")
+
+def imprimir(resultado):
+    p = resultado['parametros']
+    print(f"Hilos: {p['hilos']} | Duración: {p['duracion_s']} s | Total: {resultado['total']['ops_por_segundo']} ops/s")
+    print(f"{'operación':18} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    for nombre, d in resultado['operaciones'].items():
+        print(f"{nombre:18} {d['ops_por_segundo']:>9} {d['p50_ms']:>9} {d['p95_ms']:>9} {d['p99_ms']:>9} {d['errores']:>8}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Prueba de carga de la capa de servicios.")
+    parser.add_argument('--hilos', type=int, default=8, help="Cantidad de clientes concurrentes")
+    parser.add_argument('--duracion', type=float, default=20.0, help="Segundos de medición")
+    parser.add_argument('--calentamiento', type=float, default=2.0, help="Segundos previos que no se miden")
+    parser.add_argument('--mezcla', default=MEZCLA_POR_DEFECTO, help="Pesos de cada operación, ej. 'buscar=70,historial=30'")
+    parser.add_argument('--usuarios', type=int, default=50, help="Usuarios de prueba a crear/reutilizar")
+    parser.add_argument('--pool', type=int, default=None, help="Tamaño máximo del pool de conexiones")
+    parser.add_argument('--semilla', type=int, default=None)
+    parser.add_argument('--salida', default=None, help="Archivo JSON donde guardar el resultado")
+    parser.add_argument('--comparar', default=None, help="Archivo JSON de una ejecución anterior para comparar")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.hilos, args.duracion, args.calentamiento, args.mezcla, args.usuarios, args.pool, args.semilla)
+    imprimir(resultado)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"\nResultado guardado en {args.salida}")
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            comparar(resultado, json.load(f))
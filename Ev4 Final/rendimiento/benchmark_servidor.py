@@ -0,0 +1,139 @@
+# rendimiento/benchmark_servidor.py
+"""
+Rendimiento del servidor HTTP (servidor_http.py) según la cantidad de procesos trabajadores.
+
+Para cada cantidad de trabajadores se levanta el servidor, varios procesos cliente le hacen peticiones
+durante un tiempo fijo (cada uno con una sola conexión keep-alive, o una conexión nueva por petición con
+--sin-keep-alive) y se informa el rendimiento (peticiones/s), la latencia p50/p95 y la mejora respecto
+de un solo trabajador.
+
+La ruta por defecto, GET /destinos, arma el JSON de todo el catálogo (sale de la caché de cada trabajador):
+es trabajo de CPU en Python, justo lo que un solo proceso no puede repartir entre núcleos por el GIL.
+Los clientes corren en la misma máquina y también usan CPU: para medir el servidor solo, conviene lanzar
+los clientes desde otra (con --host).
+
+Uso (desde la carpeta del proyecto, con MySQL en marcha):
+    python -m rendimiento.benchmark_servidor --trabajadores 1,2,4 --clientes 8 --duracion 10
+    python -m rendimiento.benchmark_servidor --ruta /paquetes --sin-keep-alive
+"""
+import argparse
+import http.client
+import math
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+CARPETA_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentil(datos, p):
+    if not datos:
+        return 0.0
+    return datos[min(len(datos) - 1, math.ceil(p / 100 * len(datos)) - 1)]
+
+def _cliente(host, puerto, ruta, duracion, keep_alive, resultados):
+    """Un proceso cliente: pide 'ruta' una y otra vez durante 'duracion' segundos."""
+    latencias, errores = [], 0
+    conexion = None
+    fin = time.perf_counter() + duracion
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        try:
+            if conexion is None:
+                conexion = http.client.HTTPConnection(host, puerto, timeout=10)
+            conexion.request('GET', ruta, headers={} if keep_alive else {'Connection': 'close'})
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            if respuesta.status != 200:
+                errores += 1
+            else:
+                latencias.append((time.perf_counter() - inicio) * 1000)
+            if not keep_alive:
+                conexion.close()
+                conexion = None
+        except (OSError, http.client.HTTPException):
+            errores += 1
+            if conexion is not None:
+                conexion.close()
+            conexion = None
+    if conexion is not None:
+        conexion.close()
+    resultados.put((latencias, errores))
+
+def _esperar_servidor(host, puerto, limite=15):
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        try:
+            conexion = http.client.HTTPConnection(host, puerto, timeout=1)
+            conexion.request('GET', '/salud')
+            if conexion.getresponse().status == 200:
+                conexion.close()
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+def medir(trabajadores, clientes, duracion, ruta, keep_alive, host='127.0.0.1', puerto=8099, lanzar=True):
+    """Levanta el servidor con 'trabajadores' procesos (si lanzar=True), lo carga y devuelve las métricas."""
+    servidor = None
+    if lanzar:
+        servidor = subprocess.Popen(
+            [sys.executable, 'servidor_http.py', '--host', host, '--puerto', str(puerto), '--trabajadores', str(trabajadores)],
+            cwd=CARPETA_PROYECTO, stdout=subprocess.DEVNULL
+        )
+    try:
+        if not _esperar_servidor(host, puerto):
+            raise RuntimeError("El servidor no respondió a tiempo.")
+        # Una vuelta corta de calentamiento: cada trabajador llena su caché y abre sus conexiones.
+        cola = multiprocessing.Queue()
+        calentamiento = [multiprocessing.Process(target=_cliente, args=(host, puerto, ruta, 1, True, cola)) for _ in range(clientes)]
+        for proceso in calentamiento: proceso.start()
+        for _ in calentamiento: cola.get()
+        for proceso in calentamiento: proceso.join()
+
+        procesos = [multiprocessing.Process(target=_cliente, args=(host, puerto, ruta, duracion, keep_alive, cola)) for _ in range(clientes)]
+        for proceso in procesos: proceso.start()
+        latencias, errores = [], 0
+        for _ in procesos:
+            parciales, errores_cliente = cola.get()
+            latencias.extend(parciales)
+            errores += errores_cliente
+        for proceso in procesos: proceso.join()
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait()
+
+    latencias.sort()
+    return {
+        'trabajadores': trabajadores,
+        'peticiones': len(latencias),
+        'errores': errores,
+        'por_segundo': len(latencias) / duracion,
+        'p50_ms': percentil(latencias, 50),
+        'p95_ms': percentil(latencias, 95),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Peticiones por segundo del servidor HTTP según la cantidad de trabajadores.")
+    parser.add_argument('--trabajadores', default='1,2,4', help="Cantidades a probar, separadas por coma")
+    parser.add_argument('--clientes', type=int, default=8, help="Procesos cliente (una conexión cada uno)")
+    parser.add_argument('--duracion', type=float, default=10, help="Segundos de medición por cada cantidad")
+    parser.add_argument('--ruta', default='/destinos')
+    parser.add_argument('--sin-keep-alive', action='store_true', help="Una conexión nueva por petición")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8099)
+    parser.add_argument('--no-lanzar', action='store_true', help="No levanta el servidor: usa uno ya en marcha en host:puerto")
+    args = parser.parse_args()
+
+    cantidades = [int(x) for x in args.trabajadores.split(',')]
+    print(f"Ruta {args.ruta} | {args.clientes} clientes | {args.duracion:g} s | keep-alive: {'no' if args.sin_keep_alive else 'sí'}")
+    print(f"{'trabajadores':>12} {'pet/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'errores':>8} {'mejora':>8}")
+    base = None
+    for cantidad in cantidades:
+        r = medir(cantidad, args.clientes, args.duracion, args.ruta, not args.sin_keep_alive,
+                  args.host, args.puerto, lanzar=not args.no_lanzar)
+        base = base or r['por_segundo']
+        mejora = r['por_segundo'] / base if base else 0
+        print(f"{cantidad:>12} {r['por_segundo']:>10.0f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['errores']:>8} {mejora:>7.1f}x")
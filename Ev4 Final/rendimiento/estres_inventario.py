@@ -0,0 +1,190 @@
+# rendimiento/estres_inventario.py
+"""
+Prueba de estrés del inventario diario de los destinos: cientos de hilos reservando estadías que se
+pisan entre sí (distintas fechas de entrada y cantidades de noches) sobre el MISMO destino.
+
+Crea un destino de prueba con una capacidad diaria fija. Cada hilo mezcla reservas sueltas, lotes de
+varias estadías (MotorReservas.reservar_lote, con un SAVEPOINT por estadía) y cancelaciones de sus propias
+reservas. Al terminar comprueba, día por día, que:
+  * los lugares disponibles nunca quedaron negativos, y
+  * capacidad == disponibles + personas de todas las reservas que ocupan ese día (nadie 'vendió de más'
+    ni quedaron lugares perdidos al cancelar).
+
+Uso (desde la carpeta del proyecto, con MySQL en marcha):
+    python -m rendimiento.estres_inventario --hilos 200 --capacidad 40 --dias 14
+"""
+import argparse
+import datetime
+import random
+import threading
+import time
+from collections import Counter
+
+from database import crear_conexion, obtener_pool, estadisticas_pool
+from modelos.reserva import Reserva
+from persistencia.motor_reservas import motor_reservas, ResultadoReserva
+from persistencia.reservas_repo import ReservasRepository
+from persistencia.resumenes_repo import aplicar_reservas
+
+CORREO_PRUEBA = 'estres@agencia.com'
+PRIMER_DIA = datetime.date(2030, 1, 1)
+
+def _preparar(capacidad):
+    """Crea (si falta) el usuario de prueba y un destino de prueba; devuelve (usuario_id, destino_id)."""
+    conn = crear_conexion()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT id FROM usuarios WHERE correo = %s", (CORREO_PRUEBA,))
+        row = cursor.fetchone()
+        if row:
+            usuario_id = row[0]
+        else:
+            cursor.execute(
+                "INSERT INTO usuarios (username, nombre, apellido, correo, password_hash) VALUES (%s, %s, %s, %s, %s)",
+                (CORREO_PRUEBA, 'Prueba', 'Estres', CORREO_PRUEBA, '-')
+            )
+            usuario_id = cursor.lastrowid
+        cursor.execute(
+            "INSERT INTO destinos (nombre, descripcion, actividades, costo, capacidad_diaria) VALUES (%s, %s, %s, %s, %s)",
+            ('Destino de estrés', 'Creado por rendimiento/estres_inventario.py', '', 1, capacidad)
+        )
+        destino_id = cursor.lastrowid
+        conn.commit()
+        return usuario_id, destino_id
+    finally:
+        cursor.close()
+        conn.close()
+
+def _verificar(destino_id):
+    """
+    Compara el inventario con las reservas guardadas. Devuelve (dias_revisados, dias_negativos,
+    dias_descuadrados, cantidad_de_reservas).
+    """
+    conn = crear_conexion()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT fecha, capacidad, disponibles FROM inventario_destinos WHERE destino_id = %s", (destino_id,))
+        inventario = cursor.fetchall()
+        cursor.execute("SELECT fecha_reserva, noches, cantidad_personas FROM reservas WHERE destino_id = %s", (destino_id,))
+        reservas = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    ocupados = Counter()
+    for fecha, noches, personas in reservas:
+        for i in range(noches):
+            ocupados[fecha + datetime.timedelta(days=i)] += personas
+    negativos = [fecha for fecha, _, disponibles in inventario if disponibles < 0]
+    descuadrados = [fecha for fecha, capacidad, disponibles in inventario if capacidad - disponibles != ocupados[fecha]]
+    # Un día ocupado por una reserva tiene que tener su fila en el inventario.
+    descuadrados += sorted(set(ocupados) - {fecha for fecha, _, _ in inventario})
+    return len(inventario), negativos, descuadrados, len(reservas)
+
+def _limpiar(destino_id):
+    conn = crear_conexion()
+    cursor = conn.cursor()
+    try:
+        # Las reservas de destinos no se borran en cascada: primero se descuentan de los resúmenes y se borran.
+        cursor.execute("SELECT id FROM reservas WHERE destino_id = %s", (destino_id,))
+        ids = [fila[0] for fila in cursor.fetchall()]
+        aplicar_reservas(cursor, ids, -1)
+        cursor.execute("DELETE FROM reservas WHERE destino_id = %s", (destino_id,))
+        # El inventario del destino se borra solo por el ON DELETE CASCADE.
+        cursor.execute("DELETE FROM destinos WHERE id = %s", (destino_id,))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+def ejecutar(hilos=200, capacidad=40, dias=14, intentos_por_hilo=5, max_personas=4, max_noches=5,
+             prob_lote=0.2, prob_cancelar=0.15, pool=50, conservar=False):
+    """Lanza la prueba y devuelve un diccionario con los resultados."""
+    obtener_pool().tamano_maximo = pool
+    usuario_id, destino_id = _preparar(capacidad)
+    repo = ReservasRepository()
+    contadores = Counter()
+    lock = threading.Lock()
+    salida = threading.Barrier(hilos)
+
+    def estadia(rnd):
+        return PRIMER_DIA + datetime.timedelta(days=rnd.randrange(dias)), rnd.randint(1, max_noches), rnd.randint(1, max_personas)
+
+    def reservador():
+        rnd = random.Random()
+        propias = []
+        salida.wait()  # Todos arrancan a la vez para maximizar la contención
+        for _ in range(intentos_por_hilo):
+            if propias and rnd.random() < prob_cancelar:
+                exito, _ = repo.eliminar_reserva(propias.pop(rnd.randrange(len(propias))))
+                resultados = ['cancelada' if exito else 'error_cancelar']
+            elif rnd.random() < prob_lote:
+                lote = []
+                for _ in range(rnd.randint(2, 4)):
+                    fecha, noches, personas = estadia(rnd)
+                    lote.append(Reserva(usuario_id, fecha, personas, destino_id=destino_id, noches=noches))
+                lote_resultados = motor_reservas.reservar_lote(lote)
+                propias.extend(r.reserva_id for r in lote_resultados if r.exito)
+                resultados = [f"lote_{r.motivo}" for r in lote_resultados]
+            else:
+                fecha, noches, personas = estadia(rnd)
+                resultado = motor_reservas.reservar_destino(usuario_id, destino_id, fecha, personas, noches)
+                if resultado.exito:
+                    propias.append(resultado.reserva_id)
+                resultados = [resultado.motivo]
+            with lock:
+                contadores.update(resultados)
+
+    trabajadores = [threading.Thread(target=reservador) for _ in range(hilos)]
+    inicio = time.perf_counter()
+    for t in trabajadores: t.start()
+    for t in trabajadores: t.join()
+    duracion = time.perf_counter() - inicio
+
+    dias_revisados, negativos, descuadrados, reservas = _verificar(destino_id)
+    if not conservar:
+        _limpiar(destino_id)
+
+    intentos = sum(contadores.values())
+    guardadas = contadores[ResultadoReserva.OK] + contadores[f"lote_{ResultadoReserva.OK}"] - contadores['cancelada']
+    errores = contadores[ResultadoReserva.ERROR_BD] + contadores[f"lote_{ResultadoReserva.ERROR_BD}"] + contadores['error_cancelar']
+    return {
+        'hilos': hilos,
+        'capacidad_diaria': capacidad,
+        'intentos': intentos,
+        'resultados': dict(contadores),
+        'reservas_guardadas': reservas,
+        'dias_revisados': dias_revisados,
+        'dias_negativos': negativos,
+        'dias_descuadrados': descuadrados,
+        'consistente': not negativos and not descuadrados and reservas == guardadas,
+        'errores_bd': errores,
+        'duracion_s': round(duracion, 3),
+        'operaciones_por_segundo': round(intentos / duracion, 1) if duracion else 0,
+        'pool': estadisticas_pool(),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Prueba de estrés de reservas concurrentes sobre el inventario diario de un destino.")
+    parser.add_argument('--hilos', type=int, default=200)
+    parser.add_argument('--capacidad', type=int, default=40, help="Capacidad diaria del destino de prueba")
+    parser.add_argument('--dias', type=int, default=14, help="Días en los que pueden empezar las estadías")
+    parser.add_argument('--intentos', type=int, default=5, help="Operaciones que hace cada hilo")
+    parser.add_argument('--max-personas', type=int, default=4)
+    parser.add_argument('--max-noches', type=int, default=5)
+    parser.add_argument('--lotes', type=float, default=0.2, help="Proporción de operaciones que son lotes")
+    parser.add_argument('--cancelaciones', type=float, default=0.15, help="Proporción de operaciones que cancelan una reserva propia")
+    parser.add_argument('--pool', type=int, default=50, help="Tamaño máximo del pool de conexiones")
+    parser.add_argument('--conservar', action='store_true', help="No borrar el destino de prueba al terminar")
+    args = parser.parse_args()
+
+    r = ejecutar(args.hilos, args.capacidad, args.dias, args.intentos, args.max_personas, args.max_noches,
+                 args.lotes, args.cancelaciones, args.pool, args.conservar)
+    print(f"Hilos: {r['hilos']} | Operaciones: {r['intentos']} en {r['duracion_s']} s ({r['operaciones_por_segundo']} op/s)")
+    print(f"Resultados: {r['resultados']}")
+    print(f"Capacidad diaria: {r['capacidad_diaria']} | Días en el inventario: {r['dias_revisados']} | Reservas guardadas: {r['reservas_guardadas']}")
+    print(f"Días negativos: {len(r['dias_negativos'])} | Días descuadrados: {len(r['dias_descuadrados'])} | Errores de BD: {r['errores_bd']}")
+    print(f"Consistente: {'SÍ' if r['consistente'] else 'NO'}")
+    print(f"Pool: {r['pool']}")
+    if not r['consistente']:
+        raise SystemExit(1)
@@ -0,0 +1,133 @@
+# rendimiento/estres_reservas.py
+"""
+Prueba de estrés del MotorReservas: cientos de hilos intentando reservar el MISMO paquete a la vez.
+
+Crea un paquete de prueba con un número fijo de cupos, lanza los hilos y al terminar comprueba que:
+  * los cupos nunca quedaron negativos, y
+  * cupos_iniciales == cupos_restantes + suma de personas reservadas (nadie 'vendió de más').
+
+Uso (desde la carpeta del proyecto, con MySQL en marcha):
+    python -m rendimiento.estres_reservas --hilos 300 --cupos 500
+"""
+import argparse
+import random
+import threading
+import time
+
+from database import crear_conexion, obtener_pool, estadisticas_pool
+from persistencia.motor_reservas import motor_reservas, ResultadoReserva
+
+CORREO_PRUEBA = 'estres@agencia.com'
+
+def _preparar(cupos):
+    """Crea un usuario y un paquete de prueba; devuelve (usuario_id, paquete_id)."""
+    conn = crear_conexion()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT id FROM usuarios WHERE correo = %s", (CORREO_PRUEBA,))
+        row = cursor.fetchone()
+        if row:
+            usuario_id = row[0]
+        else:
+            cursor.execute(
+                "INSERT INTO usuarios (username, nombre, apellido, correo, password_hash) VALUES (%s, %s, %s, %s, %s)",
+                (CORREO_PRUEBA, 'Prueba', 'Estres', CORREO_PRUEBA, '-')
+            )
+            usuario_id = cursor.lastrowid
+        cursor.execute(
+            "INSERT INTO paquetes (nombre, fecha_inicio, fecha_fin, cupos, costo, descripcion) VALUES (%s, %s, %s, %s, %s, %s)",
+            ('Paquete de estrés', '2030-01-01', '2030-01-10', cupos, 1, 'Creado por rendimiento/estres_reservas.py')
+        )
+        paquete_id = cursor.lastrowid
+        conn.commit()
+        return usuario_id, paquete_id
+    finally:
+        cursor.close()
+        conn.close()
+
+def _verificar(paquete_id):
+    """Devuelve (cupos_restantes, personas_reservadas, cantidad_de_reservas) leyendo la base de datos."""
+    conn = crear_conexion()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT cupos FROM paquetes WHERE id = %s", (paquete_id,))
+        cupos = cursor.fetchone()[0]
+        cursor.execute("SELECT COALESCE(SUM(cantidad_personas), 0), COUNT(*) FROM reservas WHERE paquete_id = %s", (paquete_id,))
+        personas, reservas = cursor.fetchone()
+        return cupos, int(personas), reservas
+    finally:
+        cursor.close()
+        conn.close()
+
+def _limpiar(paquete_id):
+    conn = crear_conexion()
+    cursor = conn.cursor()
+    try:
+        # Las reservas se borran solas por el ON DELETE CASCADE.
+        cursor.execute("DELETE FROM paquetes WHERE id = %s", (paquete_id,))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+def ejecutar(hilos=300, cupos=500, intentos_por_hilo=5, max_personas=4, pool=50, conservar=False):
+    """Lanza la prueba y devuelve un diccionario con los resultados."""
+    obtener_pool().tamano_maximo = pool
+    usuario_id, paquete_id = _preparar(cupos)
+    contadores = {m: 0 for m in (ResultadoReserva.OK, ResultadoReserva.SIN_CUPOS, ResultadoReserva.NO_ENCONTRADO,
+                                 ResultadoReserva.SIN_CONEXION, ResultadoReserva.ERROR_BD)}
+    lock = threading.Lock()
+    salida = threading.Barrier(hilos)
+
+    def reservador():
+        rnd = random.Random()
+        salida.wait()  # Todos arrancan a la vez para maximizar la contención
+        for _ in range(intentos_por_hilo):
+            resultado = motor_reservas.reservar_paquete(usuario_id, paquete_id, rnd.randint(1, max_personas))
+            with lock:
+                contadores[resultado.motivo] += 1
+
+    trabajadores = [threading.Thread(target=reservador) for _ in range(hilos)]
+    inicio = time.perf_counter()
+    for t in trabajadores: t.start()
+    for t in trabajadores: t.join()
+    duracion = time.perf_counter() - inicio
+
+    cupos_restantes, personas, reservas = _verificar(paquete_id)
+    if not conservar:
+        _limpiar(paquete_id)
+
+    intentos = sum(contadores.values())
+    return {
+        'hilos': hilos,
+        'cupos_iniciales': cupos,
+        'intentos': intentos,
+        'resultados': contadores,
+        'reservas_guardadas': reservas,
+        'personas_reservadas': personas,
+        'cupos_restantes': cupos_restantes,
+        'sobreventa': max(0, personas - cupos) + max(0, -cupos_restantes),
+        'consistente': cupos_restantes >= 0 and cupos_restantes + personas == cupos and reservas == contadores[ResultadoReserva.OK],
+        'duracion_s': round(duracion, 3),
+        'intentos_por_segundo': round(intentos / duracion, 1) if duracion else 0,
+        'pool': estadisticas_pool(),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Prueba de estrés de reservas concurrentes sobre un único paquete.")
+    parser.add_argument('--hilos', type=int, default=300)
+    parser.add_argument('--cupos', type=int, default=500)
+    parser.add_argument('--intentos', type=int, default=5, help="Reservas que intenta cada hilo")
+    parser.add_argument('--max-personas', type=int, default=4)
+    parser.add_argument('--pool', type=int, default=50, help="Tamaño máximo del pool de conexiones")
+    parser.add_argument('--conservar', action='store_true', help="No borrar el paquete de prueba al terminar")
+    args = parser.parse_args()
+
+    r = ejecutar(args.hilos, args.cupos, args.intentos, args.max_personas, args.pool, args.conservar)
+    print(f"Hilos: {r['hilos']} | Intentos: {r['intentos']} en {r['duracion_s']} s ({r['intentos_por_segundo']} reservas/s)")
+    print(f"Resultados: {r['resultados']}")
+    print(f"Cupos: {r['cupos_iniciales']} iniciales, {r['personas_reservadas']} reservados, {r['cupos_restantes']} restantes")
+    print(f"Sobreventa: {r['sobreventa']} | Consistente: {'SÍ' if r['consistente'] else 'NO'}")
+    print(f"Pool: {r['pool']}")
+    if not r['consistente']:
+        raise SystemExit(1)
@@ -0,0 +1,133 @@
+# rendimiento/opentripmap_local.py
+"""
+Imitación local de la API de OpenTripMap para probar la sincronización sin salir a Internet.
+
+Responde a /places/geoname y /places/radius con datos inventados (pero siempre los mismos para
+una misma ciudad), usa HTTP/1.1 con keep-alive, puede simular latencia y devuelve 429 si se
+supera el límite de peticiones por segundo, igual que el proveedor real.
+Ojo: la sincronización sí escribe en la tabla 'destinos' de la base de datos configurada.
+
+Uso (desde la carpeta del proyecto, con MySQL en marcha):
+    python -m rendimiento.opentripmap_local --ciudades 2000 --hilos 16 --tasa 200 --latencia 0.05
+"""
+import argparse
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+PAISES = ['France', 'Italy', 'Japan', 'Peru', 'Mexico', 'Spain', 'Brazil', 'Egypt', 'Canada', 'Kenya']
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Mantiene la conexión abierta entre peticiones (keep-alive)
+
+    def log_message(self, *args):
+        pass  # Silencioso: no queremos una línea por petición
+
+    def _responder(self, estado, cuerpo, cabeceras=None):
+        datos = json.dumps(cuerpo).encode('utf-8')
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(datos)))
+        for k, v in (cabeceras or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        servidor = self.server
+        servidor.contar()
+        if not servidor.permitir():
+            self._responder(429, {'error': 'Too many requests'}, {'Retry-After': '1'})
+            return
+        if servidor.latencia:
+            time.sleep(servidor.latencia)
+
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path.endswith('/geoname'):
+            nombre = params.get('name', '')
+            if nombre.startswith('SinDatos'):
+                self._responder(200, {'error': 'not found'})
+                return
+            semilla = zlib.crc32(nombre.encode('utf-8'))
+            self._responder(200, {
+                'name': nombre,
+                'country': PAISES[semilla % len(PAISES)],
+                'lat': (semilla % 18000) / 100 - 90,
+                'lon': (semilla % 36000) / 100 - 180,
+                'geonameId': 10_000_000 + semilla % 90_000_000,
+            })
+        elif url.path.endswith('/radius'):
+            limite = int(params.get('limit', 5))
+            self._responder(200, {'type': 'FeatureCollection', 'features': [
+                {'properties': {'name': f"Atracción {i + 1} ({params.get('lat')}, {params.get('lon')})"}}
+                for i in range(limite)
+            ]})
+        else:
+            self._responder(404, {'error': 'unknown endpoint'})
+
+
+class ServidorOpenTripMapLocal(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, puerto=0, latencia=0.0, tasa_maxima=None):
+        super().__init__(('127.0.0.1', puerto), _Manejador)
+        self.latencia = latencia
+        self.tasa_maxima = tasa_maxima
+        self.peticiones = 0
+        self.rechazadas = 0
+        self._ventana = (0, 0)  # (segundo actual, peticiones en ese segundo)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/0.1/en/places"
+
+    def contar(self):
+        with self._lock:
+            self.peticiones += 1
+
+    def permitir(self):
+        if not self.tasa_maxima: return True
+        with self._lock:
+            segundo = int(time.monotonic())
+            actual, usadas = self._ventana
+            usadas = usadas + 1 if actual == segundo else 1
+            self._ventana = (segundo, usadas)
+            if usadas > self.tasa_maxima:
+                self.rechazadas += 1
+                return False
+            return True
+
+    def iniciar(self):
+        """Arranca el servidor en un hilo aparte y lo devuelve para poder usar base_url."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == '__main__':
+    import api
+
+    parser = argparse.ArgumentParser(description="Sincroniza destinos contra una imitación local de OpenTripMap.")
+    parser.add_argument('--ciudades', type=int, default=1000)
+    parser.add_argument('--hilos', type=int, default=16)
+    parser.add_argument('--tasa', type=float, default=200, help="Peticiones por segundo que se permite el cliente")
+    parser.add_argument('--tasa-servidor', type=int, default=None, help="Límite del servidor (responde 429 al superarlo)")
+    parser.add_argument('--latencia', type=float, default=0.05, help="Segundos de espera por petición en el servidor")
+    parser.add_argument('--lote', type=int, default=500)
+    args = parser.parse_args()
+
+    servidor = ServidorOpenTripMapLocal(latencia=args.latencia, tasa_maxima=args.tasa_servidor).iniciar()
+    ciudades = [f"Ciudad{i}" for i in range(args.ciudades)]
+    inicio = time.perf_counter()
+    exito, mensaje = api.sync_destinos_from_api(ciudades, max_hilos=args.hilos, peticiones_por_segundo=args.tasa,
+                                                tamano_lote=args.lote, base_url=servidor.base_url, api_key='local')
+    duracion = time.perf_counter() - inicio
+    servidor.shutdown()
+    print(f"{'OK' if exito else 'ERROR'}: {mensaje}")
+    print(f"{args.ciudades} ciudades en {duracion:.2f} s ({args.ciudades / duracion:.1f} ciudades/s), "
+          f"{servidor.peticiones} peticiones HTTP ({servidor.rechazadas} respondidas con 429)")
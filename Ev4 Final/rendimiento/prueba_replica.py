@@ -0,0 +1,156 @@
+# rendimiento/prueba_replica.py
+"""
+Prueba de la separación lecturas/escrituras con dos bases locales: la de config.json hace de principal
+y una copia en otro esquema del mismo servidor (por defecto '<base>_replica') hace de réplica.
+
+Como entre dos esquemas no hay replicación real, la copia se toma una vez al empezar: todo lo que se escriba
+después solo existe en la principal, igual que en una réplica atrasada. La prueba comprueba que:
+  * las lecturas (LECTURA) van a la réplica y las escrituras y lecturas frescas, a la principal;
+  * justo después de una escritura, las lecturas van a la principal (se ve lo recién escrito);
+  * pasados 'segundos_tras_escritura', las lecturas vuelven a la réplica;
+  * los repositorios declaran bien cada consulta (catálogo desde la réplica, cupos de un paquete desde la principal).
+
+Uso (desde la carpeta del proyecto, con MySQL en marcha y la base ya inicializada):
+    python -m rendimiento.prueba_replica
+    python -m rendimiento.prueba_replica --esquema agencia_replica --conservar
+"""
+import argparse
+import sys
+import time
+
+import database
+from database import crear_conexion, configurar_replica, ESCRITURA, LECTURA, LECTURA_FRESCA
+from persistencia.cache_catalogo import cache_destinos
+from persistencia.destinos_repo import DestinosRepository
+from persistencia.paquetes_repo import PaquetesRepository
+
+MARCA = 'Destino de prueba de réplica'
+
+def copiar_a_replica(esquema):
+    """Crea (o vacía) el esquema de la réplica y copia en él todas las tablas de la principal."""
+    conn = crear_conexion(ESCRITURA)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT DATABASE()")
+        principal = cursor.fetchone()[0]
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{esquema}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        cursor.execute(
+            "SELECT table_name FROM information_schema.tables WHERE table_schema = %s AND table_type = 'BASE TABLE'",
+            (principal,)
+        )
+        for (tabla,) in cursor.fetchall():
+            # Las columnas calculadas (GENERATED) no se copian: MySQL las vuelve a calcular en la copia.
+            cursor.execute(
+                "SELECT column_name FROM information_schema.columns WHERE table_schema = %s AND table_name = %s "
+                "AND extra NOT LIKE '%%GENERATED%%' ORDER BY ordinal_position",
+                (principal, tabla)
+            )
+            columnas = ", ".join(f"`{fila[0]}`" for fila in cursor.fetchall())
+            cursor.execute(f"DROP TABLE IF EXISTS `{esquema}`.`{tabla}`")
+            cursor.execute(f"CREATE TABLE `{esquema}`.`{tabla}` LIKE `{principal}`.`{tabla}`")
+            cursor.execute(f"INSERT INTO `{esquema}`.`{tabla}` ({columnas}) SELECT {columnas} FROM `{principal}`.`{tabla}`")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        conn.commit()
+        return principal
+    finally:
+        cursor.close()
+        conn.close()
+
+def base_de(modo):
+    """Nombre de la base a la que llega una conexión pedida con 'modo'."""
+    conn = crear_conexion(modo)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT DATABASE()")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+        conn.close()
+
+def _ejecutar_en(esquema, consulta, parametros=()):
+    """
+    Escribe directamente en un esquema (para preparar la prueba sin pasar por el enrutamiento).
+    Ojo: la conexión es de la principal, así que cuenta como una escritura reciente (ver obtener_pool).
+    """
+    conn = crear_conexion(ESCRITURA)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(consulta.replace('{esquema}', f"`{esquema}`"), parametros)
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        cursor.close()
+        conn.close()
+
+def ejecutar(esquema=None, segundos_tras_escritura=1.0, conservar=False):
+    """Prepara la réplica, corre las comprobaciones y devuelve la lista de (descripción, resultado)."""
+    config = database._load_db_config()
+    esquema = esquema or f"{config['database']}_replica"
+    principal = copiar_a_replica(esquema)
+    configurar_replica(dict(config, database=esquema), segundos_tras_escritura=segundos_tras_escritura)
+    # La copia se hizo con un commit en la principal: esperamos a que pase la ventana de 'lectura tras escritura'.
+    time.sleep(segundos_tras_escritura)
+
+    resultados = []
+    def comprobar(descripcion, condicion):
+        resultados.append((descripcion, bool(condicion)))
+
+    comprobar("LECTURA va a la réplica", base_de(LECTURA) == esquema)
+    comprobar("LECTURA_FRESCA va a la principal", base_de(LECTURA_FRESCA) == principal)
+    comprobar("ESCRITURA va a la principal", base_de(ESCRITURA) == principal)
+
+    # Un destino que solo existe en la réplica: el catálogo (una lectura) tiene que verlo.
+    solo_replica = _ejecutar_en(esquema, "INSERT INTO {esquema}.destinos (nombre, descripcion, actividades, costo) "
+                                         "VALUES (%s, '', '', 1)", (MARCA,))
+    time.sleep(segundos_tras_escritura)
+    cache_destinos.invalidar()
+    nombres = {d.nombre for d in DestinosRepository().obtener_todos()}
+    comprobar("El catálogo de destinos se lee de la réplica", MARCA in nombres)
+
+    # Cupos de un paquete: lectura fresca, tiene que ver la principal aunque la réplica diga otra cosa.
+    paquete = PaquetesRepository().obtener_todos()
+    if paquete:
+        paquete = paquete[0]
+        _ejecutar_en(esquema, "UPDATE {esquema}.paquetes SET cupos = cupos + 1000 WHERE id = %s", (paquete.id,))
+        time.sleep(segundos_tras_escritura)
+        comprobar("El listado de paquetes se lee de la réplica",
+                  {p.id: p.cupos for p in PaquetesRepository().obtener_todos()}.get(paquete.id) == paquete.cupos + 1000)
+        comprobar("Los cupos de un paquete (obtener_por_id) se leen de la principal",
+                  PaquetesRepository().obtener_por_id(paquete.id).cupos == paquete.cupos)
+
+    # Lectura justo después de escribir: va a la principal y ve lo recién escrito.
+    time.sleep(segundos_tras_escritura)
+    conn = crear_conexion(ESCRITURA)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO destinos (nombre, descripcion, actividades, costo) VALUES (%s, '', '', 1)", (MARCA + ' (principal)',))
+    solo_principal = cursor.lastrowid
+    conn.commit()
+    cursor.close()
+    conn.close()
+    comprobar("Justo después de escribir, LECTURA va a la principal", base_de(LECTURA) == principal)
+    time.sleep(segundos_tras_escritura)
+    comprobar(f"Pasados {segundos_tras_escritura} s, LECTURA vuelve a la réplica", base_de(LECTURA) == esquema)
+
+    # Limpieza
+    configurar_replica(None)
+    cache_destinos.invalidar()
+    _ejecutar_en(principal, "DELETE FROM {esquema}.destinos WHERE id = %s", (solo_principal,))
+    if conservar:
+        _ejecutar_en(esquema, "DELETE FROM {esquema}.destinos WHERE id = %s", (solo_replica,))
+    else:
+        _ejecutar_en(esquema, "DROP DATABASE {esquema}")
+    return resultados
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Prueba de lecturas en réplica y escrituras en la principal.")
+    parser.add_argument('--esquema', help="Esquema que hace de réplica (por defecto '<base>_replica')")
+    parser.add_argument('--segundos', type=float, default=1.0, help="Valor de 'segundos_tras_escritura' para la prueba")
+    parser.add_argument('--conservar', action='store_true', help="No borra el esquema de la réplica al terminar")
+    args = parser.parse_args()
+
+    resultados = ejecutar(args.esquema, args.segundos, args.conservar)
+    for descripcion, ok in resultados:
+        print(f"[{'OK' if ok else 'FALLO'}] {descripcion}")
+    if not all(ok for _, ok in resultados):
+        sys.exit(1)
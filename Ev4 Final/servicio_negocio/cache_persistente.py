@@ -0,0 +1,142 @@
+# servicio_negocio/cache_persistente.py
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class CachePersistente:
+    """
+    Caché de dos niveles: primero en memoria (rápida, se pierde al cerrar) y luego en disco
+    (sobrevive a reinicios). Cada entrada guarda unos datos JSON y, opcionalmente, unos bytes
+    (por ejemplo, una imagen ya procesada). Las entradas caducan tras 'ttl' segundos y, cuando
+    se supera el tamaño máximo, se descartan las que llevan más tiempo sin usarse (LRU).
+    """
+
+    def __init__(self, directorio, ttl=7 * 24 * 3600, max_memoria=128, max_disco_bytes=20 * 1024 * 1024):
+        self.directorio = directorio
+        self.ttl = ttl
+        self.max_memoria = max_memoria
+        self.max_disco_bytes = max_disco_bytes
+        self._memoria = OrderedDict()   # clave -> (guardado_en, datos, contenido)
+        self._lock = threading.Lock()
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+
+    def _ruta(self, clave):
+        nombre = hashlib.sha1(clave.encode('utf-8')).hexdigest()
+        return os.path.join(self.directorio, f"{nombre}.json")
+
+    def _vigente(self, guardado_en):
+        return time.time() - guardado_en < self.ttl
+
+    def _recordar(self, clave, entrada):
+        """Guarda en memoria y expulsa la entrada menos usada si nos pasamos del límite."""
+        self._memoria[clave] = entrada
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+
+    def obtener(self, clave):
+        """Devuelve (datos, contenido_bytes) si la clave está en caché y no ha caducado; si no, None."""
+        with self._lock:
+            entrada = self._memoria.get(clave)
+            if entrada is not None:
+                if self._vigente(entrada[0]):
+                    self._memoria.move_to_end(clave)
+                    self.aciertos_memoria += 1
+                    return entrada[1], entrada[2]
+                del self._memoria[clave]
+
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                registro = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            with self._lock:
+                self.fallos += 1
+            return None
+
+        if registro.get('clave') != clave or not self._vigente(registro.get('guardado_en', 0)):
+            self._borrar_archivo(ruta)
+            with self._lock:
+                self.fallos += 1
+            return None
+
+        contenido = base64.b64decode(registro['contenido']) if registro.get('contenido') else None
+        try:
+            os.utime(ruta)  # Marcamos el uso para el LRU del disco
+        except OSError:
+            pass
+        with self._lock:
+            self._recordar(clave, (registro['guardado_en'], registro['datos'], contenido))
+            self.aciertos_disco += 1
+        return registro['datos'], contenido
+
+    def guardar(self, clave, datos, contenido=None):
+        """Guarda datos (serializables a JSON) y bytes opcionales en memoria y en disco."""
+        guardado_en = time.time()
+        with self._lock:
+            self._recordar(clave, (guardado_en, datos, contenido))
+
+        registro = {
+            'clave': clave,
+            'guardado_en': guardado_en,
+            'datos': datos,
+            'contenido': base64.b64encode(contenido).decode('ascii') if contenido else None,
+        }
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            ruta = self._ruta(clave)
+            temporal = f"{ruta}.{threading.get_ident()}.tmp"
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(registro, f, ensure_ascii=False)
+            os.replace(temporal, ruta)  # Escritura atómica: nunca queda un archivo a medias
+            self._recortar_disco()
+        except OSError as e:
+            print(f"Aviso: no se pudo escribir la caché en disco: {e}")
+
+    def _borrar_archivo(self, ruta):
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+    def _recortar_disco(self):
+        """Si el directorio supera el tamaño máximo, borra primero los archivos usados hace más tiempo."""
+        archivos = []
+        total = 0
+        with os.scandir(self.directorio) as it:
+            for e in it:
+                if e.is_file() and e.name.endswith('.json'):
+                    st = e.stat()
+                    archivos.append((st.st_mtime, st.st_size, e.path))
+                    total += st.st_size
+        if total <= self.max_disco_bytes:
+            return
+        for _, tamano, ruta in sorted(archivos):
+            self._borrar_archivo(ruta)
+            total -= tamano
+            if total <= self.max_disco_bytes:
+                break
+
+    def limpiar(self):
+        """Vacía la caché por completo (memoria y disco)."""
+        with self._lock:
+            self._memoria.clear()
+        if os.path.isdir(self.directorio):
+            for nombre in os.listdir(self.directorio):
+                if nombre.endswith('.json'):
+                    self._borrar_archivo(os.path.join(self.directorio, nombre))
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'aciertos_memoria': self.aciertos_memoria,
+                'aciertos_disco': self.aciertos_disco,
+                'fallos': self.fallos,
+                'en_memoria': len(self._memoria),
+            }
@@ -0,0 +1,166 @@
+# servicio_negocio/cotizador_paquetes.py
+"""
+Cotizador de paquetes: calcula de una sola vez el precio de muchas combinaciones
+(paquete, cantidad de personas, fecha), por ejemplo para mostrar el total de todos los paquetes
+de un listado a medida que el cliente cambia la cantidad de personas.
+
+Los paquetes se guardan en arreglos de NumPy (ids ordenados, precio, cupos y fechas) y cada cotización
+es un puñado de operaciones sobre arreglos completos en vez de un bucle de Python por combinación.
+Los arreglos se rearman solo cuando cambia el catálogo de paquetes (ver cache_paquetes): precios y fechas
+cambian poco. Los cupos, en cambio, cambian con cada reserva, así que se leen aparte con una consulta
+liviana (solo id y cupos) a lo sumo cada 'refrescar_cupos' segundos, sin rearmar la tabla.
+
+Los cupos sirven para avisar en el listado, pero quien decide al reservar es siempre el motor de reservas.
+"""
+import threading
+import time
+
+import numpy as np
+
+from persistencia.cache_catalogo import cache_paquetes
+from persistencia.paquetes_repo import PaquetesRepository
+
+class TablaPrecios:
+    """Los datos de los paquetes que necesita una cotización, como arreglos ordenados por id."""
+    __slots__ = ('ids', 'precio', 'cupos', 'inicio', 'fin', 'posiciones')
+
+    def __init__(self, ids, precio, cupos, inicio, fin):
+        orden = np.argsort(ids, kind='stable')
+        self.ids = ids[orden]
+        self.precio = precio[orden]
+        self.cupos = cupos[orden]
+        self.inicio = inicio[orden]
+        self.fin = fin[orden]
+        # Los ids de MySQL (AUTO_INCREMENT) suelen ser casi seguidos: entonces conviene un arreglo
+        # id -> posición (-1 si no existe), que ubica cada id de un solo salto. Si son muy dispersos,
+        # se usa búsqueda binaria sobre los ids ordenados.
+        self.posiciones = None
+        if len(self.ids) and self.ids[0] >= 0 and self.ids[-1] < 4 * len(self.ids) + 1024:
+            self.posiciones = np.full(self.ids[-1] + 1, -1, dtype=np.intp)
+            self.posiciones[self.ids] = np.arange(len(self.ids))
+
+    @classmethod
+    def desde_paquetes(cls, paquetes):
+        return cls(
+            np.fromiter((p.id for p in paquetes), dtype=np.int64, count=len(paquetes)),
+            np.fromiter((p.precio or 0 for p in paquetes), dtype=np.int64, count=len(paquetes)),
+            np.fromiter((p.cupos for p in paquetes), dtype=np.int64, count=len(paquetes)),
+            np.array([p.fecha_inicio for p in paquetes], dtype='datetime64[D]'),
+            np.array([p.fecha_fin for p in paquetes], dtype='datetime64[D]'),
+        )
+
+    def actualizar_cupos(self, filas):
+        """Reemplaza los cupos con las filas (id, cupos) recién leídas; los ids que no están en la tabla se ignoran."""
+        if not filas or not len(self):
+            return  # Sin filas suele ser un error de conexión: se quedan los cupos anteriores
+        ids = np.fromiter((fila[0] for fila in filas), dtype=np.int64, count=len(filas))
+        cupos = np.fromiter((fila[1] for fila in filas), dtype=np.int64, count=len(filas))
+        pos, existe = self.ubicar(ids)
+        nuevos = self.cupos.copy()
+        nuevos[pos[existe]] = cupos[existe]
+        self.cupos = nuevos  # Se cambia el arreglo entero: quien esté cotizando sigue con el anterior
+
+    def __len__(self):
+        return len(self.ids)
+
+    def ubicar(self, ids):
+        """Posición de cada id en la tabla (0 si no existe) y si existe, para todos los ids a la vez."""
+        if self.posiciones is not None:
+            dentro = (ids >= 0) & (ids < len(self.posiciones))
+            pos = self.posiciones[np.where(dentro, ids, 0)]
+            existe = dentro & (pos >= 0)
+            return np.where(existe, pos, 0), existe
+        pos = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        return pos, self.ids[pos] == ids
+
+# Con el catálogo vacío se busca en esta fila de relleno (id imposible), así ningún id "existe".
+_TABLA_VACIA = TablaPrecios(
+    np.array([-1], dtype=np.int64), np.zeros(1, np.int64), np.zeros(1, np.int64),
+    np.zeros(1, 'datetime64[D]'), np.zeros(1, 'datetime64[D]')
+)
+
+
+class CotizadorPaquetes:
+    def __init__(self, repo=None, cache=None, refrescar_cupos=5):
+        self.repo = repo or PaquetesRepository()
+        self.cache = cache or cache_paquetes
+        self.refrescar_cupos = refrescar_cupos  # Segundos que se reutilizan los cupos leídos
+        self._tabla = None
+        self._sello = None
+        self._cupos_leidos_en = 0.0
+        self._lock = threading.Lock()
+
+    def tabla(self):
+        """
+        Tabla vigente; se vuelve a armar solo si el catálogo de paquetes cambió desde la última vez.
+        Los cupos se refrescan aparte (ver actualizar_cupos), así las reservas no obligan a rearmarla.
+        """
+        paquetes = self.cache.obtener(self.repo.obtener_todos)
+        sello = self.cache.sello()
+        with self._lock:
+            ahora = time.monotonic()
+            if self._tabla is None or sello != self._sello:
+                self._tabla = TablaPrecios.desde_paquetes(paquetes)
+                self._sello = sello
+                self._cupos_leidos_en = ahora  # Los cupos vinieron junto con el catálogo
+            tabla = self._tabla
+            refrescar = ahora - self._cupos_leidos_en >= self.refrescar_cupos
+            if refrescar:
+                self._cupos_leidos_en = ahora  # Así va a buscarlos un solo hilo
+        # La consulta se hace fuera del candado, para no frenar a los demás hilos que cotizan.
+        if refrescar:
+            tabla.actualizar_cupos(self.repo.obtener_cupos())
+        return tabla
+
+    def cotizar(self, paquete_ids, personas, fechas=None, tabla=None):
+        """
+        Cotiza todas las combinaciones de una vez. 'paquete_ids' es una lista (o arreglo) de ids;
+        'personas' y 'fechas' pueden ser un solo valor (se usa para todas) o una lista del mismo largo.
+        Sin 'fechas', cada paquete se cotiza para su fecha de inicio (como hace la reserva).
+
+        Devuelve un diccionario de arreglos, uno por dato y en el mismo orden que 'paquete_ids':
+        precio_unitario, total, existe, en_fecha (la fecha cae dentro del viaje),
+        con_cupos y disponible (todo lo anterior a la vez).
+        """
+        tabla = tabla if tabla is not None else self.tabla()
+        ids = np.asarray(paquete_ids, dtype=np.int64).reshape(-1)
+        personas = np.broadcast_to(np.asarray(personas, dtype=np.int64), ids.shape)
+
+        if not len(tabla):
+            tabla = _TABLA_VACIA
+
+        pos, existe = tabla.ubicar(ids)
+
+        precio = np.where(existe, tabla.precio[pos], 0)
+        inicio = tabla.inicio[pos]
+        if fechas is None:
+            fechas = inicio
+        else:
+            fechas = np.broadcast_to(np.asarray(fechas, dtype='datetime64[D]'), ids.shape)
+
+        en_fecha = existe & (fechas >= inicio) & (fechas <= tabla.fin[pos])
+        con_cupos = existe & (tabla.cupos[pos] >= personas)
+        return {
+            'paquete_id': ids,
+            'personas': personas,
+            'precio_unitario': precio,
+            'total': precio * personas,
+            'existe': existe,
+            'en_fecha': en_fecha,
+            'con_cupos': con_cupos,
+            'disponible': en_fecha & con_cupos & (personas > 0),
+        }
+
+    def cotizar_lista(self, paquete_ids, personas, fechas=None):
+        """Igual que cotizar(), pero como una lista de diccionarios con tipos de Python (para la API o la interfaz)."""
+        resultado = self.cotizar(paquete_ids, personas, fechas)
+        columnas = {clave: valores.tolist() for clave, valores in resultado.items()}
+        return [dict(zip(columnas, fila)) for fila in zip(*columnas.values())]
+
+    def cotizar_todos(self, personas, fecha=None):
+        """Cotiza todos los paquetes del catálogo para la misma cantidad de personas (y fecha, si se indica)."""
+        tabla = self.tabla()
+        return self.cotizar(tabla.ids, personas, fecha, tabla=tabla)
+
+# Cotizador compartido (lo usan PaquetesService y api.py).
+cotizador_paquetes = CotizadorPaquetes()
@@ -1,11 +1,27 @@
 from persistencia.destinos_repo import DestinosRepository
 
 class DestinosService:
-    def __init__(self, repo: DestinosRepository):
+    def __init__(self, repo: DestinosRepository, recomendador=None):
         self.repo = repo
+        self._recomendador = recomendador
+
+    @property
+    def recomendador(self):
+        # El recomendador trae NumPy, que tarda en importarse: lo cargamos recién cuando se pide una recomendación.
+        if self._recomendador is None:
+            from servicio_negocio.recomendador_destinos import recomendador_destinos
+            self._recomendador = recomendador_destinos
+        return self._recomendador
 
     def obtener_todos_los_destinos(self):
         return self.repo.obtener_todos()
 
     def buscar_destinos(self, query):
-        return self.repo.buscar_por_nombre(query)
\ No newline at end of file
+        return self.repo.buscar_por_nombre(query)
+
+    def recomendar_destinos(self, destino_id, k=5):
+        """
+        Destinos parecidos al elegido (por descripción y actividades) y los que también reservaron quienes lo
+        reservaron: {'similares': [(Destino, similitud)], 'tambien_reservaron': [(Destino, veces)]}.
+        """
+        return self.recomendador.recomendar(destino_id, k)
@@ -0,0 +1,160 @@
+# servicio_negocio/hash_contrasenas.py
+"""
+Hash de contraseñas con scrypt (hashlib), una función 'costosa en memoria' que hace muy lento probar
+millones de contraseñas por fuerza bruta. A cambio, cada login tarda unas décimas de segundo de CPU,
+así que el cálculo se hace en un pool de procesos (no bloquea la ventana ni pelea por el GIL).
+
+Formato guardado en usuarios.password_hash:
+    scrypt$<n>$<r>$<p>$<sal en base64>$<hash en base64>
+Los hashes antiguos (SHA-256 en hexadecimal, 64 caracteres) se siguen aceptando y se reemplazan
+por uno nuevo la próxima vez que el usuario inicia sesión.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from database import leer_configuracion
+from modelos.usuario import Usuario
+
+PREFIJO = 'scrypt'
+N_MINIMO = 2 ** 12
+N_MAXIMO = 2 ** 20
+LARGO_SAL = 16
+LARGO_HASH = 32
+
+def _memoria_maxima(n, r, p):
+    # scrypt necesita unos 128 * r * n bytes (más un margen); hashlib exige declararlo en 'maxmem'.
+    return 128 * r * (n + p + 2) + 1024 * 1024
+
+def _scrypt(password, sal, n, r, p):
+    return hashlib.scrypt(password.encode('utf-8'), salt=sal, n=n, r=r, p=p,
+                          maxmem=_memoria_maxima(n, r, p), dklen=LARGO_HASH)
+
+def _b64(datos):
+    return base64.b64encode(datos).decode('ascii')
+
+def es_legado(hash_guardado):
+    """True si el hash es del formato antiguo (SHA-256 en hexadecimal)."""
+    return not hash_guardado.startswith(PREFIJO + '$')
+
+def _parametros(hash_guardado):
+    _, n, r, p, sal, esperado = hash_guardado.split('$')
+    return int(n), int(r), int(p), base64.b64decode(sal), base64.b64decode(esperado)
+
+# --- Funciones que corren dentro de los procesos del pool (deben estar a nivel de módulo) ---
+
+def generar_hash(password, n, r=8, p=1):
+    """Calcula un hash nuevo con una sal aleatoria."""
+    sal = os.urandom(LARGO_SAL)
+    return f"{PREFIJO}${n}${r}${p}${_b64(sal)}${_b64(_scrypt(password, sal, n, r, p))}"
+
+def comprobar_hash(hash_guardado, password):
+    """Compara una contraseña con el hash guardado (scrypt o SHA-256 antiguo) en tiempo constante."""
+    if not hash_guardado:
+        return False
+    if es_legado(hash_guardado):
+        return hmac.compare_digest(hash_guardado, Usuario.hash_password(password))
+    # Un hash truncado o con parámetros que scrypt no acepta (n que no es potencia de 2, memoria de más)
+    # cuenta como contraseña incorrecta, no como error del login.
+    try:
+        n, r, p, sal, esperado = _parametros(hash_guardado)
+        return hmac.compare_digest(esperado, _scrypt(password, sal, n, r, p))
+    except (ValueError, OverflowError):
+        return False
+
+def calibrar_costo(objetivo_ms=100, r=8, p=1):
+    """
+    Busca el 'n' (potencia de 2) más pequeño cuyo hash tarda al menos objetivo_ms en esta máquina.
+    Así el costo se ajusta solo: en un equipo más rápido, n sube y el atacante no gana terreno.
+    """
+    n = N_MINIMO
+    while n < N_MAXIMO:
+        inicio = time.perf_counter()
+        _scrypt('calibracion', b'\0' * LARGO_SAL, n, r, p)
+        if (time.perf_counter() - inicio) * 1000 >= objetivo_ms:
+            break
+        n *= 2
+    return n
+
+
+class HasherContrasenas:
+    """
+    Genera y verifica hashes usando un pool de procesos. Los métodos bloquean al hilo que los llama
+    (en la interfaz, un hilo del EjecutorTareas), pero varios logins a la vez se reparten entre núcleos.
+    """
+
+    def __init__(self, n=None, r=8, p=1, objetivo_ms=100, procesos=None):
+        self._n = n                 # Si es None se calibra la primera vez que se necesita
+        self.r = r
+        self.p = p
+        self.objetivo_ms = objetivo_ms
+        # Con procesos=0 se calcula en el mismo hilo, sin pool (útil si quien llama ya es uno de varios procesos).
+        self.procesos = procesos if procesos is not None else (os.cpu_count() or 1)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def desde_config(cls):
+        """Crea el hasher con las opciones de 'HASH_CONFIG' en config.json (todas opcionales)."""
+        opciones = leer_configuracion('HASH_CONFIG')
+        return cls(n=opciones.get('n'), r=opciones.get('r', 8), p=opciones.get('p', 1),
+                   objetivo_ms=opciones.get('objetivo_ms', 100), procesos=opciones.get('procesos'))
+
+    @property
+    def n(self):
+        if self._n is None:
+            with self._lock:
+                if self._n is None:
+                    self._n = calibrar_costo(self.objetivo_ms, self.r, self.p)
+        return self._n
+
+    def _ejecutar(self, funcion, *args):
+        if self.procesos == 0:
+            return funcion(*args)  # Sin pool: en el hilo que llama (ver servidor_http.py)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.procesos)
+            pool = self._pool
+        try:
+            return pool.submit(funcion, *args).result()
+        except (BrokenProcessPool, OSError, RuntimeError) as e:
+            # Sin procesos disponibles (por ejemplo, si el sistema no permite crearlos) lo calculamos aquí mismo.
+            print(f"Aviso: pool de hash no disponible ({e}); se calcula en el hilo actual.")
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            return funcion(*args)
+
+    def hashear(self, password):
+        return self._ejecutar(generar_hash, password, self.n, self.r, self.p)
+
+    def verificar(self, hash_guardado, password):
+        return self._ejecutar(comprobar_hash, hash_guardado, password)
+
+    def necesita_rehash(self, hash_guardado):
+        """True si el hash es antiguo (SHA-256) o se generó con un costo menor que el actual."""
+        if es_legado(hash_guardado):
+            return True
+        try:
+            n, r, p, _, _ = _parametros(hash_guardado)
+        except ValueError:
+            return True
+        return n < self.n or r != self.r or p != self.p
+
+    def precalentar(self):
+        """Calibra el costo y arranca los procesos del pool antes del primer login (en segundo plano)."""
+        self._ejecutar(_memoria_maxima, self.n, self.r, self.p)
+
+    def cerrar(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+hasher = HasherContrasenas.desde_config()
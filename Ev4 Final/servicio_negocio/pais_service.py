@@ -1,15 +1,23 @@
-import requests
 from io import BytesIO
-from PIL import Image, ImageTk
+import os
+from servicio_negocio.cache_persistente import CachePersistente
+
+# 'requests' y 'PIL' se importan dentro de los métodos que los usan: tardan en cargarse y solo hacen
+# falta cuando el cliente abre la información de un país, así no retrasan el arranque de la aplicación.
+
+# Carpeta donde se guardan los datos de países y las banderas entre ejecuciones
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'paises')
 
 class PaisService:
-    def __init__(self):
+    def __init__(self, cache=None):
         # API pública y gratuita V3.1
         self.base_url = "https://restcountries.com/v3.1/name"
         # Agregamos User-Agent para evitar bloqueos por parte de la API
         self.headers = {
             'User-Agent': 'AgenciaViajesPrototipo/1.0'
         }
+        # Caché de países: 1 semana de vigencia, 128 países en memoria y hasta 20 MB en disco
+        self.cache = cache or CachePersistente(CACHE_DIR)
 
     def obtener_info_pais(self, nombre_pais):
         """
@@ -71,61 +79,95 @@ class PaisService:
         
         busqueda = correcciones.get(nombre_pais, nombre_pais)
 
-        try:
-            # fullText=false para permitir búsquedas parciales si es necesario
-            url = f"{self.base_url}/{busqueda}"
-            # Aumentamos el timeout y agregamos headers para mayor estabilidad
-            response = requests.get(url, headers=self.headers, timeout=10)
-            
-            if response.status_code == 200:
-                data_list = response.json()
-                
-                # Intentamos buscar la coincidencia más exacta para evitar errores (ej. India vs British Indian Ocean Territory)
-                data = data_list[0] # Por defecto tomamos el primero
-                for p in data_list:
-                    # Verificamos nombre común en inglés
-                    if p.get('name', {}).get('common', '').lower() == busqueda.lower():
-                        data = p
-                        break
-                    # Verificamos traducción en español
-                    if p.get('translations', {}).get('spa', {}).get('common', '').lower() == nombre_pais.lower():
-                        data = p
-                        break
-                
-                nombre_oficial = data.get('name', {}).get('common', nombre_pais)
-                capital = data.get('capital', ['N/A'])[0]
-                poblacion = data.get('population', 0)
-                region = data.get('region', 'N/A')
-                
-                # --- Obtener Bandera ---
-                bandera_tk = None
-                flag_url = data.get('flags', {}).get('png')
-                if flag_url:
-                    try:
-                        img_resp = requests.get(flag_url, headers=self.headers, timeout=5)
-                        if img_resp.status_code == 200:
-                            img_data = BytesIO(img_resp.content)
-                            pil_img = Image.open(img_data)
-                            # Redimensionamos para que no sea gigante (ancho 150px)
-                            base_width = 150
-                            w_percent = (base_width / float(pil_img.size[0]))
-                            h_size = int((float(pil_img.size[1]) * float(w_percent)))
-                            pil_img = pil_img.resize((base_width, h_size), Image.Resampling.LANCZOS)
-                            bandera_tk = ImageTk.PhotoImage(pil_img)
-                    except Exception:
-                        pass # Si falla la imagen, no rompemos el flujo, solo no se muestra
-
-                # Formateamos el texto para mostrarlo en la app
-                info = (
-                    f"País: {nombre_oficial}\n"
-                    f"Capital: {capital}\n"
-                    f"Región: {region}\n"
-                    f"Población: {poblacion:,.0f} habs."
-                )
-                return True, info, bandera_tk
-            else:
-                print(f"Error API Países: {response.status_code} para {busqueda}")
+        # 1. Primero miramos la caché (memoria y disco): si ya buscamos este país hace poco, no tocamos la red.
+        clave = busqueda.lower()
+        cacheado = self.cache.obtener(clave)
+        if cacheado:
+            datos, bandera_png = cacheado
+        else:
+            try:
+                datos, bandera_png = self._descargar_pais(busqueda, nombre_pais)
+            except Exception as e:
+                print(f"Excepción API Países: {e}")
+                return False, "Error de conexión.", None
+            if datos is None:
                 return False, "Información no disponible.", None
-        except Exception as e:
-            print(f"Excepción API Países: {e}")
-            return False, "Error de conexión.", None
\ No newline at end of file
+            self.cache.guardar(clave, datos, bandera_png)
+
+        # 2. Convertimos la bandera (ya redimensionada) en una imagen que Tkinter pueda mostrar.
+        bandera_tk = None
+        if bandera_png:
+            try:
+                from PIL import Image, ImageTk
+                bandera_tk = ImageTk.PhotoImage(Image.open(BytesIO(bandera_png)))
+            except Exception:
+                pass # Si falla la imagen, no rompemos el flujo, solo no se muestra
+
+        # Formateamos el texto para mostrarlo en la app
+        info = (
+            f"País: {datos['nombre_oficial']}\n"
+            f"Capital: {datos['capital']}\n"
+            f"Región: {datos['region']}\n"
+            f"Población: {datos['poblacion']:,.0f} habs."
+        )
+        return True, info, bandera_tk
+
+    def _descargar_pais(self, busqueda, nombre_pais):
+        """
+        Consulta la API de países y descarga la bandera ya redimensionada.
+        Retorna: (datos_del_pais, bandera_png_bytes) o (None, None) si la API no tiene el país.
+        """
+        # fullText=false para permitir búsquedas parciales si es necesario
+        import requests
+        from PIL import Image
+
+        url = f"{self.base_url}/{busqueda}"
+        # Aumentamos el timeout y agregamos headers para mayor estabilidad
+        response = requests.get(url, headers=self.headers, timeout=10)
+
+        if response.status_code != 200:
+            print(f"Error API Países: {response.status_code} para {busqueda}")
+            return None, None
+
+        data_list = response.json()
+
+        # Intentamos buscar la coincidencia más exacta para evitar errores (ej. India vs British Indian Ocean Territory)
+        data = data_list[0] # Por defecto tomamos el primero
+        for p in data_list:
+            # Verificamos nombre común en inglés
+            if p.get('name', {}).get('common', '').lower() == busqueda.lower():
+                data = p
+                break
+            # Verificamos traducción en español
+            if p.get('translations', {}).get('spa', {}).get('common', '').lower() == nombre_pais.lower():
+                data = p
+                break
+
+        datos = {
+            'nombre_oficial': data.get('name', {}).get('common', nombre_pais),
+            'capital': data.get('capital', ['N/A'])[0],
+            'poblacion': data.get('population', 0),
+            'region': data.get('region', 'N/A'),
+        }
+
+        # --- Obtener Bandera ---
+        bandera_png = None
+        flag_url = data.get('flags', {}).get('png')
+        if flag_url:
+            try:
+                img_resp = requests.get(flag_url, headers=self.headers, timeout=5)
+                if img_resp.status_code == 200:
+                    pil_img = Image.open(BytesIO(img_resp.content))
+                    # Redimensionamos para que no sea gigante (ancho 150px)
+                    base_width = 150
+                    w_percent = (base_width / float(pil_img.size[0]))
+                    h_size = int((float(pil_img.size[1]) * float(w_percent)))
+                    pil_img = pil_img.resize((base_width, h_size), Image.Resampling.LANCZOS)
+                    # Guardamos la imagen ya redimensionada, así la próxima vez no hay que repetir el LANCZOS
+                    salida = BytesIO()
+                    pil_img.save(salida, format='PNG')
+                    bandera_png = salida.getvalue()
+            except Exception:
+                pass # Si falla la imagen, no rompemos el flujo, solo no se muestra
+
+        return datos, bandera_png
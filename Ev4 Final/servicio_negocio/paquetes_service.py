@@ -1,14 +1,31 @@
 from persistencia.paquetes_repo import PaquetesRepository
-from database import crear_conexion
-from mysql.connector import Error
+from persistencia.motor_reservas import motor_reservas
 
 class PaquetesService:
-    def __init__(self, repo=None):
+    def __init__(self, repo=None, cotizador=None):
         self.repo = repo or PaquetesRepository()
+        self._cotizador = cotizador
+
+    @property
+    def cotizador(self):
+        # El cotizador trae NumPy, que tarda en importarse: lo cargamos recién cuando se cotiza por primera vez.
+        if self._cotizador is None:
+            from servicio_negocio.cotizador_paquetes import cotizador_paquetes
+            self._cotizador = cotizador_paquetes
+        return self._cotizador
 
     def obtener_todos_los_paquetes(self):
         return self.repo.obtener_todos()
 
+    def cotizar_paquetes(self, paquete_ids, personas, fechas=None):
+        """Precio y disponibilidad de muchas combinaciones (paquete, personas, fecha) en una sola llamada."""
+        return self.cotizador.cotizar_lista(paquete_ids, personas, fechas)
+
+    def cotizar_todos(self, personas):
+        """Total de cada paquete del catálogo para 'personas' viajeros: {paquete_id: total}."""
+        resultado = self.cotizador.cotizar_todos(personas)
+        return dict(zip(resultado['paquete_id'].tolist(), resultado['total'].tolist()))
+
     def procesar_reserva_paquete(self, usuario_id, paquete_id, cantidad_personas):
         if not paquete_id or not cantidad_personas:
             return False, "Datos incompletos."
@@ -19,32 +36,9 @@ class PaquetesService:
         except ValueError:
             return False, "Cantidad de personas inválida."
 
-        paquete = self.repo.obtener_por_id(paquete_id)
-        if not paquete:
-            return False, "Paquete no encontrado."
-            
-        if paquete.cupos < cantidad:
-            return False, "No hay suficientes cupos disponibles."
-
-        conexion = crear_conexion()
-        if not conexion: return False, "Error de conexión."
-        
-        cursor = conexion.cursor()
-        try:
-            # Usamos la fecha de inicio del paquete como fecha de reserva
-            fecha_reserva = paquete.fecha_inicio
-            
-            query_reserva = "INSERT INTO reservas (usuario_id, paquete_id, fecha_reserva, cantidad_personas) VALUES (%s, %s, %s, %s)"
-            cursor.execute(query_reserva, (usuario_id, paquete_id, fecha_reserva, cantidad))
-            
-            query_cupos = "UPDATE paquetes SET cupos = cupos - %s WHERE id = %s"
-            cursor.execute(query_cupos, (cantidad, paquete_id))
-            
-            conexion.commit()
-            return True, f"Reserva del paquete '{paquete.nombre}' realizada con éxito."
-        except Error as e:
-            conexion.rollback()
-            return False, f"Error al procesar reserva: {e}"
-        finally:
-            cursor.close()
-            conexion.close()
\ No newline at end of file
+        # La comprobación de cupos y el descuento se hacen juntos y de forma atómica en el motor,
+        # así dos personas reservando a la vez nunca pueden llevarse el mismo cupo.
+        resultado = motor_reservas.reservar_paquete(usuario_id, paquete_id, cantidad)
+        if resultado.exito:
+            return True, f"Reserva del paquete '{resultado.nombre}' realizada con éxito. Quedan {resultado.cupos_restantes} cupos."
+        return False, resultado.mensaje
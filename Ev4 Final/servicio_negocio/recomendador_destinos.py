@@ -0,0 +1,390 @@
+# servicio_negocio/recomendador_destinos.py
+"""
+Recomendaciones de destinos, de dos tipos:
+
+  * Parecidos: destinos con descripción y actividades parecidas. Cada destino es un vector TF-IDF
+    (cuánto pesa cada palabra en su texto, descontando las palabras que aparecen en casi todos) y el
+    parecido es la similitud coseno entre vectores. Cada actividad completa ('Museo del Louvre') cuenta
+    además como un término propio, así coincidir en una actividad pesa más que compartir una palabra suelta.
+  * También reservaron: destinos que reservaron las mismas personas que reservaron este
+    (co-ocurrencia en 'reservas'; una reserva de paquete cuenta para cada destino del paquete).
+
+Los vectores no se guardan como una matriz densa (destinos x palabras, casi toda ceros), sino como un índice
+invertido en arreglos de NumPy: para cada término, en qué destinos aparece y con qué peso. Puntuar un lote de
+destinos es juntar las listas de sus términos y sumarlas con un solo np.bincount, sin bucles de Python por
+destino ni por término: el trabajo depende de cuántos destinos comparten términos con los consultados, no del
+tamaño del catálogo.
+
+Actualización incremental (igual que el índice de búsqueda, ver persistencia/indice_busqueda.py): cuando cambia
+el catálogo, solo se vuelven a procesar los destinos cuyo texto cambió, que van a un segundo índice pequeño; sus
+versiones viejas quedan marcadas como borradas. Cuando ese índice crece demasiado, se rearma todo de una vez.
+Las co-reservas se completan pidiendo solo las reservas nuevas (de id mayor a la última leída); de vez en cuando
+se releen todas, para que las cancelaciones también se noten.
+"""
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+from persistencia.cache_catalogo import cache_destinos
+from persistencia.destinos_repo import DestinosRepository
+from persistencia.reservas_repo import ReservasRepository
+
+# Palabras demasiado comunes para distinguir un destino de otro (ya normalizadas: sin acentos ni mayúsculas).
+PALABRAS_VACIAS = frozenset("""
+    a al algo ante antes como con contra cual cuando de del desde donde durante e el ella ellas ellos en entre
+    era es esa esas ese eso esos esta estas este esto estos fue ha han hasta hay la las le les lo los mas muy
+    ni no nos o otra otras otro otros para pero poco por porque que se ser si sin sobre su sus tambien te tiene
+    tienen todo todos tu un una unas uno unos y ya and of the
+""".split())
+
+MAX_DESTINOS_POR_USUARIO = 200  # Usuarios con más destinos (agencias, pruebas) no cuentan para 'también reservaron'
+_MAX_CELDAS = 1_000_000         # Tamaño máximo de la matriz de puntajes de un tramo del lote (consultas x destinos)
+
+@lru_cache(maxsize=None)
+def _termino(palabra):
+    """
+    Término de una palabra (None si no sirve para comparar): el plural pasa a singular, lo justo para que
+    'templos' y 'templo' o 'ciudades' y 'ciudad' cuenten igual. Se recuerda cada palabra ya vista: en un
+    catálogo grande, las mismas palabras se repiten miles de veces.
+    """
+    if len(palabra) <= 2 or palabra in PALABRAS_VACIAS or palabra.isdigit():
+        return None
+    if len(palabra) > 4 and palabra.endswith('es') and palabra[-3] in 'dnr':
+        return palabra[:-2]
+    if len(palabra) > 3 and palabra.endswith('s') and palabra[-2] in 'aeiou':
+        return palabra[:-1]
+    return palabra
+
+def _a_ascii(texto):
+    """
+    Minúsculas y sin acentos, como normalizar() del índice de búsqueda, pero descartando de una vez todo lo que
+    no es ASCII (de todos modos solo se usan letras y números): con 100.000 destinos, arma el catálogo varias veces
+    más rápido que quitar las marcas de acento letra por letra.
+    """
+    texto = (texto or '').casefold()
+    return texto if texto.isascii() else unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+def _palabras(texto):
+    return [t for t in map(_termino, re.findall(r'[a-z0-9]+', texto)) if t]
+
+def terminos_de(descripcion, actividades):
+    """Términos de un destino con su cantidad de apariciones: las palabras del texto y cada actividad completa."""
+    actividades = _a_ascii(actividades)
+    terminos = Counter(_palabras(_a_ascii(descripcion)))
+    for actividad in actividades.split(','):
+        palabras = _palabras(actividad)
+        terminos.update(palabras)
+        if len(palabras) > 1:
+            terminos['@' + ' '.join(palabras)] += 1
+    return terminos
+
+def _rangos(inicios, largos):
+    """Todas las posiciones de los tramos [inicio, inicio + largo), una detrás de otra, sin bucles de Python."""
+    total = int(largos.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    desplazamiento = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(largos) - largos, largos)
+    return np.repeat(inicios, largos) + desplazamiento
+
+def _mejores(puntajes, k):
+    """Los k mejores puntajes de cada fila (de mayor a menor) como (columnas, puntajes)."""
+    k = min(k, puntajes.shape[1])
+    if k <= 0:
+        return np.zeros((len(puntajes), 0), dtype=np.int64), np.zeros((len(puntajes), 0))
+    columnas = np.argpartition(-puntajes, k - 1, axis=1)[:, :k]
+    elegidos = np.take_along_axis(puntajes, columnas, axis=1)
+    orden = np.argsort(-elegidos, axis=1, kind='stable')
+    return np.take_along_axis(columnas, orden, axis=1), np.take_along_axis(elegidos, orden, axis=1)
+
+
+class _Postings:
+    """
+    Índice invertido de un grupo de filas: para cada término t, las filas donde aparece son
+    filas[inicio[t]:inicio[t + 1]], con los pesos en la misma posición de 'pesos'.
+    """
+    __slots__ = ('inicio', 'filas', 'pesos')
+
+    def __init__(self, filas, terminos, pesos, num_terminos):
+        orden = np.argsort(terminos, kind='stable')
+        self.inicio = np.zeros(num_terminos + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terminos, minlength=num_terminos), out=self.inicio[1:])
+        self.filas = filas[orden]
+        self.pesos = pesos[orden]
+
+    def buscar(self, terminos):
+        """Para una lista de términos, devuelve (posición del término en la lista, fila, peso) de todas sus apariciones."""
+        dentro = terminos < len(self.inicio) - 1  # Términos nuevos, que este índice todavía no conoce
+        t = np.where(dentro, terminos, 0)
+        inicios = self.inicio[t]
+        largos = np.where(dentro, self.inicio[t + 1] - inicios, 0)
+        posiciones = _rangos(inicios, largos)
+        return np.repeat(np.arange(len(terminos)), largos), self.filas[posiciones], self.pesos[posiciones]
+
+
+class RecomendadorDestinos:
+    def __init__(self, repo=None, reservas_repo=None, cache=None, intervalo_reservas=60, recarga_completa=3600):
+        self.repo = repo or DestinosRepository()
+        self.reservas_repo = reservas_repo or ReservasRepository()
+        self.cache = cache or cache_destinos
+        self.intervalo_reservas = intervalo_reservas  # Cada cuánto (segundos) se buscan reservas nuevas
+        self.recarga_completa = recarga_completa      # Cada cuánto se releen todas (para notar las cancelaciones)
+        self._lock = threading.RLock()
+        self.sello = None
+        self._vaciar_texto()
+        self._vaciar_reservas()
+
+    # --- Vectores TF-IDF ---
+
+    def _vaciar_texto(self):
+        self._vocabulario = {}                     # término -> número de término
+        self._df = np.zeros(0, dtype=np.int64)     # En cuántos destinos vigentes aparece cada término
+        self._idf = np.zeros(0, dtype=np.float64)
+        # Una 'fila' por versión de cada destino (en formato CSR: sus términos son terminos[inicio[f]:inicio[f + 1]]).
+        self._inicio = np.zeros(1, dtype=np.int64)
+        self._fila_de = np.zeros(0, dtype=np.int64)    # Fila de cada posición de 'terminos' (para sumar por fila)
+        self._terminos = np.zeros(0, dtype=np.int64)
+        self._tf = np.zeros(0, dtype=np.float64)       # 1 + log(apariciones)
+        self._ids = np.zeros(0, dtype=np.int64)        # Id del destino de cada fila
+        self._vigente = np.zeros(0, dtype=bool)        # False si el destino cambió o se borró después
+        self._inversa = np.zeros(0, dtype=np.float64)  # 1 / norma del vector de cada fila (0 si no está vigente)
+        self._fila_por_id = {}                         # id -> fila vigente
+        self._textos = {}                              # id -> (descripcion, actividades) indexados
+        self._destinos = {}                            # id -> Destino
+        self._principal = None                         # Índice invertido de las filas [0, _filas_principal)
+        self._filas_principal = 0
+        self._reciente = None                          # Índice invertido de las filas agregadas después
+
+    def __len__(self):
+        return len(self._fila_por_id)
+
+    def _agregar_filas(self, destinos):
+        """Procesa el texto de los destinos y los agrega como filas nuevas (vigentes) al final."""
+        filas, terminos, apariciones = [], [], []
+        primera = len(self._ids)
+        for i, d in enumerate(destinos):
+            for termino, veces in terminos_de(d.descripcion, d.actividades).items():
+                numero = self._vocabulario.get(termino)
+                if numero is None:
+                    numero = self._vocabulario[termino] = len(self._vocabulario)
+                filas.append(primera + i)
+                terminos.append(numero)
+                apariciones.append(veces)
+            self._fila_por_id[d.id] = primera + i
+            self._textos[d.id] = (d.descripcion, d.actividades)
+
+        filas = np.array(filas, dtype=np.int64)
+        terminos = np.array(terminos, dtype=np.int64)
+        self._inicio = np.concatenate([self._inicio, self._inicio[-1] + np.cumsum(np.bincount(filas - primera, minlength=len(destinos)))])
+        self._fila_de = np.concatenate([self._fila_de, filas])
+        self._terminos = np.concatenate([self._terminos, terminos])
+        self._tf = np.concatenate([self._tf, 1 + np.log(np.array(apariciones, dtype=np.float64))])
+        self._ids = np.concatenate([self._ids, np.fromiter((d.id for d in destinos), dtype=np.int64, count=len(destinos))])
+        self._vigente = np.concatenate([self._vigente, np.ones(len(destinos), dtype=bool)])
+        self._df = np.concatenate([self._df, np.zeros(len(self._vocabulario) - len(self._df), dtype=np.int64)])
+        self._df += np.bincount(terminos, minlength=len(self._vocabulario))
+
+    def _retirar(self, destino_id):
+        """Marca como no vigente la fila de un destino (que cambió o se borró) y descuenta sus términos."""
+        fila = self._fila_por_id.pop(destino_id)
+        self._textos.pop(destino_id)
+        self._vigente[fila] = False
+        self._df[self._terminos[self._inicio[fila]:self._inicio[fila + 1]]] -= 1
+
+    def _recalcular_pesos(self):
+        """IDF de cada término y largo (norma) del vector de cada fila: pocas operaciones sobre arreglos completos."""
+        vigentes = len(self._fila_por_id)
+        self._idf = np.log((1 + vigentes) / (1 + self._df)) + 1
+        pesos = self._tf * self._idf[self._terminos]
+        norma = np.sqrt(np.bincount(self._fila_de, weights=pesos * pesos, minlength=len(self._ids)))
+        # Con la inversa en 0, las filas viejas y los destinos sin texto puntúan 0 sin tener que filtrarlos aparte.
+        self._inversa = np.zeros(len(norma))
+        np.divide(1, norma, out=self._inversa, where=self._vigente & (norma > 0))
+
+    def reconstruir(self, destinos):
+        """Arma todo desde cero con la lista de destinos."""
+        with self._lock:
+            self._vaciar_texto()
+            self._destinos = {d.id: d for d in destinos}
+            self._agregar_filas(list(self._destinos.values()))
+            self._principal = _Postings(self._fila_de, self._terminos, self._tf, len(self._vocabulario))
+            self._filas_principal = len(self._ids)
+            self._recalcular_pesos()
+
+    def sincronizar(self, destinos, sello=None):
+        """
+        Pone los vectores al día con el catálogo. Solo procesa los destinos que aparecieron, desaparecieron
+        o cambiaron de descripción o actividades; si cambió buena parte del catálogo, o ya hay muchas filas
+        viejas o agregadas aparte, sale más barato rearmar todo.
+        """
+        with self._lock:
+            if sello is not None and sello == self.sello:
+                return
+            nuevos = {d.id: d for d in destinos}
+            cambios = [d for d in nuevos.values() if self._textos.get(d.id) != (d.descripcion, d.actividades)]
+            borrados = [destino_id for destino_id in self._fila_por_id if destino_id not in nuevos]
+            # Filas que habrá fuera del índice principal y filas viejas que seguirán ocupando lugar en él.
+            filas_extra = len(self._ids) - self._filas_principal + len(cambios)
+            filas_viejas = len(self._ids) - len(self._fila_por_id) + len(cambios) + len(borrados)
+            if not self._fila_por_id or len(cambios) + len(borrados) > len(nuevos) // 10 \
+                    or max(filas_extra, filas_viejas) > max(1000, len(nuevos) // 10):
+                self.reconstruir(destinos)
+            elif cambios or borrados:
+                for destino_id in borrados:
+                    self._retirar(destino_id)
+                for d in cambios:
+                    if d.id in self._fila_por_id:
+                        self._retirar(d.id)
+                self._agregar_filas(cambios)
+                # El índice de las filas agregadas aparte es pequeño: se rearma entero en cada cambio.
+                desde = self._inicio[self._filas_principal]
+                self._reciente = _Postings(self._fila_de[desde:], self._terminos[desde:], self._tf[desde:], len(self._vocabulario))
+                self._recalcular_pesos()
+            self._destinos = nuevos
+            self.sello = sello
+
+    def _al_dia(self):
+        destinos = self.repo.obtener_todos()
+        if destinos:
+            self.sincronizar(destinos, self.cache.sello())
+
+    def _puntajes_texto(self, filas):
+        """Similitud coseno de cada fila consultada contra todas las filas, como matriz (consultas x filas)."""
+        largos = self._inicio[filas + 1] - self._inicio[filas]
+        posiciones = _rangos(self._inicio[filas], largos)
+        consulta = np.repeat(np.arange(len(filas)), largos)
+        terminos = self._terminos[posiciones]
+        # Peso de la consulta por peso del destino: (tf * idf) * (tf * idf), dividido por las dos normas. El idf
+        # y las normas se aplican aquí (y no al guardar) para que cambiarlos tras una actualización no obligue
+        # a tocar los índices.
+        pesos = self._tf[posiciones] * self._idf[terminos] ** 2 * self._inversa[filas][consulta]
+
+        total_filas = len(self._ids)
+        puntajes = np.zeros(len(filas) * total_filas)
+        for indice in (self._principal, self._reciente):
+            if indice is None:
+                continue
+            cual, fila, peso = indice.buscar(terminos)
+            puntajes += np.bincount(consulta[cual] * total_filas + fila, weights=pesos[cual] * peso * self._inversa[fila],
+                                    minlength=len(puntajes))
+        puntajes = puntajes.reshape(len(filas), total_filas)
+        puntajes[np.arange(len(filas)), filas] = 0  # Un destino no se recomienda a sí mismo
+        return puntajes
+
+    def similares(self, destino_ids, k=5):
+        """
+        Para cada destino de la lista, sus k destinos más parecidos como lista de (id, similitud entre 0 y 1),
+        de más a menos parecido. Los destinos que no existen reciben una lista vacía.
+        El lote se puntúa por tramos, para que la matriz de puntajes no ocupe demasiada memoria.
+        """
+        self._al_dia()
+        with self._lock:
+            resultado = [[] for _ in destino_ids]
+            conocidos = [(i, self._fila_por_id[d]) for i, d in enumerate(destino_ids) if d in self._fila_por_id]
+            tramo = max(1, _MAX_CELDAS // max(1, len(self._ids)))
+            for desde in range(0, len(conocidos), tramo):
+                parte = conocidos[desde:desde + tramo]
+                puntajes = self._puntajes_texto(np.array([fila for _, fila in parte], dtype=np.int64))
+                columnas, mejores = _mejores(puntajes, k)
+                for (i, _), cols, valores in zip(parte, columnas, mejores):
+                    resultado[i] = [(int(self._ids[c]), round(float(v), 4)) for c, v in zip(cols, valores) if v > 0]
+            return resultado
+
+    # --- Co-reservas ---
+
+    def _vaciar_reservas(self):
+        self._pares = np.zeros(0, dtype=np.int64)  # usuario_id << 32 | destino_id, sin repetidos y ordenados
+        self._ultima_reserva = 0
+        self._leidas_en = float('-inf')            # Cuándo se buscaron reservas nuevas por última vez
+        self._completas_en = float('-inf')         # Cuándo se releyeron todas por última vez
+        self._destinos_reservados = np.zeros(0, dtype=np.int64)  # Ids de destino (ordenados) -> número de columna
+        self._usuarios_de = None                   # Por destino: usuarios que lo reservaron
+        self._destinos_de = None                   # Por usuario: destinos que reservó
+
+    def agregar_reservas(self, filas, reemplazar=False):
+        """
+        Suma filas (reserva_id, usuario_id, destino_id) a las co-reservas (o, con reemplazar=True, las usa en
+        lugar de las que había) y rearma sus dos índices (destino -> usuarios y usuario -> destinos) con unas
+        pocas operaciones sobre arreglos.
+        """
+        with self._lock:
+            if not filas:
+                return
+            datos = np.array(filas, dtype=np.int64).reshape(-1, 3)
+            anteriores = np.zeros(0, dtype=np.int64) if reemplazar else self._pares
+            self._ultima_reserva = max(0 if reemplazar else self._ultima_reserva, int(datos[:, 0].max()))
+            self._pares = np.union1d(anteriores, (datos[:, 1] << 32) | datos[:, 2])
+
+            usuarios, destinos = self._pares >> 32, self._pares & 0xFFFFFFFF
+            self._destinos_reservados, columnas = np.unique(destinos, return_inverse=True)
+            _, fila_usuario = np.unique(usuarios, return_inverse=True)
+            # Los usuarios con demasiados destinos harían crecer mucho la suma y dicen poco: no cuentan.
+            por_usuario = np.bincount(fila_usuario)
+            cuentan = por_usuario[fila_usuario] <= MAX_DESTINOS_POR_USUARIO
+            self._usuarios_de = _Postings(fila_usuario[cuentan], columnas[cuentan], np.ones(int(cuentan.sum())),
+                                          len(self._destinos_reservados))
+            self._destinos_de = _Postings(columnas[cuentan], fila_usuario[cuentan], np.ones(int(cuentan.sum())),
+                                          len(por_usuario))
+
+    def _reservas_al_dia(self):
+        """Pide las reservas nuevas (o todas, si toca releerlas) como mucho una vez cada 'intervalo_reservas'."""
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora - self._leidas_en < self.intervalo_reservas:
+                return
+            completa = ahora - self._completas_en >= self.recarga_completa
+            self._leidas_en = ahora
+            desde = 0 if completa else self._ultima_reserva
+        # La consulta va fuera del bloqueo: mientras tanto se sigue respondiendo con lo que ya había.
+        filas = self.reservas_repo.pares_usuario_destino(desde)
+        # Una relectura vacía suele ser un error de conexión: no borra lo que ya había.
+        if completa and filas:
+            self._completas_en = ahora
+        self.agregar_reservas(filas, reemplazar=completa)
+
+    def tambien_reservaron(self, destino_ids, k=5):
+        """
+        Para cada destino de la lista, los k destinos que más reservaron quienes lo reservaron, como lista de
+        (id, cantidad de personas que reservaron los dos), de más a menos. Todo el lote se suma a la vez.
+        """
+        self._reservas_al_dia()
+        with self._lock:
+            resultado = [[] for _ in destino_ids]
+            if self._usuarios_de is None or not len(destino_ids):
+                return resultado
+            total = len(self._destinos_reservados)
+            ids = np.asarray(destino_ids, dtype=np.int64)
+            columnas = np.minimum(np.searchsorted(self._destinos_reservados, ids), total - 1)
+            conocidos = np.flatnonzero(self._destinos_reservados[columnas] == ids)
+            tramo = max(1, _MAX_CELDAS // total)
+            for desde in range(0, len(conocidos), tramo):
+                parte = conocidos[desde:desde + tramo]
+                # Destino -> usuarios que lo reservaron -> otros destinos de esos usuarios.
+                consulta, usuarios, _ = self._usuarios_de.buscar(columnas[parte])
+                cual, otros, _ = self._destinos_de.buscar(usuarios)
+                cuentas = np.bincount(consulta[cual] * total + otros, minlength=len(parte) * total)
+                cuentas = cuentas.reshape(len(parte), total)
+                cuentas[np.arange(len(parte)), columnas[parte]] = 0
+                mejores_cols, mejores = _mejores(cuentas, k)
+                for i, cols, valores in zip(parte, mejores_cols, mejores):
+                    resultado[i] = [(int(self._destinos_reservados[c]), int(v)) for c, v in zip(cols, valores) if v > 0]
+            return resultado
+
+    # --- Para la interfaz y la API ---
+
+    def recomendar(self, destino_id, k=5):
+        """Los destinos parecidos y los que también reservaron, como objetos Destino (los que sigan existiendo)."""
+        similares = self.similares([destino_id], k)[0]
+        tambien = self.tambien_reservaron([destino_id], k)[0]
+        with self._lock:
+            return {
+                'similares': [(self._destinos[i], puntaje) for i, puntaje in similares if i in self._destinos],
+                'tambien_reservaron': [(self._destinos[i], veces) for i, veces in tambien if i in self._destinos],
+            }
+
+# Recomendador compartido (lo usan DestinosService y api.py).
+recomendador_destinos = RecomendadorDestinos()
@@ -1,12 +1,26 @@
 # servicio_negocio/reserva_service.py
-from datetime import date
+import csv
+from datetime import date, timedelta
 from persistencia.reservas_repo import ReservasRepository
+from persistencia.exportador_reservas import exportar_historial
+from persistencia.inventario_destinos import InventarioRepository, MAX_NOCHES
+from persistencia.motor_reservas import ResultadoReserva
 from modelos.reserva import Reserva
 
+# Máximo de reservas en un lote: todas van en una misma transacción (y un mismo INSERT)
+MAX_RESERVAS_LOTE = 500
+
+# Columnas del manifiesto CSV de un grupo (una reserva por línea; 'noches' es opcional y vale 1 si falta):
+#   tipo,id,fecha,personas,noches
+#   paquete,3,,4,             <- sin fecha: la de inicio del paquete
+#   destino,1005,2026-05-12,2,3
+COLUMNAS_MANIFIESTO = ('tipo', 'id', 'fecha', 'personas', 'noches')
+
 class ReservaService:
-    def __init__(self, reservas_repository: ReservasRepository):
+    def __init__(self, reservas_repository: ReservasRepository, inventario_repository: InventarioRepository = None):
         # 🔑 Inyección de Dependencias: El servicio necesita un Repositorio para funcionar.
         self.repo = reservas_repository
+        self.inventario = inventario_repository or InventarioRepository()
 
     def procesar_nueva_reserva(self, usuario_id, paquete_id, fecha_str, cantidad_personas_str):
         # 1. Validación de Reglas de Negocio (Aquí irían validaciones complejas)
@@ -38,8 +52,19 @@ class ReservaService:
         
         return exito, mensaje
 
-    def procesar_reserva_destino(self, usuario_id, destino_id, fecha_str, cantidad_personas_str):
-        """Procesa la reserva de un destino individual."""
+    @staticmethod
+    def _validar_noches(noches):
+        """Convierte las noches de una estadía en entero, o devuelve el motivo por el que no son válidas."""
+        try:
+            noches = int(noches)
+        except (TypeError, ValueError):
+            return None, "La cantidad de noches debe ser un número entero."
+        if not 1 <= noches <= MAX_NOCHES:
+            return None, f"La estadía debe ser de 1 a {MAX_NOCHES} noches."
+        return noches, None
+
+    def procesar_reserva_destino(self, usuario_id, destino_id, fecha_str, cantidad_personas_str, noches=1):
+        """Procesa la reserva de un destino individual para 'noches' noches desde la fecha indicada."""
         try:
             cantidad = int(cantidad_personas_str)
             if cantidad <= 0: return False, "La cantidad debe ser mayor a 0."
@@ -47,16 +72,137 @@ class ReservaService:
             return False, "Cantidad inválida."
 
         if not fecha_str: return False, "La fecha es obligatoria."
+        try:
+            fecha = date.fromisoformat(str(fecha_str).strip())
+        except ValueError:
+            return False, "La fecha debe tener el formato AAAA-MM-DD."
+        noches, error = self._validar_noches(noches)
+        if error: return False, error
 
         reserva = Reserva(
             usuario_id=usuario_id,
             destino_id=destino_id,
-            fecha_reserva=fecha_str,
-            cantidad_personas=cantidad
+            fecha_reserva=fecha,
+            cantidad_personas=cantidad,
+            noches=noches
         )
         
         return self.repo.crear_reserva_destino(reserva)
 
-    def obtener_historial(self, usuario_id):
-        """Devuelve la lista de reservas de un usuario."""
-        return self.repo.obtener_reservas_por_usuario(usuario_id)
+    def fechas_disponibles_destino(self, destino_id, desde_str=None, hasta_str=None, personas=1, noches=1, dias=30):
+        """
+        Fechas en las que se puede empezar una estadía de 'noches' noches para 'personas' personas en el destino,
+        entre 'desde' (hoy si falta) y 'hasta' ('dias' días después si falta). Lanza ValueError si los datos no son válidos.
+        """
+        try:
+            desde = date.fromisoformat(str(desde_str).strip()) if desde_str else date.today()
+            hasta = date.fromisoformat(str(hasta_str).strip()) if hasta_str else desde + timedelta(days=dias - 1)
+        except ValueError:
+            raise ValueError("Las fechas deben tener el formato AAAA-MM-DD.")
+        try:
+            personas = int(personas)
+        except (TypeError, ValueError):
+            raise ValueError("La cantidad de personas debe ser un número entero.")
+        if personas <= 0:
+            raise ValueError("La cantidad de personas debe ser positiva.")
+        noches, error = self._validar_noches(noches)
+        if error:
+            raise ValueError(error)
+        return self.inventario.fechas_disponibles(destino_id, desde, hasta, personas, noches)
+
+    def _validar_item(self, usuario_id, item):
+        """Convierte un item del lote en una Reserva, o devuelve el motivo por el que no es válido."""
+        tipo = str(item.get('tipo') or '').strip().lower()
+        if tipo not in ('paquete', 'destino'):
+            return None, "El tipo debe ser 'paquete' o 'destino'."
+        try:
+            item_id = int(item.get('id'))
+        except (TypeError, ValueError):
+            return None, "El id del paquete o destino es inválido."
+        try:
+            cantidad = int(item.get('personas'))
+        except (TypeError, ValueError):
+            return None, "Cantidad de personas inválida."
+        if cantidad <= 0:
+            return None, "La cantidad de personas debe ser positiva."
+
+        fecha = item.get('fecha') or None
+        if isinstance(fecha, str):
+            try:
+                fecha = date.fromisoformat(fecha.strip()) if fecha.strip() else None
+            except ValueError:
+                return None, "La fecha debe tener el formato AAAA-MM-DD."
+        if tipo == 'destino' and fecha is None:
+            return None, "La fecha es obligatoria."
+
+        if tipo == 'paquete':
+            return Reserva(usuario_id=usuario_id, paquete_id=item_id, fecha_reserva=fecha, cantidad_personas=cantidad), None
+        noches, error = self._validar_noches(item.get('noches') or 1)
+        if error:
+            return None, error
+        return Reserva(usuario_id=usuario_id, destino_id=item_id, fecha_reserva=fecha, cantidad_personas=cantidad, noches=noches), None
+
+    def procesar_lote(self, usuario_id, items, todo_o_nada=False):
+        """
+        Reserva un lote completo (por ejemplo, un grupo) en una sola transacción.
+        Cada item es un diccionario con 'tipo' ('paquete' o 'destino'), 'id', 'fecha', 'personas' y,
+        en los destinos, 'noches' (opcional, 1 por defecto).
+
+        Primero se validan todos los items; los válidos se guardan juntos. Devuelve un ResultadoReserva
+        por item, en el mismo orden, con su propio éxito o error. Con todo_o_nada=True, basta un error
+        (de validación o de cupos) para que no se guarde ninguna reserva.
+        """
+        items = list(items)
+        if len(items) > MAX_RESERVAS_LOTE:
+            raise ValueError(f"Un lote admite como máximo {MAX_RESERVAS_LOTE} reservas.")
+
+        resultados = [None] * len(items)
+        validas, posiciones = [], []
+        for i, item in enumerate(items):
+            reserva, error = self._validar_item(usuario_id, item)
+            if error:
+                resultados[i] = ResultadoReserva(False, ResultadoReserva.DATOS_INVALIDOS, error)
+            else:
+                validas.append(reserva)
+                posiciones.append(i)
+
+        if todo_o_nada and len(validas) < len(items):
+            for i, reserva in zip(posiciones, validas):
+                resultados[i] = ResultadoReserva(False, ResultadoReserva.CANCELADA, "No se guardó: otra reserva del lote no es válida.",
+                                                 paquete_id=reserva.paquete_id, destino_id=reserva.destino_id,
+                                                 cantidad=reserva.cantidad_personas)
+            return resultados
+
+        for i, resultado in zip(posiciones, self.repo.crear_reservas_lote(validas, todo_o_nada=todo_o_nada)):
+            resultados[i] = resultado
+        return resultados
+
+    def procesar_manifiesto_csv(self, usuario_id, archivo, todo_o_nada=False):
+        """
+        Reserva todas las líneas de un manifiesto CSV (ruta o archivo abierto) con procesar_lote().
+        Devuelve una lista de diccionarios con el número de línea del CSV y el resultado de esa línea.
+        """
+        if isinstance(archivo, str):
+            with open(archivo, 'r', encoding='utf-8-sig', newline='') as f:
+                return self.procesar_manifiesto_csv(usuario_id, f, todo_o_nada)
+
+        lector = csv.DictReader(archivo)
+        faltantes = [c for c in ('tipo', 'id', 'personas') if c not in [(n or '').strip().lower() for n in lector.fieldnames or []]]
+        if faltantes:
+            raise ValueError(f"Al manifiesto le faltan las columnas: {', '.join(faltantes)}.")
+        items, lineas = [], []
+        for fila in lector:
+            items.append({(clave or '').strip().lower(): valor for clave, valor in fila.items()})
+            lineas.append(lector.line_num)
+
+        resultados = self.procesar_lote(usuario_id, items, todo_o_nada)
+        return [{'linea': linea, **resultado.como_dict()} for linea, resultado in zip(lineas, resultados)]
+
+    def obtener_historial(self, usuario_id, al_dia=False):
+        """Devuelve la lista de reservas de un usuario (con al_dia=True, leída de la base principal)."""
+        return self.repo.obtener_reservas_por_usuario(usuario_id, al_dia)
+
+    def exportar_historial_csv(self, usuario_id, ruta, progreso=None):
+        """Escribe el historial del usuario en un CSV (comprimido si la ruta termina en '.gz')."""
+        if not ruta: raise ValueError("Debes indicar un archivo de destino.")
+        return exportar_historial(usuario_id, ruta, progreso=progreso)
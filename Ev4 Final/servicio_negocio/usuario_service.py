@@ -1,12 +1,14 @@
 # servicio_negocio/usuario_service.py
 from persistencia.usuarios_repo import UsuarioRepository
 from modelos.usuario import Usuario
+from servicio_negocio.hash_contrasenas import hasher as hasher_por_defecto
 import re # Para las validaciones de negocio (ej. email)
 
 class UsuarioService:
-    def __init__(self, repo: UsuarioRepository):
+    def __init__(self, repo: UsuarioRepository, hasher=None):
         # 🔑 Inyección de Dependencias
         self.repo = repo
+        self.hasher = hasher or hasher_por_defecto  # scrypt en un pool de procesos
     
     # --- Lógica de Negocio (Login) ---
     def autenticar_usuario(self, username, password_plana):
@@ -19,12 +21,16 @@ class UsuarioService:
         if not usuario_db:
             return None, "Usuario no encontrado."
             
-        # El servicio usa el Modelo para verificar la lógica intrínseca (hashing)
-        if Usuario.verify_password(usuario_db.password, password_plana):
-            return usuario_db, "Autenticación exitosa."
-        else:
+        if not self.hasher.verificar(usuario_db.password, password_plana):
             return None, "Contraseña incorrecta."
 
+        # Si el hash es antiguo (SHA-256) o de menor costo, aprovechamos que tenemos la contraseña para renovarlo.
+        if self.hasher.necesita_rehash(usuario_db.password):
+            nuevo_hash = self.hasher.hashear(password_plana)
+            if self.repo.actualizar_password_hash(usuario_db.id, nuevo_hash):
+                usuario_db.password = nuevo_hash
+        return usuario_db, "Autenticación exitosa."
+
     # --- Lógica de Negocio (Registro) ---
     def registrar_usuario_nuevo(self, username, password_plana, nombre, apellido, correo):
         """
@@ -37,7 +43,7 @@ class UsuarioService:
             return False, "La contraseña debe tener al menos 8 caracteres."
         
         # 2. Creación del Modelo con Contraseña Hasheada
-        hashed_password = Usuario.hash_password(password_plana)
+        hashed_password = self.hasher.hashear(password_plana)
         
         nuevo_usuario = Usuario(
             username=username,
@@ -0,0 +1,483 @@
+# servidor_http.py
+"""
+Servidor HTTP/JSON sin ventana: expone los servicios de la agencia (destinos, paquetes, reservas y usuarios)
+para que la web o una aplicación móvil usen exactamente la misma lógica de reservas que la aplicación de escritorio.
+
+Cómo está armado (solo con la biblioteca estándar):
+  * AplicacionAgencia es una aplicación WSGI: traduce cada petición a una llamada a los servicios y la respuesta a JSON.
+    También se puede servir con cualquier servidor WSGI.
+  * El proceso principal abre el puerto y crea varios procesos trabajadores con fork() (pre-fork). Todos aceptan
+    conexiones del mismo socket, así que las peticiones se reparten entre núcleos. Si un trabajador muere, se
+    reemplaza.
+  * Cada trabajador atiende cada conexión en un hilo, con HTTP/1.1 y keep-alive (el cliente reutiliza la conexión
+    para muchas peticiones), y tiene su propio pool de conexiones a MySQL.
+
+Uso (desde la carpeta del proyecto, con la base ya inicializada):
+    python servidor_http.py --puerto 8080 --trabajadores 4
+
+Rutas (las marcadas con * necesitan 'Authorization: Bearer <token>', que entrega POST /sesion):
+    GET  /salud                      estado del trabajador y de su pool
+    GET  /destinos?q=texto           catálogo de destinos (o búsqueda por nombre)
+    GET  /destinos/similares?id=3&k=5
+                                     destinos parecidos y los que también reservaron quienes reservaron ese
+    GET  /paquetes                   catálogo de paquetes
+    GET  /disponibilidad?destino_id=1&desde=2030-01-01&hasta=2030-01-31&personas=2&noches=3
+                                     fechas en las que puede empezar esa estadía
+    POST /paquetes/cotizar           {"paquete_ids": [...], "personas": 2, "fechas": "2030-01-05"}
+    POST /usuarios                   registro: {"username", "password", "nombre", "apellido", "correo"}
+    POST /sesion                     login: {"username", "password"} -> {"token", "usuario"}
+  * GET  /reservas                   historial del usuario
+  * POST /reservas                   {"tipo": "paquete" | "destino", "id": 3, "fecha": "2030-01-05", "personas": 2, "noches": 1}
+  * POST /reservas/lote              {"items": [...], "todo_o_nada": false} (ver ReservaService.procesar_lote)
+"""
+import argparse
+import base64
+import datetime
+import decimal
+import hashlib
+import hmac
+import io
+import json
+import os
+import re
+import secrets
+import signal
+import socket
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, unquote
+
+from database import leer_configuracion, estadisticas_pool, obtener_pool, LECTURA
+from persistencia.destinos_repo import DestinosRepository
+from persistencia.reservas_repo import ReservasRepository
+from persistencia.usuarios_repo import UsuarioRepository
+from servicio_negocio.destinos_service import DestinosService
+from servicio_negocio.hash_contrasenas import hasher
+from servicio_negocio.paquetes_service import PaquetesService
+from servicio_negocio.reserva_service import ReservaService
+from servicio_negocio.usuario_service import UsuarioService
+
+# Tamaño máximo del cuerpo de una petición (un lote de 500 reservas ocupa bastante menos)
+MAX_CUERPO = 1024 * 1024
+
+def _load_servidor_config():
+    """Opciones del servidor ('SERVIDOR_CONFIG' en config.json), con valores por defecto razonables."""
+    opciones = {
+        'host': '127.0.0.1',
+        'puerto': 8080,
+        'trabajadores': None,               # None: uno por núcleo
+        'conexiones_por_trabajador': 5,     # Tamaño del pool de MySQL de cada trabajador
+        'espera_keep_alive': 15,            # Segundos que una conexión quieta se mantiene abierta
+        'duracion_token': 8 * 3600,         # Segundos de validez de un token de sesión
+        'secreto': None,                    # Para firmar los tokens; si falta, uno al azar en cada arranque
+    }
+    opciones.update(leer_configuracion('SERVIDOR_CONFIG'))
+    return opciones
+
+# --- Tokens de sesión ---
+
+class FirmadorTokens:
+    """
+    Tokens de sesión firmados con HMAC: '<usuario_id>.<vence>.<firma>'. No se guardan en ningún lado;
+    cualquier trabajador puede comprobarlos porque todos comparten el secreto (se elige antes del fork).
+    """
+
+    def __init__(self, secreto, duracion):
+        self.secreto = secreto.encode('utf-8') if isinstance(secreto, str) else secreto
+        self.duracion = duracion
+
+    def _firma(self, datos):
+        digest = hmac.new(self.secreto, datos.encode('ascii'), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).decode('ascii').rstrip('=')
+
+    def emitir(self, usuario_id):
+        datos = f"{usuario_id}.{int(time.time()) + self.duracion}"
+        return f"{datos}.{self._firma(datos)}"
+
+    def verificar(self, token):
+        """Devuelve el usuario_id del token, o None si es inválido o venció."""
+        try:
+            usuario_id, vence, firma = token.split('.')
+            if not hmac.compare_digest(firma, self._firma(f"{usuario_id}.{vence}")):
+                return None
+            if int(vence) < time.time():
+                return None
+            return int(usuario_id)
+        except ValueError:
+            return None
+
+# --- Aplicación WSGI ---
+
+class ErrorHTTP(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+
+ESTADOS = {200: '200 OK', 201: '201 Created', 400: '400 Bad Request', 401: '401 Unauthorized',
+           404: '404 Not Found', 409: '409 Conflict', 413: '413 Payload Too Large', 500: '500 Internal Server Error'}
+
+def _a_json(valor):
+    """Para json.dumps: fechas en formato ISO y decimales como números."""
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    if isinstance(valor, decimal.Decimal):
+        return int(valor) if valor == valor.to_integral_value() else float(valor)
+    if hasattr(valor, '__slots__'):
+        return {nombre: getattr(valor, nombre) for nombre in type(valor).__slots__}
+    raise TypeError(f"No se puede convertir a JSON: {type(valor).__name__}")
+
+
+class Peticion:
+    """Lo que los manejadores necesitan de una petición WSGI."""
+
+    def __init__(self, environ):
+        self.environ = environ
+        self.usuario_id = None        # En las rutas autenticadas, el usuario del token
+        self.query = {k: v[-1] for k, v in parse_qs(environ.get('QUERY_STRING', '')).items()}
+        self._json = None
+
+    def json(self):
+        if self._json is None:
+            try:
+                largo = int(self.environ.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                raise ErrorHTTP(400, "Content-Length inválido.")
+            if largo > MAX_CUERPO:
+                raise ErrorHTTP(413, "El cuerpo de la petición es demasiado grande.")
+            try:
+                self._json = json.loads(self.environ['wsgi.input'].read(largo) or b'{}')
+            except ValueError:
+                raise ErrorHTTP(400, "El cuerpo no es un JSON válido.")
+            if not isinstance(self._json, dict):
+                raise ErrorHTTP(400, "Se esperaba un objeto JSON.")
+        return self._json
+
+    def campo(self, nombre, obligatorio=True, defecto=None):
+        valor = self.json().get(nombre, defecto)
+        if obligatorio and valor in (None, ''):
+            raise ErrorHTTP(400, f"Falta el campo '{nombre}'.")
+        return valor
+
+
+class AplicacionAgencia:
+    """Aplicación WSGI sobre los servicios. Las rutas se registran con el decorador 'ruta'."""
+    rutas = []
+
+    def __init__(self, firmador, destinos=None, paquetes=None, reservas=None, usuarios=None):
+        self.firmador = firmador
+        self.destinos = destinos or DestinosService(DestinosRepository())
+        self.paquetes = paquetes or PaquetesService()
+        self.reservas = reservas or ReservaService(ReservasRepository())
+        self.usuarios = usuarios or UsuarioService(UsuarioRepository())
+
+    @classmethod
+    def ruta(cls, metodo, patron, autenticada=False):
+        def registrar(funcion):
+            cls.rutas.append((metodo, re.compile(f"^{patron}$"), autenticada, funcion))
+            return funcion
+        return registrar
+
+    def usuario_autenticado(self, environ):
+        encabezado = environ.get('HTTP_AUTHORIZATION', '')
+        if not encabezado.startswith('Bearer '):
+            raise ErrorHTTP(401, "Falta el token de sesión (Authorization: Bearer ...).")
+        usuario_id = self.firmador.verificar(encabezado[7:].strip())
+        if usuario_id is None:
+            raise ErrorHTTP(401, "Token de sesión inválido o vencido.")
+        return usuario_id
+
+    def __call__(self, environ, start_response):
+        metodo = environ['REQUEST_METHOD']
+        camino = environ.get('PATH_INFO') or '/'
+        try:
+            for metodo_ruta, patron, autenticada, funcion in self.rutas:
+                if metodo_ruta == metodo and patron.match(camino):
+                    peticion = Peticion(environ)
+                    if autenticada:
+                        peticion.usuario_id = self.usuario_autenticado(environ)
+                    estado, datos = funcion(self, peticion)
+                    break
+            else:
+                raise ErrorHTTP(404, f"No existe la ruta {metodo} {camino}.")
+        except ErrorHTTP as e:
+            estado, datos = e.estado, {'error': e.mensaje}
+        except Exception as e:
+            print(f"Error en {metodo} {camino}: {e!r}")
+            estado, datos = 500, {'error': "Error interno del servidor."}
+
+        cuerpo = json.dumps(datos, default=_a_json, ensure_ascii=False).encode('utf-8')
+        start_response(ESTADOS.get(estado, f"{estado} Error"), [
+            ('Content-Type', 'application/json; charset=utf-8'),
+            ('Content-Length', str(len(cuerpo))),
+        ])
+        return [cuerpo]
+
+ruta = AplicacionAgencia.ruta
+
+def _entero(valor, nombre):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErrorHTTP(400, f"'{nombre}' debe ser un número entero.")
+
+def _resultado(exito, mensaje, estado_error=409):
+    return (201, {'mensaje': mensaje}) if exito else (estado_error, {'error': mensaje})
+
+@ruta('GET', '/salud')
+def salud(app, peticion):
+    return 200, {'estado': 'ok', 'pid': os.getpid(), 'pool': estadisticas_pool()}
+
+@ruta('GET', '/destinos')
+def listar_destinos(app, peticion):
+    termino = peticion.query.get('q', '').strip()
+    if termino:
+        return 200, app.destinos.buscar_destinos(termino)
+    return 200, app.destinos.obtener_todos_los_destinos()
+
+@ruta('GET', '/destinos/similares')
+def destinos_similares(app, peticion):
+    destino_id = _entero(peticion.query.get('id'), 'id')
+    k = min(max(_entero(peticion.query.get('k', 5), 'k'), 1), 50)
+    recomendaciones = app.destinos.recomendar_destinos(destino_id, k)
+    return 200, {
+        'destino_id': destino_id,
+        'similares': [{'destino': d, 'similitud': puntaje} for d, puntaje in recomendaciones['similares']],
+        'tambien_reservaron': [{'destino': d, 'veces': veces} for d, veces in recomendaciones['tambien_reservaron']],
+    }
+
+@ruta('GET', '/paquetes')
+def listar_paquetes(app, peticion):
+    return 200, app.paquetes.obtener_todos_los_paquetes()
+
+@ruta('GET', '/disponibilidad')
+def disponibilidad(app, peticion):
+    q = peticion.query
+    destino_id = _entero(q.get('destino_id'), 'destino_id')
+    try:
+        fechas = app.reservas.fechas_disponibles_destino(destino_id, q.get('desde'), q.get('hasta'),
+                                                         q.get('personas', 1), q.get('noches', 1))
+    except ValueError as e:
+        raise ErrorHTTP(400, str(e))
+    return 200, {'destino_id': destino_id, 'fechas': fechas}
+
+@ruta('POST', '/paquetes/cotizar')
+def cotizar(app, peticion):
+    ids = peticion.campo('paquete_ids')
+    if not isinstance(ids, list):
+        raise ErrorHTTP(400, "'paquete_ids' debe ser una lista.")
+    try:
+        return 200, app.paquetes.cotizar_paquetes(ids, peticion.campo('personas'), peticion.campo('fechas', obligatorio=False))
+    except (TypeError, ValueError) as e:
+        raise ErrorHTTP(400, f"Datos de cotización inválidos: {e}")
+
+@ruta('POST', '/usuarios')
+def registrar(app, peticion):
+    campos = [peticion.campo(c) for c in ('username', 'password', 'nombre', 'apellido', 'correo')]
+    return _resultado(*app.usuarios.registrar_usuario_nuevo(*campos), estado_error=400)
+
+@ruta('POST', '/sesion')
+def iniciar_sesion(app, peticion):
+    usuario, mensaje = app.usuarios.autenticar_usuario(peticion.campo('username'), peticion.campo('password'))
+    if not usuario:
+        raise ErrorHTTP(401, "Usuario o contraseña incorrectos.")  # Sin decir cuál de los dos falló
+    datos = {c: getattr(usuario, c) for c in ('id', 'username', 'nombre', 'apellido', 'correo')}
+    return 200, {'token': app.firmador.emitir(usuario.id), 'usuario': datos}
+
+@ruta('GET', '/reservas', autenticada=True)
+def historial(app, peticion):
+    # El historial se lee de la principal: el 'leer lo propio tras escribir' de database.py se lleva por
+    # proceso, y la reserva recién hecha pudo pasar por otro trabajador (la réplica quizás aún no la tiene).
+    return 200, app.reservas.obtener_historial(peticion.usuario_id, al_dia=True)
+
+@ruta('POST', '/reservas', autenticada=True)
+def reservar(app, peticion):
+    tipo = peticion.campo('tipo')
+    item_id = _entero(peticion.campo('id'), 'id')
+    personas = _entero(peticion.campo('personas'), 'personas')
+    if tipo == 'paquete':
+        return _resultado(*app.paquetes.procesar_reserva_paquete(peticion.usuario_id, item_id, personas))
+    if tipo == 'destino':
+        return _resultado(*app.reservas.procesar_reserva_destino(peticion.usuario_id, item_id, peticion.campo('fecha'), personas,
+                                                                 peticion.campo('noches', obligatorio=False, defecto=1)))
+    raise ErrorHTTP(400, "'tipo' debe ser 'paquete' o 'destino'.")
+
+@ruta('POST', '/reservas/lote', autenticada=True)
+def reservar_lote(app, peticion):
+    items = peticion.campo('items')
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        raise ErrorHTTP(400, "'items' debe ser una lista de objetos.")
+    try:
+        resultados = app.reservas.procesar_lote(peticion.usuario_id, items, bool(peticion.campo('todo_o_nada', obligatorio=False, defecto=False)))
+    except ValueError as e:
+        raise ErrorHTTP(400, str(e))
+    return 200, [r.como_dict() for r in resultados]
+
+# --- Servidor: HTTP/1.1 con keep-alive sobre la aplicación WSGI ---
+
+class ManejadorWSGI(BaseHTTPRequestHandler):
+    """
+    Atiende las peticiones de una conexión y se las pasa a la aplicación WSGI. Con HTTP/1.1 la conexión
+    queda abierta para la siguiente petición (keep-alive) hasta que el cliente la cierre o pase
+    'timeout' segundos sin actividad.
+    """
+    protocol_version = 'HTTP/1.1'
+    server_version = 'AgenciaViajes/1.0'
+    timeout = 15
+    # Encabezados y cuerpo salen en dos escrituras: con el algoritmo de Nagle, en una conexión keep-alive
+    # la segunda esperaría el ACK retrasado del cliente (~40 ms por petición).
+    disable_nagle_algorithm = True
+
+    def _atender(self):
+        camino, _, query = self.path.partition('?')
+        largo = self.headers.get('Content-Length')
+        if largo and largo.isdigit() and int(largo) > MAX_CUERPO:
+            self.send_error(413, "El cuerpo de la petición es demasiado grande.")
+            return
+        cuerpo = self.rfile.read(int(largo)) if largo and largo.isdigit() else b''
+        environ = {
+            'REQUEST_METHOD': self.command,
+            'PATH_INFO': unquote(camino),
+            'QUERY_STRING': query,
+            'CONTENT_TYPE': self.headers.get('Content-Type', ''),
+            'CONTENT_LENGTH': str(len(cuerpo)),
+            'SERVER_NAME': self.server.server_address[0],
+            'SERVER_PORT': str(self.server.server_address[1]),
+            'SERVER_PROTOCOL': self.request_version,
+            'REMOTE_ADDR': self.client_address[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(cuerpo),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for clave, valor in self.headers.items():
+            clave = clave.upper().replace('-', '_')
+            if clave not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ[f'HTTP_{clave}'] = valor
+
+        respuesta = {}
+        def start_response(estado, encabezados, exc_info=None):
+            respuesta['estado'], respuesta['encabezados'] = estado, encabezados
+
+        partes = self.server.aplicacion(environ, start_response)
+        try:
+            cuerpo = b''.join(partes)
+        finally:
+            if hasattr(partes, 'close'):
+                partes.close()
+
+        codigo, _, razon = respuesta['estado'].partition(' ')
+        self.send_response(int(codigo), razon)
+        nombres = set()
+        for nombre, valor in respuesta['encabezados']:
+            self.send_header(nombre, valor)
+            nombres.add(nombre.lower())
+        if 'content-length' not in nombres:  # Sin largo conocido, el cliente no sabría dónde termina la respuesta
+            self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(cuerpo)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _atender
+
+    def log_message(self, formato, *args):
+        pass  # Una línea por petición sería demasiado con miles por segundo
+
+
+class ServidorTrabajador(ThreadingMixIn, HTTPServer):
+    """El servidor de un trabajador: usa el socket ya abierto por el proceso principal."""
+    daemon_threads = True
+
+    def __init__(self, sock, aplicacion, espera_keep_alive=15):
+        manejador = type('Manejador', (ManejadorWSGI,), {'timeout': espera_keep_alive})
+        super().__init__(sock.getsockname()[:2], manejador, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.aplicacion = aplicacion
+
+
+def _trabajar(sock, aplicacion, opciones):
+    """Cuerpo de cada proceso trabajador."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C lo maneja el proceso principal
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)  # El principal avisa con SIGTERM que hay que terminar
+    # Los trabajadores ya se reparten los núcleos: cada uno calcula sus hashes en el hilo de la petición.
+    hasher.procesos = 0
+    for pool in {obtener_pool(), obtener_pool(LECTURA)}:  # Pools propios de este proceso (ver database.py)
+        if pool:
+            pool.tamano_maximo = opciones['conexiones_por_trabajador']
+    ServidorTrabajador(sock, aplicacion, opciones['espera_keep_alive']).serve_forever()
+
+def servir(opciones):
+    """Abre el puerto, crea los trabajadores y los vigila hasta recibir Ctrl+C o SIGTERM."""
+    sock = socket.create_server((opciones['host'], opciones['puerto']), backlog=1024)
+    aplicacion = AplicacionAgencia(FirmadorTokens(opciones['secreto'] or secrets.token_bytes(32), opciones['duracion_token']))
+    trabajadores = opciones['trabajadores'] or os.cpu_count() or 1
+
+    if not hasattr(os, 'fork'):
+        print("Aviso: este sistema no permite fork(); se atiende con un solo proceso.")
+        print(f"Escuchando en http://{opciones['host']}:{opciones['puerto']} (1 trabajador)")
+        _trabajar(sock, aplicacion, opciones)
+        return
+
+    hijos = {}
+    terminando = False
+
+    def lanzar():
+        pid = os.fork()
+        if pid == 0:
+            codigo = 0
+            try:
+                _trabajar(sock, aplicacion, opciones)
+            except BaseException as e:
+                print(f"Trabajador {os.getpid()} terminó con error: {e!r}")
+                codigo = 1
+            finally:
+                os._exit(codigo)
+        hijos[pid] = time.monotonic()
+
+    def detener(signum, frame):
+        nonlocal terminando
+        terminando = True
+        for pid in list(hijos):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, detener)
+    signal.signal(signal.SIGTERM, detener)
+    for _ in range(trabajadores):
+        lanzar()
+    print(f"Escuchando en http://{opciones['host']}:{opciones['puerto']} ({trabajadores} trabajadores)")
+
+    while hijos:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        iniciado = hijos.pop(pid, None)
+        if not terminando and iniciado is not None:
+            # Si muere recién creado, esperamos un poco para no relanzarlo sin parar
+            if time.monotonic() - iniciado < 1:
+                time.sleep(1)
+            print(f"El trabajador {pid} terminó; se lanza otro.")
+            lanzar()
+    sock.close()
+    print("Servidor detenido.")
+
+if __name__ == '__main__':
+    opciones = _load_servidor_config()
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON de la agencia de viajes.")
+    parser.add_argument('--host', default=opciones['host'])
+    parser.add_argument('--puerto', type=int, default=opciones['puerto'])
+    parser.add_argument('--trabajadores', type=int, default=opciones['trabajadores'], help="Procesos trabajadores (por defecto, uno por núcleo)")
+    parser.add_argument('--conexiones', type=int, default=opciones['conexiones_por_trabajador'], help="Conexiones a MySQL por trabajador")
+    args = parser.parse_args()
+    opciones.update(host=args.host, puerto=args.puerto, trabajadores=args.trabajadores, conexiones_por_trabajador=args.conexiones)
+    servir(opciones)
@@ -0,0 +1,326 @@
+# trazas_sql.py
+"""
+Traza de las consultas SQL: cada execute() que pasa por una conexión de crear_conexion() queda anotado
+con su 'huella' (la consulta sin valores concretos), la cantidad de parámetros, las filas devueltas,
+el tiempo y el método del repositorio que la hizo.
+
+  * Las últimas consultas se guardan en memoria (un búfer circular: las más viejas se van descartando).
+  * Las que superan el umbral ('umbral_lento_ms') se escriben además en el registro de consultas lentas.
+  * Las consultas se agrupan por 'acción' de la interfaz; al terminar una acción se imprime un resumen,
+    por ejemplo: "ClientDashboard.on_show: 4 consultas, 38.2 ms".
+
+Se configura con la sección 'TRAZAS_CONFIG' de config.json (ver readme.md).
+"""
+import contextvars
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+
+# --- Huella de una consulta ---
+
+_ESPACIOS = re.compile(r'\s+')
+_CADENAS = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMEROS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LISTAS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+_VARIAS_FILAS = re.compile(r'(\(\.\.\.\)|\((?:%s|\?)\))(?:\s*,\s*\1)+')
+
+@lru_cache(maxsize=2048)
+def huella(consulta):
+    """
+    Normaliza la consulta para que todas sus variantes cuenten como una sola:
+    quita espacios de más, reemplaza los valores literales por '?' y las listas '(%s, %s, ...)' por '(...)'.
+    """
+    texto = _ESPACIOS.sub(' ', consulta).strip()
+    texto = _CADENAS.sub('?', texto)
+    texto = _NUMEROS.sub('?', texto)
+    texto = _LISTAS.sub('(...)', texto)
+    return _VARIAS_FILAS.sub(r'\1, ...', texto)
+
+def _origen():
+    """Método (Clase.metodo o modulo.funcion) que hizo la consulta, saltando este módulo y el conector."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        modulo = frame.f_globals.get('__name__', '')
+        if modulo != __name__ and not modulo.startswith('mysql'):
+            yo = frame.f_locals.get('self')
+            nombre = frame.f_code.co_name
+            if yo is not None:
+                return f"{type(yo).__name__}.{nombre}"
+            return f"{modulo.rsplit('.', 1)[-1]}.{nombre}"
+        frame = frame.f_back
+    return '?'
+
+
+class RegistroConsulta:
+    __slots__ = ('huella', 'parametros', 'filas', 'ms', 'origen', 'accion', 'hilo', 'momento')
+
+    def __init__(self, huella, parametros, origen, accion):
+        self.huella = huella
+        self.parametros = parametros
+        self.filas = 0
+        self.ms = 0.0
+        self.origen = origen
+        self.accion = accion
+        self.hilo = threading.current_thread().name
+        self.momento = time.time()
+
+    def como_dict(self):
+        return {nombre: getattr(self, nombre) for nombre in self.__slots__}
+
+    def __repr__(self):
+        return f"[{self.ms:.1f} ms, {self.filas} filas] {self.origen}: {self.huella}"
+
+
+class Accion:
+    """
+    Una acción de la interfaz (por ejemplo, mostrar el panel del cliente). Sus consultas pueden correr
+    en varios hilos; el resumen se emite cuando terminan la acción y todas las tareas que lanzó.
+    """
+
+    def __init__(self, trazador, nombre):
+        self.trazador = trazador
+        self.nombre = nombre
+        self.consultas = 0
+        self.ms = 0.0
+        self.inicio = time.perf_counter()
+        self._abiertas = 1
+        self._lock = threading.Lock()
+
+    def sumar(self, ms):
+        with self._lock:
+            self.consultas += 1
+            self.ms += ms
+
+    def retener(self):
+        """Una tarea más (p. ej. una carga en segundo plano) forma parte de esta acción."""
+        with self._lock:
+            self._abiertas += 1
+
+    def liberar(self):
+        with self._lock:
+            self._abiertas -= 1
+            terminada = self._abiertas == 0
+        if terminada:
+            self.trazador._cerrar_accion(self)
+
+
+_accion_actual = contextvars.ContextVar('accion_sql', default=None)
+
+def accion_actual():
+    return _accion_actual.get()
+
+
+class Trazador:
+    def __init__(self, activo=True, capacidad=1000, umbral_lento_ms=200, archivo_lento=None, mostrar_acciones=True):
+        self.activo = activo
+        self.umbral_lento_ms = umbral_lento_ms
+        self.mostrar_acciones = mostrar_acciones
+        self._recientes = deque(maxlen=capacidad)   # Búfer circular de RegistroConsulta
+        self._acciones = deque(maxlen=200)          # Últimos resúmenes por acción
+        self._lock = threading.Lock()
+        self._log_lento = logging.getLogger('agencia.consultas_lentas')
+        if archivo_lento and not self._log_lento.handlers:
+            manejador = logging.FileHandler(archivo_lento, encoding='utf-8')
+            manejador.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self._log_lento.addHandler(manejador)
+            self._log_lento.setLevel(logging.INFO)
+            self._log_lento.propagate = False
+
+    @classmethod
+    def desde_config(cls, config):
+        # Sin configuración la traza queda apagada: se activa a propósito, para medir.
+        opciones = config or {}
+        archivo = opciones.get('archivo_lento', 'consultas_lentas.log')
+        if archivo and not os.path.isabs(archivo):
+            archivo = os.path.join(os.path.dirname(os.path.abspath(__file__)), archivo)
+        return cls(activo=opciones.get('activo', False), capacidad=opciones.get('capacidad', 1000),
+                   umbral_lento_ms=opciones.get('umbral_lento_ms', 200), archivo_lento=archivo,
+                   mostrar_acciones=opciones.get('mostrar_acciones', False))
+
+    # --- Conexiones ---
+
+    def envolver(self, conexion):
+        """Devuelve la conexión envuelta para que sus cursores anoten cada consulta."""
+        if conexion is None or not self.activo:
+            return conexion
+        return ConexionTrazada(self, conexion)
+
+    def _iniciar(self, consulta, parametros):
+        accion = _accion_actual.get()
+        cantidad = len(parametros) if parametros is not None and hasattr(parametros, '__len__') else 0
+        return RegistroConsulta(huella(consulta), cantidad, _origen(), accion.nombre if accion else None)
+
+    def _terminar(self, registro):
+        with self._lock:
+            self._recientes.append(registro)
+        accion = _accion_actual.get()
+        if accion:
+            accion.sumar(registro.ms)
+        if registro.ms >= self.umbral_lento_ms:
+            self._log_lento.warning(repr(registro))
+
+    # --- Acciones de la interfaz ---
+
+    @contextmanager
+    def accion(self, nombre):
+        """
+        Agrupa las consultas hechas dentro del bloque (y en las tareas de fondo lanzadas desde él):
+
+            with trazador.accion("ClientDashboard.on_show"):
+                ...
+        """
+        if not self.activo:
+            yield None
+            return
+        accion = Accion(self, nombre)
+        token = _accion_actual.set(accion)
+        try:
+            yield accion
+        finally:
+            _accion_actual.reset(token)
+            accion.liberar()
+
+    def _cerrar_accion(self, accion):
+        resumen = {
+            'accion': accion.nombre,
+            'consultas': accion.consultas,
+            'ms_sql': round(accion.ms, 1),
+            'ms_total': round((time.perf_counter() - accion.inicio) * 1000, 1),
+        }
+        with self._lock:
+            self._acciones.append(resumen)
+        if self.mostrar_acciones and accion.consultas:
+            consultas = "1 consulta" if accion.consultas == 1 else f"{accion.consultas} consultas"
+            print(f"[SQL] {accion.nombre}: {consultas}, {resumen['ms_sql']} ms en la BD "
+                  f"({resumen['ms_total']} ms en total)")
+
+    # --- Consultas de lo registrado ---
+
+    def recientes(self, cantidad=None):
+        with self._lock:
+            registros = list(self._recientes)
+        return registros[-cantidad:] if cantidad else registros
+
+    def resumen_acciones(self):
+        with self._lock:
+            return list(self._acciones)
+
+    def resumen_por_huella(self):
+        """Agrupa el búfer por huella: cantidad, tiempo total, promedio y máximo, de la más costosa a la menos."""
+        grupos = {}
+        for r in self.recientes():
+            g = grupos.setdefault(r.huella, {'huella': r.huella, 'origen': r.origen, 'cantidad': 0, 'ms_total': 0.0, 'ms_max': 0.0, 'filas': 0})
+            g['cantidad'] += 1
+            g['ms_total'] += r.ms
+            g['ms_max'] = max(g['ms_max'], r.ms)
+            g['filas'] += r.filas
+        for g in grupos.values():
+            g['ms_promedio'] = g['ms_total'] / g['cantidad']
+        return sorted(grupos.values(), key=lambda g: g['ms_total'], reverse=True)
+
+    def limpiar(self):
+        with self._lock:
+            self._recientes.clear()
+            self._acciones.clear()
+
+
+class ConexionTrazada:
+    """Se comporta como la conexión original, pero sus cursores anotan cada consulta."""
+
+    def __init__(self, trazador, conexion):
+        self._trazador = trazador
+        self._conexion = conexion
+
+    def cursor(self, *args, **kwargs):
+        return CursorTrazado(self._trazador, self._conexion.cursor(*args, **kwargs))
+
+    def close(self):
+        self._conexion.close()
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CursorTrazado:
+    """
+    Envuelve un cursor. El tiempo de una consulta incluye su execute() y la lectura de sus filas
+    (con un cursor sin búfer, las filas llegan recién al pedirlas); se cierra al ejecutar otra o al cerrar el cursor.
+    """
+
+    def __init__(self, trazador, cursor):
+        self._trazador = trazador
+        self._cursor = cursor
+        self._registro = None
+
+    def _cerrar_registro(self):
+        registro, self._registro = self._registro, None
+        if registro is not None:
+            if not registro.filas and self._cursor.rowcount and self._cursor.rowcount > 0:
+                registro.filas = self._cursor.rowcount  # INSERT/UPDATE/DELETE: filas afectadas
+            self._trazador._terminar(registro)
+
+    def _medir(self, metodo, consulta, parametros, *args, **kwargs):
+        self._cerrar_registro()
+        registro = self._trazador._iniciar(consulta, parametros)
+        inicio = time.perf_counter()
+        try:
+            return metodo(consulta, parametros, *args, **kwargs)
+        finally:
+            registro.ms = (time.perf_counter() - inicio) * 1000
+            self._registro = registro
+
+    def execute(self, consulta, parametros=(), *args, **kwargs):
+        return self._medir(self._cursor.execute, consulta, parametros, *args, **kwargs)
+
+    def executemany(self, consulta, secuencia, *args, **kwargs):
+        return self._medir(self._cursor.executemany, consulta, secuencia, *args, **kwargs)
+
+    def _leer(self, metodo, *args):
+        inicio = time.perf_counter()
+        resultado = metodo(*args)
+        if self._registro is not None:
+            self._registro.ms += (time.perf_counter() - inicio) * 1000
+            if isinstance(resultado, list):
+                self._registro.filas += len(resultado)
+            elif resultado is not None:
+                self._registro.filas += 1
+        return resultado
+
+    def fetchone(self):
+        return self._leer(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._leer(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        resultado = self._leer(self._cursor.fetchall)
+        self._cerrar_registro()
+        return resultado
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._cerrar_registro()
+        return self._cursor.close()
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
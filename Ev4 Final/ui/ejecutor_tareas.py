@@ -0,0 +1,151 @@
+# ui/ejecutor_tareas.py
+import contextvars
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from database import obtener_trazador
+from trazas_sql import accion_actual
+
+class EjecutorTareas:
+    """
+    Ejecuta en hilos de fondo las consultas que antes congelaban la ventana, y devuelve el
+    resultado al hilo de Tkinter (el único que puede tocar los widgets) mediante after().
+
+    Cada tarea lleva una 'clave' (por ejemplo 'destinos' o 'historial'):
+      * Si se pide otra tarea con la misma clave antes de que empiece la anterior, la anterior
+        ya no se ejecuta (se agrupan las peticiones repetidas).
+      * Si la anterior ya estaba corriendo, su resultado se descarta al llegar (quedó obsoleto,
+        por ejemplo porque el usuario escribió otra búsqueda).
+    Las escrituras (reservar, registrar, eliminar...) se envían con clave None: nunca se agrupan
+    ni se descartan, cada una se ejecuta y avisa su resultado.
+    """
+
+    INTERVALO_MS = 30  # Cada cuánto revisa el hilo de Tkinter si llegaron resultados
+
+    def __init__(self, raiz, max_hilos=4, al_cambiar_estado=None):
+        self.raiz = raiz
+        self.al_cambiar_estado = al_cambiar_estado  # Función(ocupado: bool) para mostrar el estado de carga
+        self._pool = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="ui-tarea")
+        self._resultados = queue.Queue()
+        self._avisos = queue.Queue()      # Llamadas a la interfaz pedidas desde los hilos (p. ej. progreso)
+        self._generaciones = {}   # clave -> número de la petición más reciente
+        self._pendientes = {}     # clave -> número de la petición más reciente aún sin resolver
+        self._lock = threading.Lock()
+        self._cerrado = False
+        self._ocupado = False
+        self._unicas = 0          # Contador para las tareas sin clave (cada una es independiente)
+        self.raiz.after(self.INTERVALO_MS, self._procesar_resultados)
+
+    def enviar(self, clave, funcion, *args, al_terminar=None, al_fallar=None, **kwargs):
+        """
+        Ejecuta funcion(*args, **kwargs) en segundo plano. Al terminar se llama (en el hilo de Tkinter)
+        a al_terminar(resultado) o, si lanzó una excepción, a al_fallar(excepcion).
+        """
+        with self._lock:
+            if clave is None:
+                self._unicas += 1
+                clave = ('unica', self._unicas)
+            generacion = self._generaciones.get(clave, 0) + 1
+            self._generaciones[clave] = generacion
+            self._pendientes[clave] = generacion
+        self._actualizar_estado()
+
+        # Las consultas de la tarea se suman a la acción de la interfaz que la lanzó (o a una nueva con
+        # el nombre del método que llamó a enviar), para el resumen del trazador SQL.
+        accion = accion_actual()
+        if accion is None:
+            llamador = sys._getframe(1)
+            yo = llamador.f_locals.get('self')
+            nombre = f"{type(yo).__name__}.{llamador.f_code.co_name}" if yo is not None else llamador.f_code.co_name
+            bloque = obtener_trazador().accion(nombre)
+        else:
+            bloque = nullcontext(accion)
+        with bloque as accion:
+            if accion: accion.retener()
+            contexto = contextvars.copy_context()
+        self._pool.submit(contexto.run, self._ejecutar, clave, generacion, funcion, args, kwargs, al_terminar, al_fallar, accion)
+        return generacion
+
+    def en_hilo_ui(self, funcion, *args):
+        """
+        Pide que funcion(*args) se ejecute en el hilo de Tkinter. Se puede llamar desde una tarea de fondo,
+        por ejemplo para mostrar el avance de una importación o exportación.
+        """
+        self._avisos.put((funcion, args))
+
+    def cancelar(self, clave):
+        """Descarta cualquier resultado pendiente de esa clave."""
+        with self._lock:
+            self._generaciones[clave] = self._generaciones.get(clave, 0) + 1
+            self._pendientes.pop(clave, None)
+        self._actualizar_estado()
+
+    def ocupado(self, clave=None):
+        with self._lock:
+            return clave in self._pendientes if clave else bool(self._pendientes)
+
+    def _vigente(self, clave, generacion):
+        with self._lock:
+            return self._generaciones.get(clave) == generacion
+
+    def _ejecutar(self, clave, generacion, funcion, args, kwargs, al_terminar, al_fallar, accion):
+        # Corre en un hilo de fondo: nada de widgets aquí.
+        try:
+            if self._cerrado or not self._vigente(clave, generacion):
+                return  # Ya hay una petición más nueva con la misma clave: no vale la pena ejecutarla
+            try:
+                resultado, error = funcion(*args, **kwargs), None
+            except Exception as e:
+                resultado, error = None, e
+            self._resultados.put((clave, generacion, resultado, error, al_terminar, al_fallar))
+        finally:
+            if accion: accion.liberar()
+
+    def _procesar_resultados(self):
+        # Corre en el hilo de Tkinter.
+        try:
+            while True:
+                funcion, args = self._avisos.get_nowait()
+                try:
+                    funcion(*args)
+                except Exception as e:
+                    print(f"Error al actualizar la interfaz: {e}")
+        except queue.Empty:
+            pass
+        try:
+            while True:
+                clave, generacion, resultado, error, al_terminar, al_fallar = self._resultados.get_nowait()
+                with self._lock:
+                    if self._generaciones.get(clave) != generacion:
+                        continue  # Resultado obsoleto
+                    self._pendientes.pop(clave, None)
+                    if isinstance(clave, tuple) and clave[0] == 'unica':
+                        del self._generaciones[clave]
+                try:
+                    if error is not None:
+                        if al_fallar: al_fallar(error)
+                        else: print(f"Error en tarea de fondo '{clave}': {error}")
+                    elif al_terminar:
+                        al_terminar(resultado)
+                except Exception as e:
+                    print(f"Error al mostrar el resultado de '{clave}': {e}")
+        except queue.Empty:
+            pass
+        self._actualizar_estado()
+        if not self._cerrado:
+            self.raiz.after(self.INTERVALO_MS, self._procesar_resultados)
+
+    def _actualizar_estado(self):
+        ocupado = self.ocupado()
+        if ocupado != self._ocupado:
+            self._ocupado = ocupado
+            if self.al_cambiar_estado:
+                self.al_cambiar_estado(ocupado)
+
+    def cerrar(self):
+        """Detiene el ejecutor (las tareas que no empezaron se descartan)."""
+        self._cerrado = True
+        self._pool.shutdown(wait=False)
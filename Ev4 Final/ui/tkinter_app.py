@@ -1,29 +1,45 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import re
-import threading
 
-from database import crear_conexion
+from database import obtener_trazador
 from persistencia.usuarios_repo import UsuarioRepository
 from persistencia.destinos_repo import DestinosRepository
 from persistencia.reservas_repo import ReservasRepository
+from persistencia.importador_destinos import importar_destinos
+from persistencia.exportador_reservas import exportar_reservas
+from persistencia.resumenes_repo import ResumenesRepository
 from servicio_negocio.usuario_service import UsuarioService
 from servicio_negocio.destinos_service import DestinosService
 from servicio_negocio.reserva_service import ReservaService
 from servicio_negocio.paquetes_service import PaquetesService
 from servicio_negocio.pais_service import PaisService
 from modelos.usuario import Usuario
+from ui.ejecutor_tareas import EjecutorTareas
 
 # Inicialización de Servicios
 usuario_repo = UsuarioRepository()
 destinos_repo = DestinosRepository()
 reservas_repo = ReservasRepository()
+resumenes_repo = ResumenesRepository()
 usuario_service = UsuarioService(repo=usuario_repo)
 destinos_service = DestinosService(repo=destinos_repo)
 paquetes_service = PaquetesService()
 reserva_service = ReservaService(reservas_repository=reservas_repo)
 pais_service = PaisService()
 
+# Cantidad de reservas que se piden a la base de datos cada vez que el administrador llega al final de la lista
+TAMANO_PAGINA_RESERVAS = 200
+
+def pedir_ruta_csv(nombre_sugerido):
+    """Pregunta dónde guardar una exportación. Si el nombre termina en '.gz', el archivo se comprime."""
+    return filedialog.asksaveasfilename(
+        title="Exportar a CSV",
+        initialfile=nombre_sugerido,
+        defaultextension=".csv",
+        filetypes=[("CSV", "*.csv"), ("CSV comprimido", "*.csv.gz"), ("Todos los archivos", "*.*")]
+    )
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -70,6 +86,14 @@ class App(tk.Tk):
 
         self.current_user = None
 
+        # Barra de estado: avisa cuando hay datos cargándose en segundo plano
+        self.status_label = ttk.Label(self, text="", anchor="w", padding=(10, 2))
+        self.status_label.pack(side="bottom", fill="x")
+
+        # Todas las consultas a la base de datos pasan por aquí para no congelar la ventana
+        self.tareas = EjecutorTareas(self, al_cambiar_estado=self.mostrar_cargando)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
         container = ttk.Frame(self, style="TFrame")
         container.pack(side="top", fill="both", expand=True)
         container.grid_rowconfigure(0, weight=1)
@@ -86,9 +110,19 @@ class App(tk.Tk):
     def show_frame(self, cont):
         frame = self.frames[cont]
         if hasattr(frame, 'on_show'):
-            frame.on_show()
+            # Todas las cargas que lanza on_show cuentan como una sola acción en el resumen del trazador SQL
+            with obtener_trazador().accion(f"{cont.__name__}.on_show"):
+                frame.on_show()
         frame.tkraise()
 
+    def mostrar_cargando(self, ocupado):
+        self.status_label.config(text="⏳ Cargando datos..." if ocupado else "")
+        self.config(cursor="watch" if ocupado else "")
+
+    def on_close(self):
+        self.tareas.cerrar()
+        self.destroy()
+
 class LoginPage(tk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent)
@@ -115,19 +149,19 @@ class LoginPage(tk.Frame):
     def login(self):
         correo = self.username_entry.get()
         password = self.password_entry.get()
-        
+        self.controller.tareas.enviar('login', self.autenticar, correo, password, al_terminar=self.on_login)
+
+    @staticmethod
+    def autenticar(correo, password):
+        # Corre en segundo plano: valida las credenciales y consulta el rol
         usuario, mensaje = usuario_service.autenticar_usuario(correo, password)
-        
+        rol = usuario_repo.obtener_rol(usuario.id) if usuario else None
+        return usuario, mensaje, rol
+
+    def on_login(self, resultado):
+        usuario, mensaje, rol = resultado
         if usuario:
             self.controller.current_user = usuario
-            
-            # Verificar rol (Consulta directa para asegurar)
-            conn = crear_conexion()
-            cursor = conn.cursor()
-            cursor.execute("SELECT rol FROM usuarios WHERE id = %s", (usuario.id,))
-            res = cursor.fetchone()
-            rol = res[0] if res else 'cliente'
-            conn.close()
 
             if rol == 'admin':
                 self.controller.show_frame(AdminDashboard)
@@ -200,15 +234,19 @@ class RegisterPage(tk.Frame):
             messagebox.showerror("Error de Contraseña", "Las contraseñas no coinciden.")
             return
 
-        # Llamada corregida al servicio de negocio
-        exito, mensaje = usuario_service.registrar_usuario_nuevo(
+        # Llamada corregida al servicio de negocio (en segundo plano; es una escritura, así que va sin clave)
+        self.controller.tareas.enviar(
+            None, usuario_service.registrar_usuario_nuevo,
             username=correo, 
             password_plana=password, 
             nombre=nombre, 
             apellido=apellido, 
-            correo=correo
+            correo=correo,
+            al_terminar=self.on_registro
         )
-        
+
+    def on_registro(self, resultado):
+        exito, mensaje = resultado
         if exito:
             messagebox.showinfo("Éxito", mensaje)
             self.controller.show_frame(LoginPage)
@@ -268,6 +306,15 @@ class ClientDashboard(tk.Frame):
         self.fecha_entry = ttk.Entry(reserva_frame)
         self.fecha_entry.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
 
+        # Noches de la estadía: la reserva ocupa un lugar en cada uno de esos días.
+        noches_frame = ttk.Frame(reserva_frame)
+        noches_frame.grid(row=1, column=2, padx=20, pady=5, sticky="ew")
+        ttk.Label(noches_frame, text="Noches:").pack(side="left")
+        self.noches_entry = ttk.Entry(noches_frame, width=5)
+        self.noches_entry.insert(0, "1")
+        self.noches_entry.pack(side="left", padx=5)
+        ttk.Button(reserva_frame, text="📅 Fechas con Lugar", command=self.ver_fechas_disponibles).grid(row=0, column=2, padx=20, sticky="ew")
+
         ttk.Label(reserva_frame, text="Cantidad de Personas:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
         self.personas_entry = ttk.Entry(reserva_frame)
         self.personas_entry.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
@@ -283,6 +330,10 @@ class ClientDashboard(tk.Frame):
         self.info_pais_label = ttk.Label(reserva_frame, text="[Info del País]", background="#E1E1E1", relief="sunken", anchor="nw", padding=10, width=30)
         self.info_pais_label.grid(row=0, column=3, rowspan=4, padx=10, pady=5, sticky="ns")
 
+        # --- Recomendaciones del destino elegido ---
+        self.recomendaciones_label = ttk.Label(reserva_frame, text="", justify="left", wraplength=600)
+        self.recomendaciones_label.grid(row=4, column=0, columnspan=4, padx=5, pady=5, sticky="w")
+
         reserva_frame.columnconfigure(1, weight=1)
 
         # --- Tab Paquetes ---
@@ -292,11 +343,16 @@ class ClientDashboard(tk.Frame):
         paquetes_frame = ttk.LabelFrame(self.tab_paquetes, text="📦 Paquetes Turísticos")
         paquetes_frame.pack(pady=10, padx=10, fill="both", expand=True)
 
-        ttk.Button(paquetes_frame, text="🔄 Actualizar Lista", command=self.cargar_paquetes).pack(anchor="e", padx=5, pady=5)
+        barra_p = ttk.Frame(paquetes_frame)
+        barra_p.pack(fill="x", padx=5, pady=5)
+        ttk.Button(barra_p, text="🔄 Actualizar Lista", command=self.cargar_paquetes).pack(side="right")
+        ttk.Button(barra_p, text="📋 Reservar Grupo (CSV)", command=self.reservar_manifiesto).pack(side="right", padx=5)
 
-        # Agregamos 'Descripcion' a las columnas pero la ocultamos con displaycolumns
-        cols_p = ('ID', 'Nombre', 'Inicio', 'Fin', 'Cupos', 'Costo', 'Descripcion')
-        self.tree_paquetes = ttk.Treeview(paquetes_frame, columns=cols_p, show='headings', displaycolumns=('ID', 'Nombre', 'Inicio', 'Fin', 'Cupos', 'Costo'))
+        # Agregamos 'Descripcion' a las columnas pero la ocultamos con displaycolumns.
+        # 'Total' es el precio para la cantidad de personas escrita abajo (se recalcula para todos a la vez).
+        cols_p = ('ID', 'Nombre', 'Inicio', 'Fin', 'Cupos', 'Costo', 'Descripcion', 'Total')
+        self.tree_paquetes = ttk.Treeview(paquetes_frame, columns=cols_p, show='headings', displaycolumns=('ID', 'Nombre', 'Inicio', 'Fin', 'Cupos', 'Costo', 'Total'))
+        self.precios_paquetes = {}  # id -> precio por persona, tal como viene de la base de datos
 
         for col in cols_p:
             if col != 'Descripcion': self.tree_paquetes.heading(col, text=col)
@@ -348,6 +404,8 @@ class ClientDashboard(tk.Frame):
         ttk.Button(historial_buttons_frame, text="🔄 Actualizar", command=self.cargar_historial).pack(side="left", padx=10)
         ttk.Button(historial_buttons_frame, text="❌ Cancelar Reserva", command=self.cancelar_reserva_seleccionada).pack(side="left", padx=10)
         ttk.Button(historial_buttons_frame, text="📂 Exportar CSV", command=self.exportar_historial_csv).pack(side="left", padx=10)
+        self.export_label = ttk.Label(historial_buttons_frame, text="")
+        self.export_label.pack(side="left", padx=10)
 
     def on_show(self):
         self.cargar_destinos()
@@ -355,31 +413,45 @@ class ClientDashboard(tk.Frame):
         self.cargar_historial()
 
     def cargar_destinos(self):
+        # 'destinos' es la misma clave que usa la búsqueda: si llega una petición nueva, la anterior se descarta
+        self.controller.tareas.enviar('destinos', destinos_service.obtener_todos_los_destinos, al_terminar=self.mostrar_destinos)
+
+    def mostrar_destinos(self, destinos):
         for i in self.tree_destinos.get_children():
             self.tree_destinos.delete(i)
-        
-        destinos = destinos_service.obtener_todos_los_destinos()
         for d in destinos:
             self.tree_destinos.insert('', 'end', values=(d.id, d.nombre, d.descripcion, d.actividades, d.costo))
 
     def cargar_paquetes(self):
+        self.controller.tareas.enviar('paquetes', paquetes_service.obtener_todos_los_paquetes, al_terminar=self.mostrar_paquetes)
+
+    def mostrar_paquetes(self, paquetes):
         for i in self.tree_paquetes.get_children():
             self.tree_paquetes.delete(i)
-        paquetes = paquetes_service.obtener_todos_los_paquetes()
+        self.precios_paquetes = {p.id: p.precio for p in paquetes}
         for p in paquetes:
-            self.tree_paquetes.insert('', 'end', values=(p.id, p.nombre, p.fecha_inicio, p.fecha_fin, p.cupos, f"${p.costo:,.0f}", p.descripcion))
+            self.tree_paquetes.insert('', 'end', iid=str(p.id),
+                                      values=(p.id, p.nombre, p.fecha_inicio, p.fecha_fin, p.cupos, f"${p.precio:,.0f}", p.descripcion, ''))
+        self.cotizar_listado()
+
+    def cotizar_listado(self):
+        """Pide el total de todos los paquetes para la cantidad de personas actual (una sola cotización)."""
+        try:
+            personas = max(int(self.personas_p_entry.get()), 1)
+        except ValueError:
+            personas = 1
+        self.controller.tareas.enviar('cotizacion', paquetes_service.cotizar_todos, personas, al_terminar=self.mostrar_totales)
+
+    def mostrar_totales(self, totales):
+        for iid in self.tree_paquetes.get_children():
+            total = totales.get(int(iid))
+            self.tree_paquetes.set(iid, 'Total', f"${total:,.0f}" if total is not None else '')
 
     def buscar_destinos(self):
         query = self.search_entry.get()
         if not query:
             return
-        
-        for i in self.tree_destinos.get_children():
-            self.tree_destinos.delete(i)
-            
-        destinos = destinos_service.buscar_destinos(query)
-        for d in destinos:
-            self.tree_destinos.insert('', 'end', values=(d.id, d.nombre, d.descripcion, d.actividades, d.costo))
+        self.controller.tareas.enviar('destinos', destinos_service.buscar_destinos, query, al_terminar=self.mostrar_destinos)
 
     def on_destino_select(self, event):
         selected_item = self.tree_destinos.focus()
@@ -401,20 +473,31 @@ class ClientDashboard(tk.Frame):
             pais = nombre_completo # Caso "Singapur"
             
         self.info_pais_label.config(text="Buscando datos...")
-        threading.Thread(target=self.cargar_info_pais_async, args=(pais,), daemon=True).start()
-
-    def cargar_info_pais_async(self, pais):
-        exito, info, bandera = pais_service.obtener_info_pais(pais)
-        
-        def actualizar_ui():
-            if exito:
-                # compound='bottom' pone la imagen debajo del texto
-                self.info_pais_label.config(text=info, image=bandera, compound='bottom')
-                self.info_pais_label.image = bandera # Guardar referencia para evitar Garbage Collection
-            else:
-                self.info_pais_label.config(text=f"No hay datos para:\n{pais}", image='')
-        
-        self.after(0, actualizar_ui)
+        # Si el usuario cambia de destino antes de que llegue la respuesta, solo se muestra la del último
+        self.controller.tareas.enviar('pais', pais_service.obtener_info_pais, pais,
+                                      al_terminar=lambda resultado: self.mostrar_info_pais(pais, resultado))
+
+        self.recomendaciones_label.config(text="Buscando destinos parecidos...")
+        self.controller.tareas.enviar('recomendaciones', destinos_service.recomendar_destinos, int(values[0]), 3,
+                                      al_terminar=self.mostrar_recomendaciones,
+                                      al_fallar=lambda e: self.recomendaciones_label.config(text=""))
+
+    def mostrar_recomendaciones(self, recomendaciones):
+        lineas = []
+        if recomendaciones['similares']:
+            lineas.append("✨ Parecidos: " + ", ".join(d.nombre for d, _ in recomendaciones['similares']))
+        if recomendaciones['tambien_reservaron']:
+            lineas.append("👥 También reservaron: " + ", ".join(d.nombre for d, _ in recomendaciones['tambien_reservaron']))
+        self.recomendaciones_label.config(text="\n".join(lineas))
+
+    def mostrar_info_pais(self, pais, resultado):
+        exito, info, bandera = resultado
+        if exito:
+            # compound='bottom' pone la imagen debajo del texto
+            self.info_pais_label.config(text=info, image=bandera, compound='bottom')
+            self.info_pais_label.image = bandera # Guardar referencia para evitar Garbage Collection
+        else:
+            self.info_pais_label.config(text=f"No hay datos para:\n{pais}", image='')
 
     def actualizar_costo_destino(self, event=None):
         if not hasattr(self, 'selected_destino_cost'): return
@@ -432,8 +515,7 @@ class ClientDashboard(tk.Frame):
         self.paquete_label.config(text=f"{values[1]} (ID: {values[0]})")
         
         try:
-            cost_str = str(values[5]).replace('$', '').replace(',', '')
-            self.selected_paquete_cost = float(cost_str)
+            self.selected_paquete_cost = self.precios_paquetes.get(int(values[0]), 0)
         except (ValueError, IndexError):
             self.selected_paquete_cost = 0
         self.actualizar_costo_paquete()
@@ -443,6 +525,8 @@ class ClientDashboard(tk.Frame):
         self.paquete_desc_label.config(text=descripcion)
 
     def actualizar_costo_paquete(self, event=None):
+        if event is not None:
+            self.cotizar_listado()
         if not hasattr(self, 'selected_paquete_cost'): return
         try:
             personas = int(self.personas_p_entry.get())
@@ -462,16 +546,44 @@ class ClientDashboard(tk.Frame):
         destino_id = values[0]
         fecha = self.fecha_entry.get()
         personas = self.personas_entry.get()
+        noches = self.noches_entry.get()
         usuario_id = self.controller.current_user.id
 
-        # 2. Llamar al servicio
-        exito, mensaje = reserva_service.procesar_reserva_destino(usuario_id, destino_id, fecha, personas)
+        # 2. Llamar al servicio (en segundo plano)
+        self.controller.tareas.enviar(None, reserva_service.procesar_reserva_destino, usuario_id, destino_id, fecha, personas, noches,
+                                      al_terminar=self.on_reserva_destino)
 
+    def ver_fechas_disponibles(self):
+        """Muestra en qué fechas de los próximos 30 días (desde la fecha escrita, u hoy) cabe la estadía."""
+        selected_item = self.tree_destinos.focus()
+        if not selected_item:
+            messagebox.showwarning("Atención", "Por favor, selecciona un destino de la lista.")
+            return
+        destino_id = self.tree_destinos.item(selected_item, 'values')[0]
+        personas = self.personas_entry.get().strip() or 1
+        noches = self.noches_entry.get().strip() or 1
+        self.controller.tareas.enviar('fechas_destino', reserva_service.fechas_disponibles_destino, destino_id,
+                                      self.fecha_entry.get().strip() or None, None, personas, noches,
+                                      al_terminar=lambda fechas: self.on_fechas_disponibles(fechas, personas, noches),
+                                      al_fallar=lambda e: messagebox.showerror("Error", str(e)))
+
+    def on_fechas_disponibles(self, fechas, personas, noches):
+        if not fechas:
+            messagebox.showinfo("Fechas con Lugar", f"No hay fechas con lugar para {personas} persona(s) y {noches} noche(s) en los próximos 30 días.")
+            return
+        messagebox.showinfo("Fechas con Lugar",
+                            f"Se puede empezar la estadía ({personas} persona(s), {noches} noche(s)) en:\n\n" +
+                            ", ".join(f.isoformat() for f in fechas))
+
+    def on_reserva_destino(self, resultado):
+        exito, mensaje = resultado
         if exito:
             messagebox.showinfo("Éxito", mensaje)
             # Opcional: Limpiar campos
             self.fecha_entry.delete(0, tk.END)
             self.personas_entry.delete(0, tk.END)
+            self.noches_entry.delete(0, tk.END)
+            self.noches_entry.insert(0, "1")
             self.costo_total_label.config(text="$0")
         else:
             messagebox.showerror("Error", mensaje)
@@ -487,7 +599,11 @@ class ClientDashboard(tk.Frame):
         personas = self.personas_p_entry.get()
         usuario_id = self.controller.current_user.id
 
-        exito, mensaje = paquetes_service.procesar_reserva_paquete(usuario_id, paquete_id, personas)
+        self.controller.tareas.enviar(None, paquetes_service.procesar_reserva_paquete, usuario_id, paquete_id, personas,
+                                      al_terminar=self.on_reserva_paquete)
+
+    def on_reserva_paquete(self, resultado):
+        exito, mensaje = resultado
         if exito:
             messagebox.showinfo("Éxito", mensaje)
             self.personas_p_entry.delete(0, tk.END)
@@ -496,57 +612,53 @@ class ClientDashboard(tk.Frame):
         else:
             messagebox.showerror("Error", mensaje)
 
+    def reservar_manifiesto(self):
+        """Reserva de una vez todas las líneas de un manifiesto CSV (tipo,id,fecha,personas)."""
+        ruta = filedialog.askopenfilename(title="Manifiesto del grupo", filetypes=[("CSV", "*.csv"), ("Todos los archivos", "*.*")])
+        if not ruta: return
+        todo_o_nada = messagebox.askyesno("Reserva de grupo", "¿Reservar solo si todas las líneas se pueden reservar?\n"
+                                                              "(Si eliges 'No', se guardan las que sí se puedan.)")
+        self.controller.tareas.enviar(None, reserva_service.procesar_manifiesto_csv, self.controller.current_user.id, ruta, todo_o_nada,
+                                      al_terminar=self.on_reserva_manifiesto,
+                                      al_fallar=lambda e: messagebox.showerror("Error", f"No se pudo procesar el manifiesto: {e}"))
+
+    def on_reserva_manifiesto(self, resultados):
+        hechas = sum(1 for r in resultados if r['exito'])
+        errores = [f"Línea {r['linea']}: {r['mensaje']}" for r in resultados if not r['exito']]
+        mensaje = f"{hechas} de {len(resultados)} reservas realizadas."
+        if errores:
+            mensaje += "\n\n" + "\n".join(errores[:15])
+            if len(errores) > 15:
+                mensaje += f"\n... y {len(errores) - 15} más."
+        (messagebox.showinfo if not errores else messagebox.showwarning)("Reserva de grupo", mensaje)
+        if hechas:
+            self.cargar_paquetes()
+            self.cargar_historial()
+
     def logout(self):
+        # Lo que quedaba por cargar ya no le corresponde a nadie
+        for clave in ('destinos', 'paquetes', 'cotizacion', 'historial', 'pais'):
+            self.controller.tareas.cancelar(clave)
         self.controller.current_user = None
         self.controller.show_frame(LoginPage)
 
     def cargar_historial(self):
         """Carga las reservas del usuario actual en la tabla."""
-        # Limpiar tabla actual
-        for i in self.tree_historial.get_children():
-            self.tree_historial.delete(i)
-            
         if not self.controller.current_user:
+            self.mostrar_historial([])
             return
 
         usuario_id = self.controller.current_user.id
-        reservas = reserva_service.obtener_historial(usuario_id)
-        
-        # Obtener datos para recálculo de costos (Fix para costo 0)
-        all_destinos = destinos_service.obtener_todos_los_destinos()
-        all_paquetes = paquetes_service.obtener_todos_los_paquetes()
-        
-        # Mapeos para búsqueda rápida
-        destinos_map = {d.id: d.costo for d in all_destinos}
-        paquetes_map = {p.id: p.costo for p in all_paquetes}
-        # Fallback por nombre
-        destinos_name_map = {d.nombre: d.costo for d in all_destinos}
-        paquetes_name_map = {p.nombre: p.costo for p in all_paquetes}
+        # El costo total ya viene calculado desde la base de datos (destinos y paquetes).
+        self.controller.tareas.enviar('historial', reserva_service.obtener_historial, usuario_id, al_terminar=self.mostrar_historial)
+
+    def mostrar_historial(self, reservas):
+        # Limpiar tabla actual
+        for i in self.tree_historial.get_children():
+            self.tree_historial.delete(i)
 
         for r in reservas:
             costo_final = r.get('costo_total') or 0
-            
-            # Lógica de corrección si el costo es 0
-            if costo_final == 0:
-                cantidad = r.get('cantidad_personas', 0)
-                costo_unitario = 0
-                
-                # 1. Intentar por ID
-                if r.get('destino_id') in destinos_map:
-                    costo_unitario = destinos_map[r['destino_id']]
-                elif r.get('paquete_id') in paquetes_map:
-                    costo_unitario = paquetes_map[r['paquete_id']]
-                
-                # 2. Intentar por Nombre (si ID falló)
-                if costo_unitario == 0:
-                    nombre = r.get('nombre_item')
-                    if nombre in destinos_name_map:
-                        costo_unitario = destinos_name_map[nombre]
-                    elif nombre in paquetes_name_map:
-                        costo_unitario = paquetes_name_map[nombre]
-                
-                costo_final = costo_unitario * cantidad
-
             # Insertamos los datos obtenidos del repositorio
             self.tree_historial.insert('', 'end', values=(r['id'], r['nombre_item'], r['fecha_reserva'], r['cantidad_personas'], f"${costo_final:,.0f}"))
 
@@ -555,8 +667,27 @@ class ClientDashboard(tk.Frame):
         messagebox.showinfo("Info", "Funcionalidad de cancelar reserva en desarrollo.")
 
     def exportar_historial_csv(self):
-        # Pendiente de implementación
-        messagebox.showinfo("Info", "Funcionalidad de exportar a CSV en desarrollo.")
+        """Exporta el historial a CSV (o CSV comprimido) en segundo plano, mostrando el avance."""
+        if not self.controller.current_user:
+            return
+        ruta = pedir_ruta_csv(f"historial_{self.controller.current_user.id}.csv")
+        if not ruta: return
+        self.export_label.config(text="Exportando...")
+        tareas = self.controller.tareas
+
+        def progreso(filas, filas_por_segundo):
+            tareas.en_hilo_ui(self.export_label.config, {'text': f"{filas:,} filas ({filas_por_segundo:,.0f}/s)"})
+
+        def terminado(resumen):
+            self.export_label.config(text="")
+            messagebox.showinfo("Exportación", f"{resumen['filas']:,} reservas exportadas a:\n{resumen['ruta']}")
+
+        def fallido(error):
+            self.export_label.config(text="")
+            messagebox.showerror("Error", f"No se pudo exportar el historial: {error}")
+
+        tareas.enviar(None, reserva_service.exportar_historial_csv, self.controller.current_user.id, ruta,
+                      progreso=progreso, al_terminar=terminado, al_fallar=fallido)
 
 class AdminDashboard(tk.Frame):
     def __init__(self, parent, controller):
@@ -586,6 +717,16 @@ class AdminDashboard(tk.Frame):
         self.search_entry = ttk.Entry(toolbar, width=25)
         self.search_entry.pack(side="left", padx=5)
         ttk.Button(toolbar, text="🔍 Buscar por Correo", command=self.buscar_reservas).pack(side="left", padx=5)
+
+        # Importación masiva del catálogo de destinos
+        ttk.Label(toolbar, text="|").pack(side="left", padx=10)
+        ttk.Button(toolbar, text="📥 Importar Destinos", command=self.importar_destinos).pack(side="left", padx=5)
+        self.import_label = ttk.Label(toolbar, text="")
+        self.import_label.pack(side="left", padx=5)
+        ttk.Button(toolbar, text="📤 Exportar Reservas", command=self.exportar_reservas).pack(side="left", padx=5)
+        self.export_label = ttk.Label(toolbar, text="")
+        self.export_label.pack(side="left", padx=5)
+        ttk.Button(toolbar, text="📊 Reportes", command=self.abrir_reportes).pack(side="left", padx=5)
         
         # Treeview
         cols = ('ID', 'Usuario', 'Item', 'Tipo', 'Fecha', 'Pax', 'Creada')
@@ -595,12 +736,23 @@ class AdminDashboard(tk.Frame):
             self.tree.column(col, width=100)
         self.tree.column('Usuario', width=150)
         self.tree.column('Item', width=200)
+
+        # La lista se va llenando por páginas: al acercarse al final del scroll se pide la siguiente.
+        self.scroll = ttk.Scrollbar(content_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.on_scroll_reservas)
+        self.scroll.pack(side="right", fill="y", pady=5)
         self.tree.pack(fill="both", expand=True, padx=5, pady=5)
 
+        self.filtro_correo = None
+        self.ultimo_id = None      # id de la última reserva mostrada (punto de partida de la próxima página)
+        self.hay_mas = False
+        self.cargando = False
+
     def on_show(self):
         self.cargar_reservas()
 
     def logout(self):
+        self.controller.tareas.cancelar('admin_reservas')
         self.controller.current_user = None
         self.controller.show_frame(LoginPage)
 
@@ -609,40 +761,88 @@ class AdminDashboard(tk.Frame):
         self.cargar_reservas(filtro_correo=termino)
 
     def cargar_reservas(self, filtro_correo=None):
+        """Vacía la tabla y carga la primera página de reservas."""
         for i in self.tree.get_children():
             self.tree.delete(i)
-            
-        conn = crear_conexion()
-        if not conn: return
-        cursor = conn.cursor()
-        try:
-            query = """
-                SELECT r.id, u.correo, 
-                       COALESCE(d.nombre, p.nombre) as item,
-                       CASE WHEN r.destino_id IS NOT NULL THEN 'Destino' ELSE 'Paquete' END as tipo,
-                       r.fecha_reserva, r.cantidad_personas, r.fecha_creacion
-                FROM reservas r
-                JOIN usuarios u ON r.usuario_id = u.id
-                LEFT JOIN destinos d ON r.destino_id = d.id
-                LEFT JOIN paquetes p ON r.paquete_id = p.id
-            """
-            
-            if filtro_correo:
-                query += " WHERE u.correo LIKE %s"
-                params = (f"%{filtro_correo}%",)
-            else:
-                params = ()
-            
-            query += " ORDER BY r.id DESC"
-            
-            cursor.execute(query, params)
-            for row in cursor.fetchall():
-                self.tree.insert('', 'end', values=row)
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudieron cargar las reservas: {e}")
-        finally:
-            cursor.close()
-            conn.close()
+        self.filtro_correo = filtro_correo
+        self.ultimo_id = None
+        self.hay_mas = True
+        self.cargando = False  # Si había una página en camino, su resultado se descartará al enviar la nueva
+        self.cargar_mas_reservas()
+
+    def cargar_mas_reservas(self):
+        """Pide en segundo plano la siguiente página de reservas."""
+        if self.cargando or not self.hay_mas: return
+        self.cargando = True
+        self.controller.tareas.enviar(
+            'admin_reservas', reservas_repo.obtener_reservas_admin,
+            antes_de_id=self.ultimo_id, limite=TAMANO_PAGINA_RESERVAS, filtro_correo=self.filtro_correo,
+            al_terminar=self.agregar_reservas, al_fallar=self.on_error_reservas
+        )
+
+    def agregar_reservas(self, filas):
+        """Agrega al final de la tabla la página recibida."""
+        for row in filas:
+            self.tree.insert('', 'end', values=row)
+        if filas:
+            self.ultimo_id = filas[-1][0]
+        self.hay_mas = len(filas) == TAMANO_PAGINA_RESERVAS
+        self.cargando = False
+
+    def on_error_reservas(self, error):
+        self.cargando = False
+        self.hay_mas = False
+        messagebox.showerror("Error", f"No se pudieron cargar las reservas: {error}")
+
+    def on_scroll_reservas(self, inicio, fin):
+        self.scroll.set(inicio, fin)
+        # Cuando se ve el último 10% de la lista (o la lista no llena la ventana), pedimos más filas.
+        if float(fin) > 0.9 and self.hay_mas and not self.cargando:
+            self.after_idle(self.cargar_mas_reservas)
+
+    def importar_destinos(self):
+        """Importa un catálogo de destinos (JSON, NDJSON o CSV) en segundo plano, mostrando el avance."""
+        ruta = filedialog.askopenfilename(
+            title="Importar catálogo de destinos",
+            filetypes=[("Catálogos", "*.json *.ndjson *.jsonl *.csv"), ("Todos los archivos", "*.*")]
+        )
+        if not ruta: return
+        self.import_label.config(text="Importando...")
+
+        tareas = self.controller.tareas
+
+        def progreso(filas, filas_por_segundo):
+            tareas.en_hilo_ui(self.import_label.config, {'text': f"{filas:,} filas ({filas_por_segundo:,.0f}/s)"})
+
+        def terminado(resumen):
+            self.import_label.config(text="")
+            messagebox.showinfo("Importación", f"{resumen['filas']:,} destinos importados en {resumen['segundos']} s.")
+
+        def fallido(error):
+            self.import_label.config(text="")
+            messagebox.showerror("Error", f"No se pudo importar el archivo: {error}")
+
+        tareas.enviar(None, importar_destinos, ruta, progreso=progreso, al_terminar=terminado, al_fallar=fallido)
+
+    def exportar_reservas(self):
+        """Exporta todas las reservas a CSV (o CSV comprimido) en segundo plano, mostrando el avance."""
+        ruta = pedir_ruta_csv("reservas.csv.gz")
+        if not ruta: return
+        self.export_label.config(text="Exportando...")
+        tareas = self.controller.tareas
+
+        def progreso(filas, filas_por_segundo):
+            tareas.en_hilo_ui(self.export_label.config, {'text': f"{filas:,} filas ({filas_por_segundo:,.0f}/s)"})
+
+        def terminado(resumen):
+            self.export_label.config(text="")
+            messagebox.showinfo("Exportación", f"{resumen['filas']:,} reservas exportadas en {resumen['segundos']} s.")
+
+        def fallido(error):
+            self.export_label.config(text="")
+            messagebox.showerror("Error", f"No se pudo exportar: {error}")
+
+        tareas.enviar(None, exportar_reservas, ruta, progreso=progreso, al_terminar=terminado, al_fallar=fallido)
 
     def eliminar_reserva(self):
         selected = self.tree.focus()
@@ -654,18 +854,17 @@ class AdminDashboard(tk.Frame):
         confirm = messagebox.askyesno("Confirmar", f"¿Estás seguro de eliminar la reserva ID {reserva_id}?\nEsta acción es irreversible.")
         
         if confirm:
-            conn = crear_conexion()
-            cursor = conn.cursor()
-            try:
-                cursor.execute("DELETE FROM reservas WHERE id = %s", (reserva_id,))
-                conn.commit()
-                messagebox.showinfo("Éxito", "Reserva eliminada.")
-                self.cargar_reservas()
-            except Exception as e:
-                messagebox.showerror("Error", f"Error al eliminar: {e}")
-            finally:
-                cursor.close()
-                conn.close()
+            # El repositorio también devuelve los cupos al paquete y descuenta la reserva de los reportes.
+            def eliminada(resultado):
+                exito, mensaje = resultado
+                if not exito:
+                    messagebox.showerror("Error", mensaje)
+                    return
+                messagebox.showinfo("Éxito", mensaje)
+                self.cargar_reservas(self.filtro_correo)
+
+            self.controller.tareas.enviar(None, reservas_repo.eliminar_reserva, int(reserva_id), al_terminar=eliminada,
+                                          al_fallar=lambda e: messagebox.showerror("Error", f"Error al eliminar: {e}"))
 
     def editar_reserva(self):
         selected = self.tree.focus()
@@ -693,18 +892,56 @@ class AdminDashboard(tk.Frame):
                 messagebox.showerror("Error", "Ingresa un número válido.")
                 return
                 
-            conn = crear_conexion()
-            cursor = conn.cursor()
-            try:
-                cursor.execute("UPDATE reservas SET cantidad_personas = %s WHERE id = %s", (nuevo_pax, reserva_id))
-                conn.commit()
-                messagebox.showinfo("Éxito", "Reserva actualizada.")
+            def actualizada(resultado):
+                exito, mensaje = resultado
+                if not exito:
+                    messagebox.showerror("Error", mensaje)
+                    return
+                messagebox.showinfo("Éxito", mensaje)
                 edit_win.destroy()
-                self.cargar_reservas()
-            except Exception as e:
-                messagebox.showerror("Error", f"Error al actualizar: {e}")
-            finally:
-                cursor.close()
-                conn.close()
+                self.cargar_reservas(self.filtro_correo)
+
+            self.controller.tareas.enviar(None, reservas_repo.actualizar_cantidad_personas, int(reserva_id), int(nuevo_pax),
+                                          al_terminar=actualizada,
+                                          al_fallar=lambda e: messagebox.showerror("Error", f"Error al actualizar: {e}"))
                 
-        ttk.Button(edit_win, text="Guardar", command=guardar_cambios).pack(pady=10)
\ No newline at end of file
+        ttk.Button(edit_win, text="Guardar", command=guardar_cambios).pack(pady=10)
+
+    def abrir_reportes(self):
+        """Ventana con los reportes de gestión (se leen de las tablas de resumen, así que cargan al instante)."""
+        win = tk.Toplevel(self)
+        win.title("Reportes")
+        win.geometry("750x450")
+        pestanas = ttk.Notebook(win)
+        pestanas.pack(fill="both", expand=True, padx=10, pady=10)
+
+        def crear_tabla(titulo, columnas):
+            marco = ttk.Frame(pestanas)
+            pestanas.add(marco, text=titulo)
+            tabla = ttk.Treeview(marco, columns=columnas, show='headings')
+            for col in columnas:
+                tabla.heading(col, text=col)
+                tabla.column(col, width=100)
+            tabla.pack(fill="both", expand=True)
+            return tabla
+
+        ocupacion = crear_tabla("Ocupación de Paquetes", ('Paquete', 'Inicio', 'Reservas', 'Personas', 'Cupos Libres', 'Ocupación %', 'Ingresos'))
+        ingresos = crear_tabla("Ingresos por Destino", ('Mes', 'Destino', 'Reservas', 'Personas', 'Ingresos'))
+        por_dia = crear_tabla("Reservas por Día", ('Día', 'Reservas', 'Personas', 'Ingresos'))
+
+        def llenar(tabla, filas):
+            if not tabla.winfo_exists(): return  # La ventana se cerró antes de que llegaran los datos
+            for fila in filas:
+                tabla.insert('', 'end', values=fila)
+
+        tareas = self.controller.tareas
+        error = lambda e: messagebox.showerror("Error", f"No se pudo cargar el reporte: {e}")
+        tareas.enviar('reporte_ocupacion', resumenes_repo.ocupacion_paquetes, al_fallar=error, al_terminar=lambda filas: llenar(ocupacion, [
+            (f['nombre'], f['fecha_inicio'], f['reservas'], f['personas'], f['cupos_libres'], f['ocupacion'] or 0, f"${f['ingresos']:,}")
+            for f in filas]))
+        tareas.enviar('reporte_ingresos', resumenes_repo.ingresos_por_destino_mes, al_fallar=error, al_terminar=lambda filas: llenar(ingresos, [
+            (f['mes'].strftime('%Y-%m'), f['nombre'], f['reservas'], f['personas'], f"${f['ingresos']:,}")
+            for f in filas]))
+        tareas.enviar('reporte_dias', resumenes_repo.reservas_por_dia, al_fallar=error, al_terminar=lambda filas: llenar(por_dia, [
+            (f['dia'], f['reservas'], f['personas'], f"${f['ingresos']:,}")
+            for f in filas]))
\ No newline at end of file